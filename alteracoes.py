@@ -0,0 +1,229 @@
+# alteracoes.py
+# Feed de alterações das tabelas: cada escrita (local ou vinda do Supabase Realtime) invalida apenas
+# os caches que dependem da tabela alterada, no lugar de TTLs curtos e de st.cache_data.clear().
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+import cache_compartilhado
+from instrumentacao import cache_medido, registrar_evento
+
+# TTL longo: só uma rede de segurança caso alguma notificação se perca
+TTL_PADRAO = 3600
+
+# Tabelas escritas por cada RPC do sistema. 'atualizar_status_parcelas' fica vazia de propósito:
+# ela roda uma vez por dia por sessão e só muda linhas quando alguma vence; essas mudanças chegam pelo feed.
+TABELAS_DAS_RPCS = {
+    'get_clientes_arquivados': (),
+    'arquivar_cliente': ('clientes',), 'reativar_cliente': ('clientes',),
+    'arquivar_fornecedor': ('fornecedores',), 'reativar_fornecedor': ('fornecedores',),
+    'arquivar_corretor': ('corretores',), 'reativar_corretor': ('corretores',),
+    'gerar_parcelas': ('parcelas',),
+    'registrar_pagamento_parcela': ('parcelas',), 'registrar_pagamento_conta': ('contas_a_pagar',),
+    'registrar_pagamento_comissao': ('comissoes',),
+    'atualizar_status_parcelas': (),
+    'resumo_financeiro_obras': (),
+}
+
+_trava = threading.Lock()
+_versoes = {}
+_dependentes = {}
+_feeds = set()
+_ouvintes = []
+# Último resultado bom de cada função/argumentos, servido quando o Supabase falha
+_ultimos_bons = OrderedDict()
+MAX_ULTIMOS_BONS = 256
+_log = logging.getLogger(__name__)
+
+# --- Versões das Tabelas ---
+# Contadores nomeados 'tabela', 'tabela|coluna' (todas as entradas por coluna) e 'tabela|coluna|valor'.
+# Com um backend compartilhado configurado, os contadores ficam nele e valem para todas as réplicas.
+def _nome_versao(*partes) -> str:
+    return "|".join(str(parte) for parte in partes)
+
+def _ler_versoes(nomes: list) -> tuple:
+    backend = cache_compartilhado.backend_atual()
+    if backend is not None:
+        versoes = backend.versoes(nomes)
+        return tuple(versoes.get(nome, 0) for nome in nomes)
+    with _trava:
+        return tuple(_versoes.get(nome, 0) for nome in nomes)
+
+def _incrementar(nomes: list):
+    backend = cache_compartilhado.backend_atual()
+    if backend is not None:
+        backend.incrementar(nomes)
+        return
+    with _trava:
+        for nome in nomes:
+            _versoes[nome] = _versoes.get(nome, 0) + 1
+
+def _versao_de(tabelas: tuple, chave: str = None, valor=None) -> tuple:
+    """Versões que entram na chave do cache: as das tabelas ou, com 'chave', as do valor consultado."""
+    if chave is None:
+        return _ler_versoes(list(tabelas))
+    return _ler_versoes([nome for tabela in tabelas for nome in (_nome_versao(tabela, chave), _nome_versao(tabela, chave, valor))])
+
+def notificar(tabela: str, evento: str = '*', linhas: list = None):
+    """
+    Registra uma alteração na tabela. Caches com 'chave' (ex.: parcelas por debito_id) só perdem
+    as entradas dos valores presentes nas linhas; sem as linhas, perdem todas.
+    """
+    linhas = linhas if isinstance(linhas, list) else []
+    with _trava:
+        dependentes = list(_dependentes.get(tabela, {}).values())
+    nomes = [tabela]
+    for chave in {chave for _, chave in dependentes if chave}:
+        valores = [linha.get(chave) for linha in linhas]
+        if valores and None not in valores:
+            nomes += [_nome_versao(tabela, chave, valor) for valor in set(valores)]
+        else:
+            nomes.append(_nome_versao(tabela, chave))
+    _incrementar(nomes)
+    # Entradas de versões antigas nunca mais são lidas; as grandes (sem 'chave') são liberadas já
+    for funcao, chave in dependentes:
+        if chave is None:
+            funcao.clear()
+    for ouvinte in list(_ouvintes):
+        try:
+            ouvinte(tabela, evento, linhas)
+        except Exception as e:
+            _log.warning("Ouvinte de alterações falhou (%s): %s", tabela, e)
+    registrar_evento('alteracao', tabela, 0.0, linhas=len(linhas), resultado=evento)
+
+def ouvir(funcao):
+    """Registra funcao(tabela, evento, linhas), chamada a cada alteração (ex.: para manter o índice de busca)."""
+    with _trava:
+        if funcao not in _ouvintes:
+            _ouvintes.append(funcao)
+
+def registrar_escrita(alvo: str, operacao: str, linhas=None):
+    """Chamado pelo cliente instrumentado após insert/update/upsert/delete ou RPC bem-sucedidos."""
+    if operacao != 'RPC':
+        notificar(alvo, operacao, linhas)
+        return
+    # RPC desconhecida: invalida tudo o que está em cache, por segurança
+    for tabela in TABELAS_DAS_RPCS.get(alvo, tuple(_dependentes)):
+        notificar(tabela, 'RPC')
+
+# --- Decorador ---
+def cache_por_tabelas(*tabelas: str, chave: str = None, **opcoes_cache):
+    """
+    Igual a cache_medido, com a versão das 'tabelas' na chave do cache e TTL longo.
+    Com 'chave', o primeiro argumento da função é o valor dessa coluna (ex.: chave='debito_id').
+    Numa falta, o resultado é procurado (e depois gravado) no backend compartilhado, se houver.
+    Se a consulta falhar (ex.: disjuntor aberto), devolve o último resultado bom com um aviso.
+    """
+    opcoes_cache.setdefault('ttl', TTL_PADRAO)
+    ttl = opcoes_cache['ttl'] if isinstance(opcoes_cache['ttl'], (int, float)) else TTL_PADRAO
+    def decorador(func):
+        @functools.wraps(func)
+        def consultar(versao_tabelas, *args, **kwargs):
+            backend = cache_compartilhado.backend_atual()
+            argumentos = _argumentos(assinatura, args, kwargs) if backend else None
+            if argumentos is None:
+                return func(*args, **kwargs)
+            chave_compartilhada = f"{os.path.basename(func.__code__.co_filename)}:{func.__qualname__}:{versao_tabelas!r}:{argumentos}"
+            inicio = time.perf_counter()
+            resultado = backend.ler_objeto(chave_compartilhada)
+            if resultado is not None:
+                registrar_evento('cache_compartilhado', func.__qualname__, time.perf_counter() - inicio, resultado='hit')
+                return resultado
+            resultado = func(*args, **kwargs)
+            backend.gravar_objeto(chave_compartilhada, resultado, ttl)
+            registrar_evento('cache_compartilhado', func.__qualname__, time.perf_counter() - inicio, resultado='miss')
+            return resultado
+        assinatura = inspect.signature(func)
+        consultar.__signature__ = assinatura.replace(parameters=[
+            inspect.Parameter('versao_tabelas', inspect.Parameter.POSITIONAL_OR_KEYWORD),
+            *assinatura.parameters.values(),
+        ])
+        em_cache = cache_medido(**opcoes_cache)(consultar)
+
+        identificador = (func.__code__.co_filename, func.__qualname__)
+
+        @functools.wraps(func)
+        def chamar(*args, **kwargs):
+            valor = args[0] if chave and args else kwargs.get(chave)
+            argumentos = _argumentos(assinatura, args, kwargs)
+            chave_ultimo = (identificador, argumentos) if argumentos is not None else None
+            try:
+                resultado = em_cache(_versao_de(tabelas, chave, valor), *args, **kwargs)
+            except Exception:
+                with _trava:
+                    anterior = _ultimos_bons.get(chave_ultimo) if chave_ultimo else None
+                if anterior is None:
+                    raise
+                registrar_evento('cache', func.__qualname__, 0.0, resultado='ultimo_bom')
+                st.toast("⚠️ Servidor instável: mostrando os últimos dados carregados.")
+                return anterior
+            if chave_ultimo:
+                with _trava:
+                    _ultimos_bons[chave_ultimo] = resultado
+                    _ultimos_bons.move_to_end(chave_ultimo)
+                    while len(_ultimos_bons) > MAX_ULTIMOS_BONS:
+                        _ultimos_bons.popitem(last=False)
+            return resultado
+        chamar.clear = em_cache.clear
+
+        # Cada execução da página redefine a função; fica registrada a mais recente (o cache é o mesmo)
+        with _trava:
+            for tabela in tabelas:
+                _dependentes.setdefault(tabela, {})[identificador] = (chamar, chave)
+        return chamar
+    return decorador
+
+def _argumentos(assinatura, args, kwargs):
+    """
+    Argumentos como texto estável entre processos (menos os iniciados por '_', como no
+    st.cache_data). None se algum argumento não tiver repr estável.
+    """
+    argumentos = assinatura.bind(*args, **kwargs).arguments
+    valores = [(nome, valor) for nome, valor in argumentos.items() if not nome.startswith('_')]
+    if not all(isinstance(valor, (str, int, float, bool, type(None), tuple)) for _, valor in valores):
+        return None
+    return repr(valores)
+
+# --- Fontes de Alterações ---
+def iniciar_feed(cliente, url: str, chave_api: str):
+    """
+    Liga o feed uma vez por processo: os ouvintes do banco em memória dos benchmarks ou,
+    com o Supabase de verdade, uma assinatura do Realtime numa thread própria.
+    """
+    banco = getattr(cliente, 'banco', None)
+    identificador = id(banco) if banco is not None else url
+    with _trava:
+        if identificador in _feeds:
+            return
+        _feeds.add(identificador)
+    if banco is not None and hasattr(banco, 'ouvintes'):
+        banco.ouvintes.append(notificar)
+        return
+    threading.Thread(target=asyncio.run, args=(_escutar_realtime(url, chave_api),),
+                     name="feed-alteracoes", daemon=True).start()
+
+def _ao_receber(mensagem: dict):
+    dados = mensagem.get('data', {})
+    linha = dados.get('record') or dados.get('old_record')
+    notificar(dados.get('table'), dados.get('type', '*'), [linha] if linha else None)
+
+async def _escutar_realtime(url: str, chave_api: str):
+    """Assina as alterações do schema 'public' (as tabelas precisam estar na publicação supabase_realtime)."""
+    try:
+        from realtime import AsyncRealtimeClient
+        cliente = AsyncRealtimeClient(f"{url.rstrip('/')}/realtime/v1", chave_api, auto_reconnect=True)
+        await cliente.connect()
+        canal = cliente.channel("gestao-alteracoes")
+        canal.on_postgres_changes("*", schema="public", callback=_ao_receber)
+        await canal.subscribe()
+        await asyncio.Event().wait()
+    except Exception as e:
+        # Sem o feed, os caches ainda expiram pelo TTL e as escritas locais continuam invalidando
+        _log.warning("Feed de alterações (Realtime) indisponível: %s", e)
@@ -0,0 +1,2 @@
+# benchmarks
+# Suíte de benchmarks offline: dados sintéticos, Supabase falso e cenários cronometrados.
@@ -0,0 +1,292 @@
+# benchmarks/carga.py
+# Teste de carga: N sessões simultâneas percorrem as páginas reais (via AppTest) contra o Supabase falso.
+#
+#   python -m benchmarks.carga --sessoes 1 5 10 20 --rodadas 3
+#   python -m benchmarks.carga --sessoes 10 --paginas pages/Clientes.py --latencia-ms 30 --saida carga.json
+#
+# Tudo roda num único processo, como um servidor Streamlit: as sessões compartilham o cache
+# (st.cache_data) e disputam o mesmo GIL, então a latência de rerun reflete a concorrência real.
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import warnings
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parent.parent
+EMAIL_USUARIO = "usuario.carga@exemplo.com"
+SEGREDOS = {'supabase_url': "http://supabase.local", 'supabase_key': "chave-local", 'admin_emails': []}
+
+# --- Roteiros por Página ---
+# Cada roteiro tem passos iniciais (abrir a página, login) e passos repetidos a cada rodada.
+# Um passo é (nome, ação): a ação altera widgets do AppTest e o harness mede o rerun seguinte.
+def _widget(at, tipo: str, rotulo: str):
+    return next(w for w in getattr(at, tipo) if w.label == rotulo)
+
+def _escolher(at, rotulo: str, sorteio: random.Random):
+    caixa = _widget(at, 'selectbox', rotulo)
+    if caixa.options:
+        caixa.set_value(sorteio.choice(caixa.options))
+
+def _login(at, sorteio):
+    _widget(at, 'text_input', "Email").set_value(EMAIL_USUARIO)
+    _widget(at, 'text_input', "Senha").set_value("senha-de-teste")
+    _widget(at, 'button', "Entrar").click()
+
+def _buscar_cliente(at, sorteio):
+    at.text_input(key="busca_ativos").set_value(sorteio.choice(["Silva", "Ana", "Costa", "Rafael", ""]))
+
+def _filtrar_debitos(at, sorteio):
+    _escolher(at, "Filtrar por Cliente:", sorteio)
+
+def _projecao(at, sorteio):
+    _widget(at, 'slider', "Horizonte (meses)").set_value(sorteio.choice([6, 12, 24, 36]))
+    _widget(at, 'radio', "Agrupamento").set_value(sorteio.choice(["Diária", "Semanal", "Mensal"]))
+
+def _aging(at, sorteio):
+    _widget(at, 'radio', "Agrupar por").set_value(sorteio.choice(["Cliente", "Obra"]))
+
+def _extrato(at, sorteio):
+    _escolher(at, "Selecione um cliente para gerar o extrato", sorteio)
+
+def _nada(at, sorteio):
+    pass
+
+ROTEIROS = {
+    'Página_Inicial.py': ([("abrir", _nada), ("login", _login)], [("recarregar", _nada)]),
+    'pages/Clientes.py': ([("abrir", _nada)], [("buscar", _buscar_cliente), ("recarregar", _nada)]),
+    'pages/Contas_a_Receber.py': ([("abrir", _nada)], [("filtrar_cliente", _filtrar_debitos)]),
+    'pages/Relatorios_Financeiros.py': ([("abrir", _nada)], [("projecao", _projecao), ("aging", _aging), ("extrato", _extrato)]),
+}
+
+# --- Backend Local ---
+def instalar_backend(escala: int, semente: int, latencia_ms: float, por_mil_linhas_ms: float):
+    """Faz 'supabase.create_client' devolver o cliente falso sobre uma base sintética compartilhada."""
+    import supabase
+    from benchmarks.dados_sinteticos import gerar_base
+    from benchmarks.supabase_falso import BancoFalso, ClienteSupabaseFalso, Latencia
+
+    banco = BancoFalso(gerar_base(escala, semente))
+    latencia = Latencia(latencia_ms, por_mil_linhas_ms)
+
+    def criar_cliente(url, key, *args, **kwargs):
+        return ClienteSupabaseFalso(banco, latencia)
+
+    supabase.create_client = criar_cliente
+    if 'utils' in sys.modules:  # já importado com o create_client original
+        sys.modules['utils'].create_client = criar_cliente
+    return banco
+
+# --- AppTest Concorrente ---
+def preparar_apptest_concorrente(secrets: dict):
+    """
+    O AppTest foi feito para um teste por vez: a cada execução ele troca st.secrets, o
+    Runtime e a opção 'global.appTest' globais e recompila o script. Para várias sessões
+    em paralelo, fixamos esses globais uma vez para o processo e compartilhamos o bytecode
+    entre as sessões, como faz o servidor.
+    """
+    import contextlib
+    from unittest.mock import MagicMock
+
+    import streamlit as st
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.secrets import Secrets
+    from streamlit.testing.v1 import app_test
+
+    config.set_option("global.appTest", True)
+    app_test.patch_config_options = lambda opcoes: contextlib.nullcontext()
+
+    segredos = Secrets()
+    segredos._secrets = dict(secrets)
+    st.secrets = segredos
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: cls._instance or runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    compilados = ScriptCache()
+    ScriptCache.get_bytecode = lambda self, caminho, _original=ScriptCache.get_bytecode: _original(compilados, caminho)
+
+# --- Sessões ---
+def _rss_kb() -> float:
+    """Memória residente atual do processo (Linux); fora do Linux, o pico informado pelo SO."""
+    try:
+        with open("/proc/self/statm") as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def nova_sessao(pagina: str, timeout: float):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(RAIZ / pagina), default_timeout=timeout)
+    if pagina != 'Página_Inicial.py':
+        at.session_state['logged_in'] = True
+        at.session_state['user_email'] = EMAIL_USUARIO
+    return at
+
+def executar_sessao(indice: int, paginas: list, rodadas: int, pausa_ms: float, timeout: float, semente: int) -> tuple:
+    """
+    Um usuário simulado: visita as páginas (começando por uma diferente a cada sessão) e percorre
+    o roteiro de cada uma. Devolve ([AppTest], [(pagina, passo, ms, erro)]).
+    """
+    sorteio = random.Random(semente + indice)
+    ordem = paginas[indice % len(paginas):] + paginas[:indice % len(paginas)]
+    apps, medidas = [], []
+    for pagina in ordem:
+        at = nova_sessao(pagina, timeout)
+        apps.append(at)
+        iniciais, repetidos = ROTEIROS[pagina]
+        for nome, acao in iniciais + repetidos * rodadas:
+            erro = None
+            try:
+                acao(at, sorteio)
+            except (StopIteration, KeyError):
+                erro = "widget não encontrado"
+            inicio = time.perf_counter()
+            try:
+                at.run()
+            except Exception as e:
+                erro = f"{type(e).__name__}: {e}"
+            duracao = (time.perf_counter() - inicio) * 1000
+            if erro is None and at.exception:
+                erro = at.exception[0].message
+            medidas.append((pagina, nome, duracao, erro))
+            if pausa_ms:
+                time.sleep(sorteio.uniform(0, pausa_ms) / 1000)
+    return apps, medidas
+
+# --- Métricas ---
+def _percentis(valores) -> dict:
+    if not valores:
+        return {'n': 0}
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {'n': len(valores), 'p50_ms': round(float(p50), 1), 'p95_ms': round(float(p95), 1), 'p99_ms': round(float(p99), 1),
+            'max_ms': round(float(max(valores)), 1)}
+
+def _diferenca_agregados(antes: dict, depois: dict) -> dict:
+    """Chamadas e segundos por (tipo, resultado) ocorridos entre dois instantâneos."""
+    totais = {}
+    for chave, valor in depois.items():
+        anterior = antes.get(chave, {'chamadas': 0, 'segundos': 0.0})
+        tipo, _, resultado = chave
+        soma = totais.setdefault((tipo, resultado), {'chamadas': 0, 'segundos': 0.0})
+        soma['chamadas'] += valor['chamadas'] - anterior['chamadas']
+        soma['segundos'] += valor['segundos'] - anterior['segundos']
+    return totais
+
+def executar_nivel(n_sessoes: int, paginas: list, rodadas: int, pausa_ms: float, timeout: float, semente: int) -> dict:
+    from instrumentacao import agregados
+
+    gc.collect()
+    memoria_antes = _rss_kb()
+    agregados_antes = agregados()
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessoes) as executor:
+        futuros = [executor.submit(executar_sessao, i, paginas, rodadas, pausa_ms, timeout, semente)
+                   for i in range(n_sessoes)]
+        resultados = [f.result() for f in futuros]
+    duracao = time.perf_counter() - inicio
+    memoria_depois = _rss_kb()  # sessões ainda vivas
+    totais = _diferenca_agregados(agregados_antes, agregados())
+
+    medidas = [m for _, lista in resultados for m in lista]
+    del resultados
+    gc.collect()
+
+    acertos = totais.get(('cache', 'hit'), {}).get('chamadas', 0)
+    faltas = totais.get(('cache', 'miss'), {}).get('chamadas', 0)
+    remotas = {t: sum(v['chamadas'] for (tipo, _), v in totais.items() if tipo == t) for t in ('consulta', 'rpc', 'storage')}
+    return {
+        'sessoes': n_sessoes,
+        'reruns': len(medidas),
+        'reruns_por_segundo': round(len(medidas) / duracao, 2),
+        'erros': sorted({f"{p} [{n}]: {e}" for p, n, _, e in medidas if e}),
+        'latencia': _percentis([d for _, _, d, e in medidas if not e]),
+        'latencia_por_pagina': {p: _percentis([d for pg, _, d, e in medidas if pg == p and not e]) for p in paginas},
+        'memoria_por_sessao_kb': round(max(memoria_depois - memoria_antes, 0) / n_sessoes, 1),
+        'cache': {'acertos': acertos, 'faltas': faltas,
+                  'taxa_acerto': round(acertos / (acertos + faltas), 3) if acertos + faltas else None},
+        'chamadas_remotas': remotas,
+        'segundos_em_chamadas_remotas': round(sum(v['segundos'] for (tipo, _), v in totais.items() if tipo in remotas), 3),
+    }
+
+def imprimir_nivel(r: dict):
+    lat = r['latencia']
+    print(f"\n== {r['sessoes']} sessões simultâneas: {r['reruns']} reruns ({r['reruns_por_segundo']}/s)")
+    if lat['n']:
+        print(f"  latência do rerun   p50 {lat['p50_ms']:>8.1f} ms   p95 {lat['p95_ms']:>8.1f} ms   p99 {lat['p99_ms']:>8.1f} ms")
+    for pagina, p in r['latencia_por_pagina'].items():
+        if p['n']:
+            print(f"    {pagina:<34} p50 {p['p50_ms']:>8.1f} ms   p95 {p['p95_ms']:>8.1f} ms   p99 {p['p99_ms']:>8.1f} ms")
+    cache = r['cache']
+    taxa = f"{cache['taxa_acerto']:.0%}" if cache['taxa_acerto'] is not None else "—"
+    print(f"  cache               {cache['acertos']} acertos / {cache['faltas']} faltas ({taxa})")
+    print(f"  chamadas remotas    {r['chamadas_remotas']} em {r['segundos_em_chamadas_remotas']:.2f} s")
+    print(f"  memória por sessão  {r['memoria_por_sessao_kb']:,.0f} KB")
+    for erro in r['erros'][:10]:
+        print(f"  ERRO {erro}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga das páginas com sessões simultâneas (AppTest + Supabase falso).")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 5, 10], help="níveis de concorrência a testar")
+    parser.add_argument("--paginas", nargs="+", default=list(ROTEIROS), choices=list(ROTEIROS))
+    parser.add_argument("--rodadas", type=int, default=2, help="repetições do roteiro de cada sessão após abrir a página")
+    parser.add_argument("--pausa-ms", type=float, default=0.0, help="pausa aleatória máxima entre interações (tempo de leitura)")
+    parser.add_argument("--escala", type=int, default=1_000, help="número aproximado de parcelas da base sintética")
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="latência fixa simulada por chamada ao Supabase")
+    parser.add_argument("--por-mil-linhas-ms", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="tempo máximo de um rerun (s)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", type=Path, help="grava os resultados em JSON")
+    parser.add_argument("--cache-sqlite", type=Path, help="usa o cache compartilhado (SQLite) neste arquivo")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(RAIZ))
+    os.chdir(RAIZ)
+    warnings.filterwarnings("ignore")
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+    instalar_backend(args.escala, args.semente, args.latencia_ms, args.por_mil_linhas_ms)
+    preparar_apptest_concorrente({**SEGREDOS, 'cache_sqlite': str(args.cache_sqlite)} if args.cache_sqlite else SEGREDOS)
+
+    # Aquecimento: uma sessão fora da medição, para não contar importações e a compilação dos scripts
+    executar_sessao(0, args.paginas, 0, 0, args.timeout, args.semente)
+
+    niveis = []
+    for n_sessoes in args.sessoes:
+        resultado = executar_nivel(n_sessoes, args.paginas, args.rodadas, args.pausa_ms, args.timeout, args.semente)
+        imprimir_nivel(resultado)
+        niveis.append(resultado)
+
+    if len(niveis) > 1 and niveis[0]['latencia']['n']:
+        base = niveis[0]['latencia']['p95_ms']
+        print("\n== resumo (p95 em relação ao primeiro nível)")
+        for r in niveis:
+            if r['latencia']['n']:
+                print(f"  {r['sessoes']:>4} sessões   p95 {r['latencia']['p95_ms']:>9.1f} ms   ({r['latencia']['p95_ms'] / base:.1f}x)")
+
+    if args.saida:
+        parametros = {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()}
+        args.saida.write_text(json.dumps({'parametros': parametros, 'niveis': niveis}, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"\nResultados gravados em {args.saida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# benchmarks/cenarios.py
+# Cenários cronometrados: consultas das páginas, geração de PDFs e agregações dos Relatórios.
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+
+import comissoes
+import consultas
+import duplicidades
+import exportacao
+import financeiro
+import pagamentos
+import recibos
+from utils import formatar_moeda
+
+CENARIOS = {}
+
+def cenario(nome: str, preparar=None):
+    """Registra um cenário. 'preparar(contexto)' roda fora da medição e devolve os argumentos da execução."""
+    def decorador(func):
+        CENARIOS[nome] = (preparar, func)
+        return func
+    return decorador
+
+class Contexto:
+    """Base sintética + cliente falso compartilhados pelos cenários de uma mesma escala."""
+    def __init__(self, base: dict, cliente):
+        self.base = base
+        self.cliente = cliente
+        self._memo = {}
+
+    def memo(self, chave, funcao):
+        if chave not in self._memo:
+            self._memo[chave] = funcao()
+        return self._memo[chave]
+
+    def ledger_normalizado(self):
+        def carregar():
+            df_receber, df_pagar = consultas.carregar_todos_dados_financeiros(self.cliente)
+            return financeiro.normalizar_ledger_receber(df_receber), financeiro.normalizar_ledger_pagar(df_pagar)
+        return self.memo('ledger', carregar)
+
+    def cliente_com_mais_parcelas(self) -> int:
+        def calcular():
+            contagem = pd.Series([p['cliente_id'] for p in self.base['parcelas']]).value_counts()
+            return int(contagem.index[0])
+        return self.memo('cliente_top', calcular)
+
+# --- Consultas das Páginas ---
+def _registrar_consulta(nome: str, *argumentos):
+    def preparar(ctx):
+        return [a(ctx) if callable(a) else a for a in argumentos]
+    cenario(f"consultas.{nome}", preparar)(lambda ctx, *args: getattr(consultas, nome)(ctx.cliente, *args))
+
+for _nome in [
+    'carregar_clientes_ativos', 'carregar_clientes_arquivados', 'carregar_clientes',
+    'carregar_fornecedores_ativos', 'carregar_fornecedores_arquivados',
+    'carregar_obras_ativas', 'carregar_obras', 'carregar_resumo_financeiro_obras',
+    'carregar_debitos', 'carregar_corretores_ativos', 'carregar_corretores_arquivados', 'carregar_comissoes',
+    'carregar_todos_dados_financeiros',
+]:
+    _registrar_consulta(_nome)
+_registrar_consulta('carregar_contratos', lambda ctx: ctx.base['contratos'][0]['cliente_id'])
+_registrar_consulta('carregar_parcelas', lambda ctx: ctx.base['debitos'][0]['id'])
+
+def _filtros_painel_contas(ctx):
+    return {'hoje': date.today().isoformat(), 'situacao': 'Em aberto'}
+
+_registrar_consulta('carregar_pagina_contas_a_pagar', _filtros_painel_contas, 0, 50)
+_registrar_consulta('carregar_valores_contas_a_pagar', _filtros_painel_contas)
+
+# --- PDFs ---
+def _parcela_paga(ctx):
+    parcela = next(p for p in ctx.base['parcelas'] if p['status'] == 'Pago')
+    return [pd.Series(parcela), "Cliente Benchmark", "Venda Apto 101"]
+
+@cenario("recibos.gerar_recibo_pdf", _parcela_paga)
+def _recibo_parcela(ctx, parcela, cliente_nome, debito_desc):
+    recibos.gerar_recibo_pdf(parcela, cliente_nome, debito_desc)
+
+def _comissao_paga(ctx):
+    comissao = next((c for c in ctx.base['comissoes'] if c['status'] == 'Paga'), None)
+    comissao = comissao or {**ctx.base['comissoes'][0], 'data_pagamento': '2024-01-01'}
+    return [pd.Series(comissao), "Corretor Benchmark"]
+
+@cenario("recibos.gerar_recibo_comissao_pdf", _comissao_paga)
+def _recibo_comissao(ctx, comissao, corretor_nome):
+    recibos.gerar_recibo_comissao_pdf(comissao, corretor_nome)
+
+def _extrato(ctx):
+    df_receber, _ = ctx.ledger_normalizado()
+    _, indice = financeiro.montar_indice_extratos(df_receber)
+    extrato = indice[ctx.cliente_com_mais_parcelas()]
+    df_display = pd.DataFrame({
+        'Vencimento': extrato['data_vencimento'].dt.strftime('%d/%m/%Y'),
+        'Descrição': extrato['descricao_debito'].fillna("Débito Geral"),
+        'Valor': extrato['valor'].apply(formatar_moeda),
+        'Status': extrato['status'],
+        'Data Pagamento': extrato['data_pagamento'].dt.strftime('%d/%m/%Y').fillna('---'),
+    })
+    totais = {'total_debitos': "R$ 1,00", 'total_pago': "R$ 1,00", 'saldo_devedor': "R$ 0,00"}
+    return [df_display, "Cliente Benchmark", totais]
+
+@cenario("recibos.gerar_extrato_cliente_pdf", _extrato)
+def _extrato_pdf(ctx, df_display, cliente_nome, totais):
+    recibos.gerar_extrato_cliente_pdf(df_display, cliente_nome, totais)
+
+def _comissoes_pagas(ctx):
+    pagas = pd.DataFrame([c for c in ctx.base['comissoes'] if c['status'] == 'Paga'][:200])
+    return [pagas.assign(corretores=[{'nome': "Corretor Benchmark"}] * len(pagas)), "Corretor Benchmark", date(2000, 1, 1), date.today()]
+
+@cenario("recibos.gerar_recibo_comissoes_consolidado_pdf", _comissoes_pagas)
+def _recibo_consolidado(ctx, df_pagas, corretor_nome, inicio, fim):
+    recibos.gerar_recibo_comissoes_consolidado_pdf(df_pagas, corretor_nome, inicio, fim)
+
+# --- Agregações dos Relatórios ---
+def _ledger_bruto(ctx):
+    return list(ctx.memo('ledger_bruto', lambda: consultas.carregar_todos_dados_financeiros(ctx.cliente)))
+
+@cenario("financeiro.normalizar_ledger", _ledger_bruto)
+def _normalizar(ctx, df_receber, df_pagar):
+    financeiro.normalizar_ledger_receber(df_receber)
+    financeiro.normalizar_ledger_pagar(df_pagar)
+
+@cenario("financeiro.projetar_fluxo_caixa_24m", lambda ctx: list(ctx.ledger_normalizado()))
+def _projecao(ctx, df_receber, df_pagar):
+    financeiro.projetar_fluxo_caixa(df_receber, df_pagar, meses=24, frequencia="D",
+                                    taxa_inadimplencia=financeiro.taxa_inadimplencia_historica(df_receber),
+                                    atraso_medio=10, atraso_desvio=15)
+
+@cenario("financeiro.aging", lambda ctx: [ctx.ledger_normalizado()[0]])
+def _aging(ctx, df_receber):
+    df_aging = financeiro.calcular_aging(df_receber)
+    financeiro.resumir_aging(df_aging, 'nome_cliente')
+    financeiro.resumir_aging(df_aging, 'nome_obra')
+
+@cenario("financeiro.montar_indice_extratos", lambda ctx: [ctx.ledger_normalizado()[0]])
+def _indice(ctx, df_receber):
+    financeiro.montar_indice_extratos(df_receber)
+
+@cenario("relatorios.painel_e_fluxo_realizado", _ledger_bruto)
+def _painel(ctx, df_receber, df_pagar):
+    """Mesmas contas do 'Painel de Controle' e do 'Fluxo de Caixa Realizado' da página de Relatórios."""
+    em_aberto = df_receber['status'].isin(['Pendente', 'Atrasado'])
+    pd.to_numeric(df_receber.loc[em_aberto, 'valor_parcela'], errors='coerce').sum()
+    pd.to_numeric(df_receber.loc[df_receber['status'] == 'Atrasado', 'valor_parcela'], errors='coerce').sum()
+    pd.to_numeric(df_pagar.loc[df_pagar['status'].isin(['Pendente', 'Atrasado']), 'valor'], errors='coerce').sum()
+    pagas = df_receber.dropna(subset=['data_pagamento']).assign(data=lambda d: pd.to_datetime(d['data_pagamento']))
+    pagas.groupby(pagas['data'].dt.to_period('M'))['valor_parcela'].sum()
+
+@cenario("financeiro.extrato_comissoes", lambda ctx: [pd.DataFrame(ctx.base['comissoes'])])
+def _extrato_comissoes(ctx, df_comissoes):
+    financeiro.extrato_comissoes(df_comissoes.assign(nome_corretor="Corretor Benchmark"), "M")
+
+# --- Fechamento de Comissões ---
+def _vendas_sem_comissao(ctx):
+    taxas = pd.DataFrame({'corretor_id': [None, 1], 'valor_minimo': [0.0, 300_000.0], 'percentual': [4.0, 6.0]})
+    # Todas as vendas com corretor, como num primeiro fechamento sobre a base inteira
+    vendas = pd.DataFrame([d for d in ctx.base['debitos'] if d.get('corretor_id')])
+    return [vendas.assign(clientes=[{'nome': "Cliente Benchmark"}] * len(vendas), corretores=None), taxas]
+
+@cenario("comissoes.calcular_fechamento", _vendas_sem_comissao)
+def _fechamento(ctx, df_vendas, df_taxas):
+    comissoes.calcular(df_vendas, df_taxas)
+
+# --- Exportação de Planilhas ---
+@cenario("exportacao.receber_em_aberto_csv")
+def _exportar_csv(ctx):
+    exportacao.exportar(ctx.cliente, "Contas a Receber em Aberto", "CSV")
+
+@cenario("exportacao.receber_em_aberto_xlsx")
+def _exportar_xlsx(ctx):
+    exportacao.exportar(ctx.cliente, "Contas a Receber em Aberto", "Excel (XLSX)")
+
+# --- Registro de Pagamento ---
+def _parcelas_em_aberto(ctx):
+    ids = iter([p['id'] for p in ctx.base['parcelas'] if p['status'] != 'Pago'])
+    comprovante = SimpleNamespace(name="comprovante.pdf", type="application/pdf", getvalue=lambda: b'%PDF' * 25_000)
+    return [ids, comprovante]
+
+@cenario("pagamentos.registrar_com_comprovante", _parcelas_em_aberto)
+def _registrar_pagamento(ctx, ids, comprovante):
+    """Baixa de uma parcela em aberto (outra a cada execução) com um comprovante de ~100 KB: upload e RPC juntos."""
+    pagamentos.registrar(ctx.cliente, 'parcelas', next(ids), date.today(), comprovante)
+
+# --- Duplicidades ---
+@cenario("duplicidades.varredura_clientes", lambda ctx: [ctx.base['clientes']])
+def _duplicidades(ctx, clientes):
+    duplicidades.IndiceDuplicidades(clientes, duplicidades.CAMPOS_CLIENTES).pares()
+
+# --- Inicialização das Páginas ---
+# Medidas num processo novo, como na primeira visita após o servidor subir: tempo de importação
+# dos módulos e da primeira execução de cada página (AppTest contra o Supabase falso).
+RAIZ = Path(__file__).resolve().parent.parent
+
+def _em_processo_novo(codigo: str, *argumentos) -> float:
+    saida = subprocess.run([sys.executable, "-W", "ignore", "-c", codigo, *map(str, argumentos)], cwd=RAIZ,
+                           capture_output=True, text=True, check=True).stdout
+    return float(saida.strip().splitlines()[-1])
+
+_IMPORTACAO = """
+import importlib, sys, time
+inicio = time.perf_counter()
+for modulo in sys.argv[1:]:
+    importlib.import_module(modulo)
+print((time.perf_counter() - inicio) * 1000)
+"""
+
+_PRIMEIRA_EXECUCAO = """
+import logging, sys, time
+logging.disable(logging.WARNING)
+from benchmarks import carga
+carga.instalar_backend(int(sys.argv[2]), 42, 0, 0)
+carga.preparar_apptest_concorrente(carga.SEGREDOS)
+at = carga.nova_sessao(sys.argv[1], 600)
+inicio = time.perf_counter()
+at.run()
+assert not at.exception, at.exception[0].message
+print((time.perf_counter() - inicio) * 1000)
+"""
+
+MODULOS_DAS_PAGINAS = ['streamlit', 'pandas', 'utils', 'consultas', 'financeiro', 'instrumentacao', 'recibos']
+
+cenario("importacao.recibos")(lambda ctx: _em_processo_novo(_IMPORTACAO, 'recibos'))
+cenario("importacao.modulos_das_paginas")(lambda ctx: _em_processo_novo(_IMPORTACAO, *MODULOS_DAS_PAGINAS))
+
+for _pagina in ['Página_Inicial.py', 'pages/Clientes.py', 'pages/Contas_a_Receber.py', 'pages/Corretores.py',
+                'pages/Relatorios_Financeiros.py']:
+    cenario(f"primeira_execucao.{Path(_pagina).stem}")(
+        lambda ctx, pagina=_pagina: _em_processo_novo(_PRIMEIRA_EXECUCAO, pagina, len(ctx.base['parcelas'])))
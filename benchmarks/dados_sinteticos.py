@@ -0,0 +1,144 @@
+# benchmarks/dados_sinteticos.py
+# Gerador determinístico (com semente) de uma base sintética com as tabelas do sistema.
+from datetime import date, timedelta
+
+import numpy as np
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+         "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sabrina", "Thiago", "Vanessa", "William"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Ferreira", "Almeida", "Ribeiro",
+              "Carvalho", "Gomes", "Martins", "Araújo", "Barbosa", "Rocha", "Dias", "Moreira", "Cardoso", "Teixeira"]
+SERVICOS = ["Concreto", "Elétrica", "Hidráulica", "Pintura", "Esquadrias", "Locação de Equipamentos", "Terraplenagem", "Acabamento"]
+STATUS_OBRA = ["Planejamento", "Em Andamento", "Pausada", "Finalizada"]
+FREQUENCIAS = ["Mensal", "Quinzenal", "Semanal"]
+PASSOS_DIAS = {"Mensal": 30, "Quinzenal": 15, "Semanal": 7}
+
+def proporcoes(escala: int) -> dict:
+    """Quantidade de linhas por tabela para uma escala (número aproximado de parcelas)."""
+    return {
+        'clientes': max(escala // 20, 10),
+        'obras': max(escala // 2000, 3),
+        'debitos': max(escala // 10, 5),
+        'fornecedores': max(escala // 200, 5),
+        'contas_a_pagar': max(escala // 2, 10),
+        'corretores': max(escala // 1000, 3),
+        'contratos': max(escala // 40, 5),
+    }
+
+def _nomes(rng, n: int) -> list:
+    primeiros = rng.choice(NOMES, n)
+    ultimos = rng.choice(SOBRENOMES, (n, 2))
+    return [f"{p} {a} {b}" for p, (a, b) in zip(primeiros, ultimos)]
+
+def _documentos(rng, n: int, digitos: int = 11) -> list:
+    numeros = rng.integers(0, 10, (n, digitos))
+    if digitos == 11:
+        return ["{}{}{}.{}{}{}.{}{}{}-{}{}".format(*linha) for linha in numeros]
+    return ["{}{}.{}{}{}.{}{}{}/{}{}{}{}-{}{}".format(*linha) for linha in numeros]
+
+def gerar_base(escala: int = 10_000, semente: int = 42, hoje: date = None) -> dict:
+    """
+    Gera {tabela: [linhas]} para clientes, obras, debitos, parcelas, fornecedores, contas_a_pagar,
+    corretores, comissoes e contratos. 'escala' é o número aproximado de parcelas.
+    """
+    rng = np.random.default_rng(semente)
+    hoje = hoje or date.today()
+    n = proporcoes(escala)
+    base = {}
+
+    base['clientes'] = [
+        {'id': i + 1, 'nome': nome, 'cpf_cnpj': doc, 'contato_telefone': f"(11) 9{rng.integers(1000, 9999)}-{rng.integers(1000, 9999)}",
+         'contato_email': f"cliente{i + 1}@exemplo.com", 'observacoes': "Cliente gerado para benchmark. " * 5,
+         'ativo': bool(ativo), 'criado_em': f"{hoje.isoformat()}T00:00:00+00:00"}
+        for i, (nome, doc, ativo) in enumerate(zip(_nomes(rng, n['clientes']), _documentos(rng, n['clientes']), rng.random(n['clientes']) > 0.05))
+    ]
+
+    inicios_obra = rng.integers(-900, 0, n['obras'])
+    base['obras'] = [
+        {'id': i + 1, 'nome_obra': f"Residencial {SOBRENOMES[i % len(SOBRENOMES)]} {i + 1}", 'endereco': f"Rua {i + 1}, Centro",
+         'data_inicio': (hoje + timedelta(days=int(d))).isoformat(), 'data_fim_prevista': (hoje + timedelta(days=int(d) + 720)).isoformat(),
+         'status': STATUS_OBRA[i % len(STATUS_OBRA)], 'valor_obra': float(rng.integers(500, 5000) * 1000),
+         'responsavel_obra': _nomes(rng, 1)[0], 'observacoes': "Obra gerada para benchmark.", 'ativo': True}
+        for i, d in enumerate(inicios_obra)
+    ]
+
+    base['fornecedores'] = [
+        {'id': i + 1, 'nome_razao_social': f"{nome} {SERVICOS[i % len(SERVICOS)]} Ltda", 'cpf_cnpj': doc,
+         'contato_principal': f"(11) 3{rng.integers(100, 999)}-{rng.integers(1000, 9999)}",
+         'tipo_servico': SERVICOS[i % len(SERVICOS)], 'ativo': bool(ativo)}
+        for i, (nome, doc, ativo) in enumerate(zip(_nomes(rng, n['fornecedores']), _documentos(rng, n['fornecedores'], 14), rng.random(n['fornecedores']) > 0.05))
+    ]
+
+    base['corretores'] = [
+        {'id': i + 1, 'nome': nome, 'cpf': doc, 'creci': f"{rng.integers(10000, 99999)}-F", 'telefone': f"(11) 9{rng.integers(1000, 9999)}-0000",
+         'email': f"corretor{i + 1}@exemplo.com", 'ativo': True}
+        for i, (nome, doc) in enumerate(zip(_nomes(rng, n['corretores']), _documentos(rng, n['corretores'])))
+    ]
+
+    # Débitos e suas parcelas: o número de parcelas por débito soma aproximadamente 'escala'
+    n_debitos = n['debitos']
+    parcelas_por_debito = np.maximum(rng.poisson(max(escala / n_debitos, 1), n_debitos), 1)
+    clientes_debito = rng.integers(1, n['clientes'] + 1, n_debitos)
+    obras_debito = np.where(rng.random(n_debitos) < 0.85, rng.integers(1, n['obras'] + 1, n_debitos), 0)
+    valores_debito = rng.integers(50, 800, n_debitos) * 1000.0
+    inicios_debito = rng.integers(-720, 60, n_debitos)
+    frequencias = rng.choice(FREQUENCIAS, n_debitos, p=[0.8, 0.1, 0.1])
+    corretores_debito = np.where(rng.random(n_debitos) < 0.5, rng.integers(1, n['corretores'] + 1, n_debitos), 0)
+    base['debitos'] = [
+        {'id': i + 1, 'cliente_id': int(c), 'obra_id': int(o) or None, 'corretor_id': int(k) or None,
+         'descricao': f"Venda Apto {100 + i % 900}, Bloco {'ABCD'[i % 4]}", 'valor_total': float(v), 'n_parcelas': int(p),
+         'data_inicio': (hoje + timedelta(days=int(d))).isoformat(), 'frequencia': str(f), 'forma_pagamento': "Boleto",
+         'observacoes': "Débito gerado para benchmark.", 'criado_em': f"{(hoje + timedelta(days=int(d))).isoformat()}T00:00:00+00:00"}
+        for i, (c, o, v, p, d, f, k) in enumerate(zip(clientes_debito, obras_debito, valores_debito, parcelas_por_debito, inicios_debito,
+                                                      frequencias, corretores_debito))
+    ]
+
+    debito_da_parcela = np.repeat(np.arange(n_debitos), parcelas_por_debito)
+    numero = np.concatenate([np.arange(1, p + 1) for p in parcelas_por_debito])
+    passos = np.array([PASSOS_DIAS[f] for f in frequencias])[debito_da_parcela]
+    vencimentos = inicios_debito[debito_da_parcela] + (numero - 1) * passos
+    valores = np.round(valores_debito[debito_da_parcela] / parcelas_por_debito[debito_da_parcela], 2)
+    pagas = (vencimentos < 0) & (rng.random(len(numero)) < 0.85)
+    atraso_pagamento = rng.integers(-5, 20, len(numero))
+    base['parcelas'] = [
+        {'id': i + 1, 'debito_id': int(d) + 1, 'cliente_id': int(clientes_debito[d]), 'numero_parcela': int(num),
+         'valor_parcela': float(v), 'data_vencimento': (hoje + timedelta(days=int(venc))).isoformat(),
+         'status': 'Pago' if pg else ('Atrasado' if venc < 0 else 'Pendente'),
+         'data_pagamento': (hoje + timedelta(days=int(min(venc + a, 0)))).isoformat() if pg else None,
+         'comprovante_url': f"http://supabase.local/storage/v1/object/public/comprovantes/comprovantes/{i + 1}_recibo.pdf" if pg else None}
+        for i, (d, num, v, venc, pg, a) in enumerate(zip(debito_da_parcela, numero, valores, vencimentos, pagas, atraso_pagamento))
+    ]
+
+    n_contas = n['contas_a_pagar']
+    vencimentos_conta = rng.integers(-720, 365, n_contas)
+    contas_pagas = (vencimentos_conta < 0) & (rng.random(n_contas) < 0.9)
+    base['contas_a_pagar'] = [
+        {'id': i + 1, 'fornecedor_id': int(f), 'obra_id': int(o), 'descricao': f"{SERVICOS[int(f) % len(SERVICOS)]} - medição {i + 1}",
+         'valor': float(v), 'data_vencimento': (hoje + timedelta(days=int(venc))).isoformat(),
+         'status': 'Pago' if pg else ('Atrasado' if venc < 0 else 'Pendente'),
+         'data_pagamento': (hoje + timedelta(days=int(venc))).isoformat() if pg else None, 'comprovante_url': None,
+         'observacoes': None}
+        for i, (f, o, v, venc, pg) in enumerate(zip(
+            rng.integers(1, n['fornecedores'] + 1, n_contas), rng.integers(1, n['obras'] + 1, n_contas),
+            np.round(rng.uniform(200, 50_000, n_contas), 2), vencimentos_conta, contas_pagas))
+    ]
+
+    # Vendas do mês corrente ficam sem comissão, à espera do fechamento do mês
+    inicio_mes = hoje.replace(day=1).isoformat()
+    com_corretor = [(d, int(k)) for d, k in zip(base['debitos'], corretores_debito) if k and d['criado_em'] < inicio_mes]
+    comissoes_pagas = rng.random(len(com_corretor)) < 0.6
+    base['comissoes'] = [
+        {'id': i + 1, 'corretor_id': k, 'debito_id': d['id'], 'descricao_venda': d['descricao'],
+         'valor_venda': d['valor_total'], 'percentual_comissao': 5.0, 'valor_comissao': round(d['valor_total'] * 0.05, 2),
+         'status': 'Paga' if pg else 'Pendente', 'data_pagamento': d['data_inicio'] if pg else None,
+         'comprovante_url': None, 'criado_em': d['criado_em']}
+        for i, ((d, k), pg) in enumerate(zip(com_corretor, comissoes_pagas))
+    ]
+
+    base['contratos'] = [
+        {'id': i + 1, 'cliente_id': int(c), 'descricao': f"Contrato de compra e venda {i + 1}",
+         'contrato_url': f"http://supabase.local/storage/v1/object/public/comprovantes/contratos_clientes/{int(c)}_contrato.pdf",
+         'data_upload': f"{hoje.isoformat()}T00:00:00"}
+        for i, c in enumerate(rng.integers(1, n['clientes'] + 1, n['contratos']))
+    ]
+    return base
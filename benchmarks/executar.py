@@ -0,0 +1,131 @@
+# benchmarks/executar.py
+# Executa os cenários sobre bases sintéticas e grava/compara os resultados por commit.
+#
+#   python -m benchmarks.executar --escalas 1000 100000 --repeticoes 5
+#   python -m benchmarks.executar --escalas 10000 --latencia-ms 40 --filtro consultas.
+#   python -m benchmarks.executar --comparar benchmarks/resultados/<anterior>.json
+import argparse
+import fnmatch
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+DIRETORIO_RESULTADOS = Path(__file__).parent / "resultados"
+LIMITE_REGRESSAO = 1.20
+
+def commit_atual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "desconhecido"
+
+def cronometrar(funcao, repeticoes: int) -> dict:
+    """
+    Uma execução de aquecimento e 'repeticoes' medidas; devolve estatísticas em milissegundos.
+    Cenários que rodam em outro processo devolvem o próprio tempo medido (float, em ms).
+    """
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        medido = funcao()
+        decorrido = (time.perf_counter() - inicio) * 1000
+        tempos.append(medido if isinstance(medido, float) else decorrido)
+    tempos.sort()
+    return {
+        'min_ms': round(tempos[0], 3),
+        'mediana_ms': round(statistics.median(tempos), 3),
+        'p95_ms': round(tempos[min(len(tempos) - 1, int(round(0.95 * (len(tempos) - 1))))], 3),
+        'max_ms': round(tempos[-1], 3),
+        'repeticoes': repeticoes,
+    }
+
+def executar(escalas, repeticoes: int, latencia_ms: float, por_mil_linhas_ms: float, filtro: str, semente: int) -> dict:
+    from benchmarks.cenarios import CENARIOS, Contexto
+    from benchmarks.dados_sinteticos import gerar_base
+    from benchmarks.supabase_falso import BancoFalso, ClienteSupabaseFalso, Latencia
+
+    resultados = {}
+    for escala in escalas:
+        inicio = time.perf_counter()
+        base = gerar_base(escala, semente)
+        print(f"\n== escala {escala:,} ({sum(len(v) for v in base.values()):,} linhas, gerada em {time.perf_counter() - inicio:.1f}s)")
+        cliente = ClienteSupabaseFalso(BancoFalso(base), Latencia(latencia_ms, por_mil_linhas_ms))
+        contexto = Contexto(base, cliente)
+        for nome, (preparar, funcao) in CENARIOS.items():
+            if filtro and not fnmatch.fnmatch(nome, filtro) and not nome.startswith(filtro):
+                continue
+            argumentos = preparar(contexto) if preparar else []
+            estatisticas = cronometrar(lambda: funcao(contexto, *argumentos), repeticoes)
+            resultados[f"{nome}@{escala}"] = estatisticas
+            print(f"  {nome:<50} mediana {estatisticas['mediana_ms']:>10.2f} ms   p95 {estatisticas['p95_ms']:>10.2f} ms")
+    return resultados
+
+def salvar(resultados: dict, parametros: dict) -> Path:
+    DIRETORIO_RESULTADOS.mkdir(exist_ok=True)
+    commit = commit_atual()
+    agora = datetime.now()
+    arquivo = DIRETORIO_RESULTADOS / f"{agora:%Y%m%d-%H%M%S}_{commit}.json"
+    import pandas as pd
+    arquivo.write_text(json.dumps({
+        'commit': commit, 'data': agora.isoformat(timespec='seconds'),
+        'python': platform.python_version(), 'pandas': pd.__version__, 'maquina': platform.platform(),
+        'parametros': parametros, 'resultados': resultados,
+    }, indent=2, ensure_ascii=False), encoding='utf-8')
+    return arquivo
+
+def ultimo_resultado(exceto: Path = None) -> Path:
+    arquivos = sorted(p for p in DIRETORIO_RESULTADOS.glob("*.json") if p != exceto) if DIRETORIO_RESULTADOS.exists() else []
+    return arquivos[-1] if arquivos else None
+
+def comparar(atual: dict, anterior: dict, limite: float = LIMITE_REGRESSAO) -> list:
+    """Imprime a razão atual/anterior das medianas e devolve os cenários que pioraram além do limite."""
+    regressoes = []
+    print(f"\n== comparação com {anterior.get('commit')} ({anterior.get('data')})")
+    for chave, estatisticas in atual['resultados'].items():
+        base = anterior['resultados'].get(chave)
+        if not base or not base['mediana_ms']:
+            continue
+        razao = estatisticas['mediana_ms'] / base['mediana_ms']
+        marca = "  << REGRESSÃO" if razao > limite else ""
+        print(f"  {chave:<60} {base['mediana_ms']:>10.2f} -> {estatisticas['mediana_ms']:>10.2f} ms  ({razao:.2f}x){marca}")
+        if razao > limite:
+            regressoes.append(chave)
+    return regressoes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do sistema de gestão sobre dados sintéticos.")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1_000, 10_000], help="número aproximado de parcelas (1k a 1M)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="latência fixa simulada por chamada")
+    parser.add_argument("--por-mil-linhas-ms", type=float, default=0.0, help="latência simulada a cada mil linhas transferidas")
+    parser.add_argument("--filtro", default="", help="prefixo ou padrão (fnmatch) dos cenários")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--comparar", type=Path, help="arquivo de resultado anterior (padrão: o mais recente)")
+    parser.add_argument("--nao-salvar", action="store_true")
+    parser.add_argument("--falhar-em-regressao", action="store_true", help="sai com código 1 se algum cenário piorar mais que 20%%")
+    args = parser.parse_args(argv)
+
+    parametros = {k: v for k, v in vars(args).items() if k not in ('comparar', 'nao_salvar', 'falhar_em_regressao')}
+    resultados = executar(args.escalas, args.repeticoes, args.latencia_ms, args.por_mil_linhas_ms, args.filtro, args.semente)
+
+    arquivo = None
+    if not args.nao_salvar:
+        arquivo = salvar(resultados, parametros)
+        print(f"\nResultados gravados em {arquivo}")
+
+    referencia = args.comparar or ultimo_resultado(exceto=arquivo)
+    regressoes = []
+    if referencia:
+        anterior = json.loads(Path(referencia).read_text(encoding='utf-8'))
+        regressoes = comparar({'resultados': resultados}, anterior)
+    if regressoes and args.falhar_em_regressao:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+# benchmarks/supabase_falso.py
+# Substituto local (em memória) das APIs de tabela, RPC, Storage e Auth do Supabase,
+# com latência configurável. Implementa apenas o subconjunto do PostgREST usado pelo sistema.
+import itertools
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+# Nome da coluna de chave estrangeira de cada tabela (ex.: parcelas.cliente_id -> clientes)
+SINGULAR = {
+    'clientes': 'cliente', 'obras': 'obra', 'debitos': 'debito', 'parcelas': 'parcela',
+    'fornecedores': 'fornecedor', 'contas_a_pagar': 'conta', 'corretores': 'corretor',
+    'comissoes': 'comissao', 'contratos': 'contrato',
+}
+PADROES_INSERCAO = {
+    'clientes': {'ativo': True}, 'fornecedores': {'ativo': True}, 'corretores': {'ativo': True},
+    'obras': {'ativo': True}, 'parcelas': {'status': 'Pendente'}, 'contas_a_pagar': {'status': 'Pendente'},
+    'contas_recorrentes': {'ativo': True},
+}
+COLUNAS_DATA_CRIACAO = {'clientes': 'criado_em', 'comissoes': 'criado_em', 'debitos': 'criado_em', 'contratos': 'data_upload'}
+
+class ErroSupabaseFalso(Exception):
+    """Erro equivalente a uma resposta de erro da API."""
+
+class Latencia:
+    """Modelo simples de latência: custo fixo por chamada + custo por linha transferida."""
+    def __init__(self, fixa_ms: float = 0.0, por_mil_linhas_ms: float = 0.0):
+        self.fixa_ms = fixa_ms
+        self.por_mil_linhas_ms = por_mil_linhas_ms
+
+    def aguardar(self, linhas: int = 0):
+        atraso = self.fixa_ms + self.por_mil_linhas_ms * linhas / 1000
+        if atraso > 0:
+            time.sleep(atraso / 1000)
+
+class RespostaFalsa:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+# --- Banco em Memória ---
+class BancoFalso:
+    """Tabelas em memória (listas de dicts), RPCs registráveis e buckets do Storage."""
+    def __init__(self, tabelas: dict = None):
+        self.trava = threading.RLock()
+        self.tabelas = {nome: list(linhas) for nome, linhas in (tabelas or {}).items()}
+        self.versoes = {nome: 0 for nome in self.tabelas}
+        self.buckets = {}
+        self.rpcs = dict(RPCS_PADRAO)
+        self._proximo_id = {nome: max((l.get('id') or 0 for l in linhas), default=0) + 1 for nome, linhas in self.tabelas.items()}
+        self._indices = {}
+        self.ouvintes = []
+
+    def tabela(self, nome: str) -> list:
+        return self.tabelas.setdefault(nome, [])
+
+    def novo_id(self, tabela: str) -> int:
+        proximo = self._proximo_id.get(tabela, 1)
+        self._proximo_id[tabela] = proximo + 1
+        return proximo
+
+    def alterada(self, tabela: str, evento: str, linhas: list):
+        """Incrementa a versão da tabela e avisa os ouvintes (usado como feed de alterações local)."""
+        self.versoes[tabela] = self.versoes.get(tabela, 0) + 1
+        for ouvinte in list(self.ouvintes):
+            ouvinte(tabela, evento, linhas)
+
+    def indice(self, tabela: str, coluna: str) -> dict:
+        """Índice coluna -> linhas, reconstruído apenas quando a tabela muda."""
+        chave = (tabela, coluna)
+        versao = self.versoes.get(tabela, 0)
+        em_cache = self._indices.get(chave)
+        if em_cache and em_cache[0] == versao:
+            return em_cache[1]
+        indice = {}
+        for linha in self.tabela(tabela):
+            indice.setdefault(linha.get(coluna), []).append(linha)
+        self._indices[chave] = (versao, indice)
+        return indice
+
+    def registrar_rpc(self, nome: str, funcao):
+        """funcao(banco, params) -> dados"""
+        self.rpcs[nome] = funcao
+
+# --- Seleção com Recursos Embutidos ---
+def _dividir_no_nivel_zero(texto: str) -> list:
+    partes, nivel, atual = [], 0, ''
+    for caractere in texto:
+        if caractere == ',' and nivel == 0:
+            partes.append(atual.strip()); atual = ''
+            continue
+        nivel += caractere == '('
+        nivel -= caractere == ')'
+        atual += caractere
+    if atual.strip():
+        partes.append(atual.strip())
+    return partes
+
+def analisar_selecao(texto: str) -> list:
+    """'*, clientes(id, nome)' -> ['*', ('clientes', 'clientes', False, [...])] (alias, tabela, inner, subseleção)."""
+    itens = []
+    for parte in _dividir_no_nivel_zero(texto or '*'):
+        m = re.match(r'^(?:(\w+):)?(\w+)(?:!(\w+))?\((.*)\)$', parte, re.S)
+        if m:
+            alias, tabela, dica, interno = m.groups()
+            itens.append((alias or tabela, tabela, dica == 'inner', analisar_selecao(interno)))
+        else:
+            itens.append(parte)
+    return itens
+
+def _projetar(banco: BancoFalso, tabela: str, linha: dict, selecao: list):
+    resultado = {}
+    for item in selecao:
+        if isinstance(item, str):
+            if item == '*':
+                resultado.update(linha)
+            else:
+                resultado[item] = linha.get(item)
+            continue
+        alias, tabela_embutida, inner, subselecao = item
+        fk = f"{SINGULAR.get(tabela_embutida, tabela_embutida)}_id"
+        if fk in linha:
+            relacionada = banco.indice(tabela_embutida, 'id').get(linha[fk], [None])[0]
+            valor = _projetar(banco, tabela_embutida, relacionada, subselecao) if relacionada else None
+        else:
+            fk_reversa = f"{SINGULAR.get(tabela, tabela)}_id"
+            filhas = banco.indice(tabela_embutida, fk_reversa).get(linha.get('id'), [])
+            valor = [_projetar(banco, tabela_embutida, filha, subselecao) for filha in filhas]
+        if inner and not valor:
+            return None
+        resultado[alias] = valor
+    return resultado
+
+# --- Construtor de Consultas ---
+def _comparavel(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+class ConsultaFalsa:
+    """Imita o request builder do postgrest-py: filtros encadeáveis e 'execute()' no final."""
+    def __init__(self, cliente, tabela: str):
+        self._cliente = cliente
+        self._banco = cliente.banco
+        self._tabela = tabela
+        self._operacao = 'select'
+        self._selecao = '*'
+        self._filtros = []
+        self._ordem = []
+        self._intervalo = None
+        self._limite = None
+        self._dados = None
+        self._contar = None
+        self._conflito = None
+        self._ignorar_duplicados = False
+        self._unico = False
+
+    # Operações
+    def select(self, *colunas, count=None, head=None):
+        self._selecao = ','.join(colunas) or '*'
+        self._contar = count
+        return self
+
+    def insert(self, dados, count=None, returning=None, upsert=False, default_to_null=True):
+        self._operacao, self._dados, self._contar = 'insert', dados, count
+        return self
+
+    def upsert(self, dados, count=None, returning=None, ignore_duplicates=False, on_conflict='', default_to_null=True):
+        self._operacao, self._dados, self._contar = 'upsert', dados, count
+        self._conflito = [c.strip() for c in (on_conflict or 'id').split(',')]
+        self._ignorar_duplicados = ignore_duplicates
+        return self
+
+    def update(self, dados, count=None, returning=None):
+        self._operacao, self._dados, self._contar = 'update', dados, count
+        return self
+
+    def delete(self, count=None, returning=None):
+        self._operacao, self._contar = 'delete', count
+        return self
+
+    # Filtros
+    def _filtro(self, coluna, teste):
+        self._filtros.append((coluna, teste))
+        return self
+
+    def eq(self, coluna, valor): return self._filtro(coluna, lambda v: v == valor)
+    def neq(self, coluna, valor): return self._filtro(coluna, lambda v: v != valor)
+    def gt(self, coluna, valor): return self._filtro(coluna, lambda v: v is not None and _comparavel(v) > _comparavel(valor))
+    def gte(self, coluna, valor): return self._filtro(coluna, lambda v: v is not None and _comparavel(v) >= _comparavel(valor))
+    def lt(self, coluna, valor): return self._filtro(coluna, lambda v: v is not None and _comparavel(v) < _comparavel(valor))
+    def lte(self, coluna, valor): return self._filtro(coluna, lambda v: v is not None and _comparavel(v) <= _comparavel(valor))
+    def in_(self, coluna, valores):
+        conjunto = set(valores)
+        return self._filtro(coluna, lambda v: v in conjunto)
+    def is_(self, coluna, valor):
+        esperado = None if valor in (None, 'null') else valor
+        return self._filtro(coluna, lambda v: v is esperado if esperado is None else v == esperado)
+    def ilike(self, coluna, padrao):
+        regex = re.compile('^' + re.escape(padrao).replace('%', '.*').replace('_', '.') + '$', re.I)
+        return self._filtro(coluna, lambda v: v is not None and bool(regex.match(str(v))))
+    def not_(self):
+        return self
+
+    # Modificadores
+    def order(self, coluna, desc=False, nullsfirst=False, foreign_table=None):
+        self._ordem.append((coluna, desc))
+        return self
+
+    def range(self, inicio, fim, foreign_table=None):
+        self._intervalo = (inicio, fim)
+        return self
+
+    def limit(self, tamanho, foreign_table=None):
+        self._limite = tamanho
+        return self
+
+    def single(self):
+        self._unico = True
+        return self
+
+    maybe_single = single
+
+    # Execução
+    def _selecionadas(self, linhas):
+        return [l for l in linhas if all(teste(l.get(coluna)) for coluna, teste in self._filtros)]
+
+    def execute(self):
+        with self._banco.trava:
+            dados, contagem = getattr(self, f"_executar_{self._operacao}")()
+        self._cliente.latencia.aguardar(len(dados) if isinstance(dados, list) else 1)
+        if self._unico:
+            dados = dados[0] if dados else None
+        return RespostaFalsa(dados, contagem)
+
+    def _recortar(self, linhas):
+        """Filtros, ordem, contagem, intervalo e limite sobre as linhas (da tabela ou devolvidas por uma RPC)."""
+        linhas = self._selecionadas(linhas)
+        for coluna, desc in reversed(self._ordem):
+            linhas = sorted(linhas, key=lambda l: (l.get(coluna) is None, _comparavel(l.get(coluna))), reverse=desc)
+        contagem = len(linhas) if self._contar else None
+        if self._intervalo:
+            linhas = linhas[self._intervalo[0]:self._intervalo[1] + 1]
+        if self._limite is not None:
+            linhas = linhas[:self._limite]
+        return linhas, contagem
+
+    def _executar_select(self):
+        linhas, contagem = self._recortar(self._banco.tabela(self._tabela))
+        selecao = analisar_selecao(self._selecao)
+        projetadas = (_projetar(self._banco, self._tabela, l, selecao) for l in linhas)
+        return [p for p in projetadas if p is not None], contagem
+
+    def _preparar(self, dados):
+        linha = dict(PADROES_INSERCAO.get(self._tabela, {}))
+        coluna_criacao = COLUNAS_DATA_CRIACAO.get(self._tabela)
+        if coluna_criacao:
+            linha[coluna_criacao] = datetime.now(timezone.utc).isoformat()
+        linha.update(dados)
+        linha.setdefault('id', self._banco.novo_id(self._tabela))
+        return linha
+
+    def _executar_insert(self):
+        novas = [self._preparar(d) for d in (self._dados if isinstance(self._dados, list) else [self._dados])]
+        self._banco.tabela(self._tabela).extend(novas)
+        self._banco.alterada(self._tabela, 'INSERT', novas)
+        return [dict(l) for l in novas], len(novas) if self._contar else None
+
+    def _executar_upsert(self):
+        tabela = self._banco.tabela(self._tabela)
+        existentes = {tuple(l.get(c) for c in self._conflito): l for l in tabela}
+        afetadas = []
+        for dados in (self._dados if isinstance(self._dados, list) else [self._dados]):
+            chave = tuple(dados.get(c) for c in self._conflito)
+            atual = existentes.get(chave) if None not in chave else None
+            if atual is not None:
+                if not self._ignorar_duplicados:
+                    atual.update(dados); afetadas.append(atual)
+                continue
+            nova = self._preparar(dados)
+            tabela.append(nova); existentes[chave] = nova; afetadas.append(nova)
+        if afetadas:
+            self._banco.alterada(self._tabela, 'UPSERT', afetadas)
+        return [dict(l) for l in afetadas], len(afetadas) if self._contar else None
+
+    def _executar_update(self):
+        alvo = self._selecionadas(self._banco.tabela(self._tabela))
+        for linha in alvo:
+            linha.update(self._dados)
+        if alvo:
+            self._banco.alterada(self._tabela, 'UPDATE', alvo)
+        return [dict(l) for l in alvo], len(alvo) if self._contar else None
+
+    def _executar_delete(self):
+        alvo = self._selecionadas(self._banco.tabela(self._tabela))
+        ids = {id(l) for l in alvo}
+        self._banco.tabelas[self._tabela] = [l for l in self._banco.tabela(self._tabela) if id(l) not in ids]
+        if alvo:
+            self._banco.alterada(self._tabela, 'DELETE', alvo)
+        return [dict(l) for l in alvo], len(alvo) if self._contar else None
+
+class ChamadaRpcFalsa(ConsultaFalsa):
+    """RPC; funções que devolvem linhas aceitam seleção de colunas, filtros, ordem, intervalo e limite, como no PostgREST."""
+    def __init__(self, cliente, nome: str, params: dict):
+        super().__init__(cliente, nome)
+        self._nome = nome
+        self._params = params or {}
+
+    def execute(self):
+        funcao = self._cliente.banco.rpcs.get(self._nome)
+        if funcao is None:
+            raise ErroSupabaseFalso(f"Função {self._nome} não encontrada")
+        contagem = None
+        with self._cliente.banco.trava:
+            dados = funcao(self._cliente.banco, self._params)
+            if isinstance(dados, list):
+                dados, contagem = self._recortar(dados)
+                if self._selecao != '*':
+                    colunas = [c.strip() for c in self._selecao.split(',')]
+                    dados = [{c: l.get(c) for c in colunas} for l in dados]
+        self._cliente.latencia.aguardar(len(dados) if isinstance(dados, list) else 1)
+        return RespostaFalsa(dados, contagem)
+
+# --- RPCs do Sistema ---
+def _alternar_ativo(tabela, parametro, ativo):
+    def rpc(banco, params):
+        for linha in banco.indice(tabela, 'id').get(params[parametro], []):
+            linha['ativo'] = ativo
+        banco.alterada(tabela, 'UPDATE', [])
+        return None
+    return rpc
+
+def _rpc_gerar_parcelas(banco, params):
+    debito = banco.indice('debitos', 'id')[params['debito_id_param']][0]
+    passos = {'Mensal': None, 'Quinzenal': 15, 'Semanal': 7}
+    inicio = date.fromisoformat(debito['data_inicio'])
+    n = int(debito['n_parcelas'])
+    valor = round(float(debito['valor_total']) / n, 2)
+    novas = []
+    for i in range(n):
+        passo = passos.get(debito.get('frequencia'))
+        if passo is None:
+            mes = inicio.month - 1 + i
+            vencimento = inicio.replace(year=inicio.year + mes // 12, month=mes % 12 + 1, day=min(inicio.day, 28))
+        else:
+            vencimento = inicio + timedelta(days=passo * i)
+        novas.append({
+            'id': banco.novo_id('parcelas'), 'debito_id': debito['id'], 'cliente_id': debito['cliente_id'],
+            'numero_parcela': i + 1, 'valor_parcela': valor, 'data_vencimento': vencimento.isoformat(),
+            'status': 'Pendente', 'data_pagamento': None, 'comprovante_url': None,
+        })
+    banco.tabela('parcelas').extend(novas)
+    banco.alterada('parcelas', 'INSERT', novas)
+    return None
+
+def _rpc_atualizar_status_parcelas(banco, params):
+    hoje = date.today().isoformat()
+    for tabela in ('parcelas', 'contas_a_pagar'):
+        atrasadas = [l for l in banco.tabela(tabela) if l.get('status') == 'Pendente' and (l.get('data_vencimento') or hoje) < hoje]
+        for linha in atrasadas:
+            linha['status'] = 'Atrasado'
+        if atrasadas:
+            banco.alterada(tabela, 'UPDATE', atrasadas)
+    return None
+
+def _registrar_pagamento(tabela, status):
+    # Mesma regra das funções SQL: só linhas ainda não pagas; devolve a URL do comprovante anterior
+    def rpc(banco, params):
+        linha = next((l for l in banco.indice(tabela, 'id').get(params['p_id'], []) if l.get('status') != status), None)
+        if linha is None:
+            raise ErroSupabaseFalso(f"{tabela} {params['p_id']} não encontrada ou já paga")
+        anterior = linha.get('comprovante_url')
+        linha.update(status=status, data_pagamento=params['p_data_pagamento'], comprovante_url=params.get('p_comprovante_url'))
+        banco.alterada(tabela, 'UPDATE', [dict(linha)])
+        return anterior
+    return rpc
+
+def _rpc_resumo_financeiro_obras(banco, params):
+    # Mesmas somas da função SQL: uma linha por obra ativa, com os gastos pagos por mês
+    resumo = {o['id']: {'id': o['id'], 'nome_obra': o.get('nome_obra'), 'status': o.get('status'), 'valor_obra': o.get('valor_obra'),
+                        'data_inicio': o.get('data_inicio'), 'a_receber': 0.0, 'recebido': 0.0, 'comprometido': 0.0, 'gasto': 0.0,
+                        'gastos_mensais': {}}
+              for o in banco.tabela('obras') if o.get('ativo', True)}
+    obra_do_debito = {d['id']: d.get('obra_id') for d in banco.tabela('debitos')}
+    for p in banco.tabela('parcelas'):
+        obra = resumo.get(obra_do_debito.get(p.get('debito_id')))
+        if obra:
+            obra['a_receber'] += float(p.get('valor_parcela') or 0)
+            obra['recebido'] += float(p.get('valor_parcela') or 0) if p.get('status') == 'Pago' else 0.0
+    for c in banco.tabela('contas_a_pagar'):
+        obra = resumo.get(c.get('obra_id'))
+        if obra:
+            obra['comprometido'] += float(c.get('valor') or 0)
+            if c.get('status') == 'Pago':
+                obra['gasto'] += float(c.get('valor') or 0)
+                if c.get('data_pagamento'):
+                    mes = f"{str(c['data_pagamento'])[:7]}-01"
+                    obra['gastos_mensais'][mes] = obra['gastos_mensais'].get(mes, 0.0) + float(c.get('valor') or 0)
+    for obra in resumo.values():
+        obra['gastos_mensais'] = [{'mes': mes, 'valor': valor} for mes, valor in sorted(obra['gastos_mensais'].items())]
+    return sorted(resumo.values(), key=lambda o: o['nome_obra'] or '')
+
+RPCS_PADRAO = {
+    'get_clientes_arquivados': lambda banco, params: [dict(l) for l in banco.tabela('clientes') if not l.get('ativo')],
+    'arquivar_cliente': _alternar_ativo('clientes', 'p_cliente_id', False),
+    'reativar_cliente': _alternar_ativo('clientes', 'p_cliente_id', True),
+    'arquivar_fornecedor': _alternar_ativo('fornecedores', 'p_fornecedor_id', False),
+    'reativar_fornecedor': _alternar_ativo('fornecedores', 'p_fornecedor_id', True),
+    'arquivar_corretor': _alternar_ativo('corretores', 'p_corretor_id', False),
+    'reativar_corretor': _alternar_ativo('corretores', 'p_corretor_id', True),
+    'gerar_parcelas': _rpc_gerar_parcelas,
+    'atualizar_status_parcelas': _rpc_atualizar_status_parcelas,
+    'resumo_financeiro_obras': _rpc_resumo_financeiro_obras,
+    'registrar_pagamento_parcela': _registrar_pagamento('parcelas', 'Pago'),
+    'registrar_pagamento_conta': _registrar_pagamento('contas_a_pagar', 'Pago'),
+    'registrar_pagamento_comissao': _registrar_pagamento('comissoes', 'Paga'),
+}
+
+# --- Storage e Auth ---
+class BucketFalso:
+    def __init__(self, cliente, nome: str):
+        self._cliente = cliente
+        self._arquivos = cliente.banco.buckets.setdefault(nome, {})
+        self._nome = nome
+
+    def upload(self, path, file, file_options=None):
+        with self._cliente.banco.trava:
+            if path in self._arquivos and str((file_options or {}).get('upsert', 'false')).lower() != 'true':
+                raise ErroSupabaseFalso(f"O arquivo {path} já existe")
+            self._arquivos[path] = bytes(file)
+        self._cliente.latencia.aguardar(len(file) // 1024)
+        return {'path': path}
+
+    def list(self, path=None, options=None):
+        prefixo = f"{path.rstrip('/')}/" if path else ''
+        busca = (options or {}).get('search', '')
+        self._cliente.latencia.aguardar()
+        return [{'name': caminho[len(prefixo):]} for caminho in list(self._arquivos)
+                if caminho.startswith(prefixo) and busca in caminho[len(prefixo):]]
+
+    def remove(self, paths):
+        with self._cliente.banco.trava:
+            removidos = [{'name': p} for p in paths if self._arquivos.pop(p, None) is not None]
+        self._cliente.latencia.aguardar()
+        return removidos
+
+    def download(self, path):
+        self._cliente.latencia.aguardar()
+        return self._arquivos[path]
+
+    def get_public_url(self, path, options=None):
+        return f"{self._cliente.url}/storage/v1/object/public/{self._nome}/{path}"
+
+class StorageFalso:
+    def __init__(self, cliente):
+        self._cliente = cliente
+
+    def from_(self, nome: str):
+        return BucketFalso(self._cliente, nome)
+
+class _Objeto:
+    def __init__(self, **atributos):
+        self.__dict__.update(atributos)
+
+class AuthFalso:
+    def __init__(self):
+        self._tokens = itertools.count(1)
+
+    def sign_in_with_password(self, credenciais):
+        token = next(self._tokens)
+        return _Objeto(
+            user=_Objeto(email=credenciais['email']),
+            session=_Objeto(access_token=f"acesso-{token}", refresh_token=f"renovacao-{token}"),
+        )
+
+    def set_session(self, access_token, refresh_token):
+        return None
+
+    def sign_out(self):
+        return None
+
+# --- Cliente ---
+class ClienteSupabaseFalso:
+    """Mesma interface usada pelo sistema do cliente retornado por supabase.create_client."""
+    def __init__(self, banco: BancoFalso, latencia: Latencia = None, url: str = "http://supabase.local"):
+        self.banco = banco
+        self.latencia = latencia or Latencia()
+        self.url = url
+        self.storage = StorageFalso(self)
+        self.auth = AuthFalso()
+
+    def table(self, tabela: str):
+        return ConsultaFalsa(self, tabela)
+
+    from_ = table
+
+    def rpc(self, nome: str, params: dict = None, *args, **kwargs):
+        return ChamadaRpcFalsa(self, nome, params)
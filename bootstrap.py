@@ -0,0 +1,45 @@
+# bootstrap.py
+# Início comum a todas as páginas: configuração, medição, login, cliente Supabase e barra lateral.
+import streamlit as st
+from utils import check_auth, get_supabase_client
+from instrumentacao import iniciar_execucao, finalizar_execucao
+from busca import caixa_de_busca
+
+def barra_lateral(supabase):
+    """Usuário logado, busca global, botão de Logout e rodapé."""
+    with st.sidebar:
+        st.header("Modo de Acesso")
+        if st.session_state.get('logged_in'):
+            st.success(f"Logado como: {st.session_state.user_email}")
+            if st.button("Logout", use_container_width=True):
+                supabase.auth.sign_out()
+                for key in st.session_state.keys():
+                    del st.session_state[key]
+                st.rerun()
+            caixa_de_busca(supabase)
+        else:
+            st.info("Por favor, faça o login para acessar o sistema.")
+        st.markdown("---")
+        st.info("Desenvolvido por @Rogerio Souza")
+
+def iniciar_pagina(titulo: str, icone: str, area: str = None, pagina: str = None):
+    """
+    Configura a página e devolve o cliente Supabase. Com 'area', exige login
+    (ex.: area="a área de Clientes"); 'pagina' é o nome usado na medição (padrão: o título).
+    """
+    st.set_page_config(page_title=titulo, page_icon=icone, layout="wide")
+    iniciar_execucao(pagina or titulo)
+    if area:
+        try:
+            check_auth(area)
+        except BaseException:
+            # Sem login a execução para aqui (st.stop), antes do try/finally da página
+            finalizar_execucao()
+            raise
+    supabase = get_supabase_client()
+    # A sessão salva já foi restaurada no cliente (ou descartada, se expirou) por get_supabase_client
+    if 'user_session' in st.session_state:
+        st.session_state.logged_in = True
+    st.session_state.setdefault('logged_in', False)
+    barra_lateral(supabase)
+    return supabase
@@ -0,0 +1,230 @@
+# busca.py
+# Busca global: índice invertido em memória sobre clientes, obras, fornecedores, corretores e débitos,
+# montado a partir dos dados em cache e mantido em dia pelas notificações de alteracoes.py.
+import bisect
+import math
+import re
+import threading
+import time
+import unicodedata
+
+import streamlit as st
+
+import alteracoes
+import consultas
+from alteracoes import cache_por_tabelas
+from instrumentacao import registrar_evento
+
+MAX_RESULTADOS = 8
+MAX_EXPANSOES_PREFIXO = 50
+PESO_PREFIXO = 0.6
+
+# Tabela -> (rótulo, página do link profundo, parâmetro da URL)
+TIPOS = {
+    'clientes': ("👥 Cliente", "pages/Clientes.py", 'cliente'),
+    'obras': ("🏗️ Obra", "pages/Gestao_de_obras.py", 'obra'),
+    'fornecedores': ("🧾 Fornecedor", "pages/Contas_a_Pagar.py", 'fornecedor'),
+    'corretores': ("🤝 Corretor", "pages/Corretores.py", 'corretor'),
+    'debitos': ("💸 Débito", "pages/Contas_a_Receber.py", 'debito'),
+}
+# Alterações nestas tabelas mudam o texto indexado dos débitos (nome do cliente ou da obra)
+REFERENCIADAS_POR_DEBITOS = ('clientes', 'obras')
+
+# --- Normalização ---
+def normalizar(texto) -> list:
+    """Termos em minúsculas e sem acentos; documentos (CPF, CNPJ, CRECI) também geram um termo só com os dígitos."""
+    if texto is None or (isinstance(texto, float) and math.isnan(texto)):
+        return []
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode().lower()
+    termos = re.findall(r'\w+', texto)
+    digitos = re.sub(r'\D', '', texto)
+    if len(digitos) >= 5 and digitos not in termos:
+        termos.append(digitos)
+    return termos
+
+# --- Documentos ---
+def _documento(tabela: str, linha: dict, nomes: dict):
+    """(título, detalhe, [(texto, peso)]) de uma linha; None se ela não deve aparecer na busca."""
+    if linha.get('ativo') is False:
+        return None
+    if tabela == 'clientes':
+        return linha.get('nome'), linha.get('cpf_cnpj') or "", [
+            (linha.get('nome'), 3), (linha.get('cpf_cnpj'), 3), (linha.get('contato_email'), 1)]
+    if tabela == 'obras':
+        return linha.get('nome_obra'), linha.get('status') or "", [
+            (linha.get('nome_obra'), 3), (linha.get('endereco'), 1), (linha.get('responsavel_obra'), 1)]
+    if tabela == 'fornecedores':
+        return linha.get('nome_razao_social'), linha.get('tipo_servico') or "", [
+            (linha.get('nome_razao_social'), 3), (linha.get('cpf_cnpj'), 3), (linha.get('tipo_servico'), 1)]
+    if tabela == 'corretores':
+        return linha.get('nome'), f"CRECI {linha.get('creci') or '—'}", [
+            (linha.get('nome'), 3), (linha.get('cpf'), 3), (linha.get('creci'), 3)]
+    cliente = (linha.get('clientes') or {}).get('nome') or nomes.get(('clientes', linha.get('cliente_id')))
+    obra = (linha.get('obras') or {}).get('nome_obra') or nomes.get(('obras', linha.get('obra_id')))
+    return linha.get('descricao'), " · ".join(n for n in (cliente, obra) if n), [
+        (linha.get('descricao'), 3), (cliente, 2), (obra, 1)]
+
+class IndiceBusca:
+    """Índice invertido termo -> {documento: peso}; documentos são (tabela, id)."""
+    def __init__(self):
+        self.trava = threading.RLock()
+        self.postagens = {}
+        self.documentos = {}
+        self.nomes = {}
+        self.sujas = set(TIPOS)
+        self._vocabulario = None
+
+    def remover(self, tabela: str, id_):
+        chave = (tabela, id_)
+        documento = self.documentos.pop(chave, None)
+        if documento is None:
+            return
+        for termo in documento['termos']:
+            postagem = self.postagens.get(termo)
+            if postagem is not None:
+                postagem.pop(chave, None)
+                if not postagem:
+                    del self.postagens[termo]
+                    self._vocabulario = None
+
+    def adicionar(self, tabela: str, linha: dict):
+        id_ = linha.get('id')
+        self.remover(tabela, id_)
+        if tabela in REFERENCIADAS_POR_DEBITOS:
+            self.nomes[(tabela, id_)] = linha.get('nome') if tabela == 'clientes' else linha.get('nome_obra')
+        documento = _documento(tabela, linha, self.nomes)
+        if documento is None:
+            return
+        titulo, detalhe, campos = documento
+        pesos = {}
+        for texto, peso in campos:
+            for termo in normalizar(texto):
+                pesos[termo] = max(pesos.get(termo, 0), peso)
+        chave = (tabela, id_)
+        self.documentos[chave] = {'titulo': titulo or "—", 'detalhe': detalhe, 'termos': list(pesos)}
+        for termo, peso in pesos.items():
+            if termo not in self.postagens:
+                self.postagens[termo] = {}
+                self._vocabulario = None
+            self.postagens[termo][chave] = peso
+
+    def reindexar(self, tabela: str, linhas: list):
+        for chave in [c for c in self.documentos if c[0] == tabela]:
+            self.remover(*chave)
+        for linha in linhas:
+            self.adicionar(tabela, linha)
+        self.sujas.discard(tabela)
+
+    def _termos_com_prefixo(self, prefixo: str) -> list:
+        if self._vocabulario is None:
+            self._vocabulario = sorted(self.postagens)
+        inicio = bisect.bisect_left(self._vocabulario, prefixo)
+        termos = []
+        for termo in self._vocabulario[inicio:inicio + MAX_EXPANSOES_PREFIXO]:
+            if not termo.startswith(prefixo):
+                break
+            termos.append(termo)
+        return termos
+
+    def buscar(self, consulta: str, limite: int = MAX_RESULTADOS) -> list:
+        """
+        Documentos que contêm todos os termos da consulta (exatos ou como prefixo), ordenados por
+        relevância: peso do campo x raridade do termo; prefixos valem menos que termos exatos.
+        """
+        termos = normalizar(consulta)
+        if not termos:
+            return []
+        with self.trava:
+            total = max(len(self.documentos), 1)
+            pontuacao = None
+            for termo in termos:
+                melhores = {}
+                for candidato in self._termos_com_prefixo(termo):
+                    postagem = self.postagens[candidato]
+                    fator = (1.0 if candidato == termo else PESO_PREFIXO) * math.log(1 + total / len(postagem))
+                    for chave, peso in postagem.items():
+                        melhores[chave] = max(melhores.get(chave, 0), peso * fator)
+                pontuacao = melhores if pontuacao is None else {
+                    chave: pontuacao[chave] + valor for chave, valor in melhores.items() if chave in pontuacao}
+                if not pontuacao:
+                    return []
+            ordenados = sorted(pontuacao.items(), key=lambda item: (-item[1], str(self.documentos[item[0]]['titulo'])))
+            return [{'tabela': tabela, 'id': id_, **{k: v for k, v in self.documentos[(tabela, id_)].items() if k != 'termos'}}
+                    for (tabela, id_), _ in ordenados[:limite]]
+
+_indice = IndiceBusca()
+
+# --- Dados em Cache ---
+@cache_por_tabelas('clientes')
+def _carregar_clientes(_supabase):
+    return consultas.carregar_clientes_ativos(_supabase)
+
+@cache_por_tabelas('obras')
+def _carregar_obras(_supabase):
+    return consultas.carregar_obras(_supabase)
+
+@cache_por_tabelas('fornecedores')
+def _carregar_fornecedores(_supabase):
+    return consultas.carregar_fornecedores_ativos(_supabase)
+
+@cache_por_tabelas('corretores')
+def _carregar_corretores(_supabase):
+    return consultas.carregar_corretores_ativos(_supabase)
+
+@cache_por_tabelas('debitos', 'clientes', 'obras')
+def _carregar_debitos(_supabase):
+    return consultas.carregar_debitos(_supabase)
+
+CARREGADORES = {
+    'clientes': _carregar_clientes, 'obras': _carregar_obras, 'fornecedores': _carregar_fornecedores,
+    'corretores': _carregar_corretores, 'debitos': _carregar_debitos,
+}
+
+def _atualizar_sujas(supabase):
+    # Clientes e obras antes dos débitos, que usam os nomes deles
+    for tabela in [t for t in TIPOS if t in _indice.sujas]:
+        df = CARREGADORES[tabela](supabase)
+        with _indice.trava:
+            _indice.reindexar(tabela, df.to_dict('records'))
+
+# --- Atualização Incremental ---
+def _ao_alterar(tabela: str, evento: str, linhas: list):
+    """Linhas completas entram (ou saem) do índice na hora; sem elas, a tabela é reindexada na próxima busca."""
+    if tabela not in TIPOS:
+        return
+    with _indice.trava:
+        if tabela in REFERENCIADAS_POR_DEBITOS and evento != 'INSERT':
+            _indice.sujas.add('debitos')  # um nome mudou: o texto dos débitos também
+        if tabela in _indice.sujas:
+            return
+        if not linhas or any(linha.get('id') is None for linha in linhas):
+            _indice.sujas.add(tabela)
+        elif evento == 'DELETE':
+            for linha in linhas:
+                _indice.remover(tabela, linha['id'])
+        else:
+            for linha in linhas:
+                _indice.adicionar(tabela, linha)
+
+alteracoes.ouvir(_ao_alterar)
+
+# --- Interface ---
+def buscar(supabase, consulta: str, limite: int = MAX_RESULTADOS) -> list:
+    inicio = time.perf_counter()
+    _atualizar_sujas(supabase)
+    resultados = _indice.buscar(consulta, limite)
+    registrar_evento('busca', 'global', time.perf_counter() - inicio, linhas=len(resultados))
+    return resultados
+
+def caixa_de_busca(supabase):
+    """Campo de busca global com links que abrem o registro na página dele."""
+    consulta = st.text_input("🔎 Busca global", key="busca_global", placeholder="Nome, CPF/CNPJ, CRECI, obra, Apto 101...")
+    if not consulta:
+        return
+    resultados = buscar(supabase, consulta)
+    if not resultados:
+        st.caption("Nada encontrado.")
+    for resultado in resultados:
+        rotulo, pagina, parametro = TIPOS[resultado['tabela']]
+        st.page_link(pagina, label=f"{rotulo}: {resultado['titulo']}", help=resultado['detalhe'] or None,
+                     query_params={parametro: str(resultado['id'])})
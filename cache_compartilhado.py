@@ -0,0 +1,105 @@
+# cache_compartilhado.py
+# Cache compartilhado entre processos (réplicas do Streamlit): quadros serializados por versão e
+# contadores de versão das tabelas, para que uma invalidação numa réplica valha para todas.
+import pickle
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+_trava = threading.Lock()
+_backend = {'configurado': False, 'atual': None}
+
+# --- Interface ---
+class BackendCache:
+    """
+    Operações que um armazenamento compartilhado precisa oferecer. Um backend em rede
+    (ex.: Redis com GET/SETEX/MGET/INCR) implementa os mesmos quatro métodos.
+    """
+    def ler(self, chave: str):
+        """Bytes gravados para a chave, ou None se não existir ou tiver expirado."""
+        raise NotImplementedError
+
+    def gravar(self, chave: str, dados: bytes, ttl: float):
+        raise NotImplementedError
+
+    def versoes(self, nomes: list) -> dict:
+        """Versão atual de cada contador (0 para os que nunca foram incrementados)."""
+        raise NotImplementedError
+
+    def incrementar(self, nomes: list):
+        raise NotImplementedError
+
+    # Quadros (DataFrames, tuplas...) são guardados com pickle: o armazenamento deve ser de confiança
+    def ler_objeto(self, chave: str):
+        dados = self.ler(chave)
+        return None if dados is None else pickle.loads(dados)
+
+    def gravar_objeto(self, chave: str, objeto, ttl: float):
+        self.gravar(chave, pickle.dumps(objeto, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+
+# --- SQLite ---
+class BackendSQLite(BackendCache):
+    """Arquivo SQLite (modo WAL) num disco visto por todas as réplicas da mesma máquina ou volume."""
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._local = threading.local()
+        with self._conexao() as conexao:
+            conexao.execute("CREATE TABLE IF NOT EXISTS quadros (chave TEXT PRIMARY KEY, dados BLOB NOT NULL, expira_em REAL NOT NULL)")
+            conexao.execute("CREATE INDEX IF NOT EXISTS quadros_expira_em ON quadros (expira_em)")
+            conexao.execute("CREATE TABLE IF NOT EXISTS versoes (nome TEXT PRIMARY KEY, versao INTEGER NOT NULL)")
+
+    def _conexao(self) -> sqlite3.Connection:
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=30)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+        return conexao
+
+    def ler(self, chave: str):
+        linha = self._conexao().execute(
+            "SELECT dados FROM quadros WHERE chave = ? AND expira_em > ?", (chave, time.time())).fetchone()
+        return linha[0] if linha else None
+
+    def gravar(self, chave: str, dados: bytes, ttl: float):
+        agora = time.time()
+        with self._conexao() as conexao:
+            conexao.execute("DELETE FROM quadros WHERE expira_em <= ?", (agora,))
+            conexao.execute("INSERT OR REPLACE INTO quadros (chave, dados, expira_em) VALUES (?, ?, ?)",
+                            (chave, sqlite3.Binary(dados), agora + ttl))
+
+    def versoes(self, nomes: list) -> dict:
+        if not nomes:
+            return {}
+        marcadores = ",".join("?" * len(nomes))
+        linhas = self._conexao().execute(f"SELECT nome, versao FROM versoes WHERE nome IN ({marcadores})", list(nomes))
+        return dict(linhas.fetchall())
+
+    def incrementar(self, nomes: list):
+        with self._conexao() as conexao:
+            conexao.executemany(
+                "INSERT INTO versoes (nome, versao) VALUES (?, 1) ON CONFLICT(nome) DO UPDATE SET versao = versao + 1",
+                [(nome,) for nome in nomes])
+
+# --- Configuração ---
+def configurar(backend: BackendCache = None):
+    """Define (ou remove, com None) o backend compartilhado do processo."""
+    with _trava:
+        _backend['atual'] = backend
+        _backend['configurado'] = True
+
+def backend_atual():
+    """Backend do processo; na primeira chamada é criado a partir do secret 'cache_sqlite', se existir."""
+    if not _backend['configurado']:
+        try:
+            caminho = st.secrets.get("cache_sqlite")
+        except Exception:
+            caminho = None
+        with _trava:
+            if not _backend['configurado']:
+                _backend['atual'] = BackendSQLite(caminho) if caminho else None
+                _backend['configurado'] = True
+    return _backend['atual']
@@ -0,0 +1,99 @@
+# comissoes.py
+# Fechamento de comissões: as vendas (débitos com corretor) que ainda não têm comissão recebem o percentual
+# da tabela de taxas e são lançadas num único upsert idempotente. Sem Streamlit.
+from datetime import date, timedelta
+
+import pandas as pd
+
+from consultas import ler_em_lotes
+
+TABELA_TAXAS = 'taxas_comissao'
+# Coluna única em comissoes: lançar de novo a comissão de uma venda não a duplica
+COLUNA_CHAVE = 'debito_id'
+# Percentual usado quando nenhuma faixa da tabela de taxas se aplica à venda
+PERCENTUAL_PADRAO = 5.0
+TAMANHO_LOTE = 1000
+
+COLUNAS_PREVIA = ['debito_id', 'corretor_id', 'nome_corretor', 'nome_cliente', 'descricao_venda', 'data_venda',
+                  'valor_venda', 'percentual_comissao', 'valor_comissao']
+
+# --- Taxas ---
+def percentuais(df_vendas: pd.DataFrame, df_taxas: pd.DataFrame, padrao: float = PERCENTUAL_PADRAO) -> pd.Series:
+    """
+    Percentual de cada venda: a faixa do próprio corretor com o maior valor mínimo atingido pela venda;
+    sem ela, a faixa geral (sem corretor); sem nenhuma das duas, o padrão.
+    """
+    vendas = pd.DataFrame({
+        'ordem': range(len(df_vendas)),
+        'corretor_id': df_vendas['corretor_id'].astype('int64').to_numpy(),
+        'valor': pd.to_numeric(df_vendas['valor_total'], errors='coerce').fillna(0.0).astype(float).to_numpy(),
+    }).sort_values('valor')
+    resultado = pd.Series(float(padrao), index=range(len(df_vendas)))
+    if df_taxas.empty or vendas.empty:
+        return resultado
+    taxas = df_taxas.assign(
+        valor_minimo=pd.to_numeric(df_taxas['valor_minimo'], errors='coerce').fillna(0.0).astype(float),
+        percentual=pd.to_numeric(df_taxas['percentual'], errors='coerce'),
+    ).dropna(subset=['percentual']).sort_values('valor_minimo')
+    especificas = taxas['corretor_id'].notna()
+    # Primeiro as faixas gerais, depois as do corretor, que têm a palavra final
+    for faixas, por in ((taxas[~especificas], None), (taxas[especificas].astype({'corretor_id': 'int64'}), 'corretor_id')):
+        if faixas.empty:
+            continue
+        colunas = ['valor_minimo', 'percentual'] + ([por] if por else [])
+        casadas = pd.merge_asof(vendas, faixas[colunas], left_on='valor', right_on='valor_minimo', by=por, direction='backward')
+        casadas = casadas.dropna(subset=['percentual'])
+        resultado.loc[casadas['ordem'].to_numpy()] = casadas['percentual'].to_numpy()
+    return resultado
+
+def carregar_taxas(supabase) -> pd.DataFrame:
+    response = supabase.table(TABELA_TAXAS).select('*, corretores(nome)').order('valor_minimo').execute()
+    return pd.DataFrame(response.data)
+
+# --- Fechamento ---
+def _campo(serie: pd.Series, campo: str) -> pd.Series:
+    return serie.apply(lambda x: x.get(campo) if isinstance(x, dict) else None)
+
+def carregar_vendas_sem_comissao(supabase, ate: date = None) -> pd.DataFrame:
+    """Débitos com corretor, lançados até 'ate' (inclusive), que ainda não têm comissão."""
+    def vendas():
+        consulta = supabase.table('debitos').select('id, corretor_id, descricao, valor_total, criado_em, clientes(nome), corretores(nome)') \
+            .gt('corretor_id', 0)
+        return consulta.lt('criado_em', (ate + timedelta(days=1)).isoformat()) if ate else consulta
+    lancadas = ler_em_lotes(lambda: supabase.table('comissoes').select(f'id, {COLUNA_CHAVE}').gt(COLUNA_CHAVE, 0))
+    com_comissao = {c[COLUNA_CHAVE] for c in lancadas}
+    return pd.DataFrame([v for v in ler_em_lotes(vendas) if v['id'] not in com_comissao],
+                        columns=['id', 'corretor_id', 'descricao', 'valor_total', 'criado_em', 'clientes', 'corretores'])
+
+def calcular(df_vendas: pd.DataFrame, df_taxas: pd.DataFrame) -> pd.DataFrame:
+    """Prévia das comissões das vendas: uma linha por débito com o percentual da tabela e o valor calculado."""
+    if df_vendas.empty:
+        return pd.DataFrame(columns=COLUNAS_PREVIA)
+    valor_venda = pd.to_numeric(df_vendas['valor_total'], errors='coerce').fillna(0.0).astype(float)
+    percentual = percentuais(df_vendas, df_taxas).to_numpy()
+    return pd.DataFrame({
+        'debito_id': df_vendas['id'].astype('int64'),
+        'corretor_id': df_vendas['corretor_id'].astype('int64'),
+        'nome_corretor': _campo(df_vendas['corretores'], 'nome').fillna('N/A'),
+        'nome_cliente': _campo(df_vendas['clientes'], 'nome').fillna('N/A'),
+        'descricao_venda': df_vendas['descricao'],
+        'data_venda': pd.to_datetime(df_vendas['criado_em'], errors='coerce', utc=True, format='mixed').dt.tz_convert(None).dt.date,
+        'valor_venda': valor_venda,
+        'percentual_comissao': percentual,
+        'valor_comissao': (valor_venda * percentual / 100).round(2),
+    }).sort_values(['nome_corretor', 'data_venda'], ignore_index=True)
+
+def lancar(supabase, df_previa: pd.DataFrame) -> int:
+    """
+    Lança as comissões da prévia (status 'Pendente') em lotes de um único upsert que ignora as vendas
+    que já têm comissão; lançar de novo, ou em duas sessões ao mesmo tempo, não duplica nada.
+    """
+    linhas = [{
+        COLUNA_CHAVE: int(c.debito_id), 'corretor_id': int(c.corretor_id),
+        'descricao_venda': f"{c.descricao_venda} - {c.nome_cliente}", 'valor_venda': float(c.valor_venda),
+        'percentual_comissao': float(c.percentual_comissao), 'valor_comissao': float(c.valor_comissao), 'status': 'Pendente',
+    } for c in df_previa.itertuples(index=False)]
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        supabase.table('comissoes').upsert(linhas[inicio:inicio + TAMANHO_LOTE], on_conflict=COLUNA_CHAVE,
+                                           ignore_duplicates=True).execute()
+    return len(linhas)
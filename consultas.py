@@ -0,0 +1,217 @@
+# consultas.py
+# Consultas ao Supabase usadas pelas páginas. Sem cache e sem Streamlit: as páginas
+# envolvem estas funções com o cache, e os benchmarks podem chamá-las diretamente.
+import logging
+
+import pandas as pd
+from financeiro import resumir_obras
+
+# O Supabase corta cada resposta do PostgREST em 1000 linhas; leituras completas vão em páginas desse tamanho
+LOTE_LEITURA = 1000
+
+_log = logging.getLogger(__name__)
+
+def iterar_em_lotes(montar_consulta, tamanho: int = LOTE_LEITURA):
+    """
+    Lotes de linhas de uma consulta (que precisa trazer 'id'), ordenados por id. Cada lote começa
+    depois do último id lido, em vez de usar OFFSET, que faria o banco reler as linhas puladas.
+    """
+    ultimo_id = None
+    while True:
+        consulta = montar_consulta()
+        if ultimo_id is not None:
+            consulta = consulta.gt('id', ultimo_id)
+        lote = consulta.order('id').limit(tamanho).execute().data
+        if lote:
+            yield lote
+        if len(lote) < tamanho:
+            return
+        ultimo_id = lote[-1]['id']
+
+def ler_em_lotes(montar_consulta, tamanho: int = LOTE_LEITURA) -> list:
+    """Todas as linhas de uma consulta, lidas com iterar_em_lotes."""
+    return [linha for lote in iterar_em_lotes(montar_consulta, tamanho) for linha in lote]
+
+# --- Projeções ---
+# Colunas que cada lista traz do banco, num só lugar. Os campos pesados que só aparecem no painel de
+# detalhes de uma linha (observações, URLs de comprovante) ficam de fora e são lidos com carregar_detalhes.
+PROJECOES = {
+    'clientes': 'id, nome, cpf_cnpj, contato_telefone, contato_email',
+    'fornecedores': 'id, nome_razao_social, cpf_cnpj, contato_principal, tipo_servico',
+    'corretores': 'id, nome, cpf, creci, telefone, email',
+    'debitos': 'id, cliente_id, obra_id, corretor_id, descricao, valor_total, n_parcelas, data_inicio, '
+               'clientes(nome), obras(nome_obra), corretores(nome)',
+    'comissoes': 'id, corretor_id, debito_id, descricao_venda, valor_venda, percentual_comissao, valor_comissao, '
+                 'status, data_pagamento, criado_em, corretores(nome)',
+    # Painel de despesas: só as colunas mostradas; os filtros vão na própria consulta
+    'painel_contas': 'id, fornecedor_id, obra_id, descricao, valor, data_vencimento, status, data_pagamento, '
+                     'fornecedores(nome_razao_social), obras(nome_obra)',
+    # Ledger dos Relatórios: só ids nas linhas; os nomes vêm das consultas de NOMES_LEDGER
+    'ledger_receber': 'id, cliente_id, debito_id, numero_parcela, valor_parcela, data_vencimento, status, data_pagamento',
+    'ledger_pagar': 'id, fornecedor_id, obra_id, descricao, valor, data_vencimento, status, data_pagamento',
+    # Busca de duplicados: ativos e arquivados, só os campos comparados
+    'identificacao_clientes': 'id, nome, cpf_cnpj, contato_telefone, contato_email',
+    'identificacao_fornecedores': 'id, nome_razao_social, cpf_cnpj, contato_principal',
+}
+# Campos lidos só quando o painel de detalhes de uma linha abre
+DETALHES = {
+    'clientes': 'observacoes',
+    'contas_a_pagar': 'observacoes, comprovante_url',
+    'comissoes': 'comprovante_url',
+}
+
+def carregar_detalhes(supabase, tabela: str, id_linha) -> dict:
+    """Campos de DETALHES de uma linha; vazio se ela não existir mais."""
+    response = supabase.table(tabela).select(DETALHES[tabela]).eq('id', id_linha).limit(1).execute()
+    return response.data[0] if response.data else {}
+
+# --- Clientes ---
+def carregar_clientes_ativos(supabase):
+    response = supabase.table('clientes').select(PROJECOES['clientes']).eq('ativo', True).order('nome').execute()
+    return pd.DataFrame(response.data)
+
+def carregar_clientes_arquivados(supabase):
+    response = supabase.rpc('get_clientes_arquivados').execute()
+    return pd.DataFrame(response.data)
+
+def carregar_identificacao_clientes(supabase):
+    """Todos os clientes (ativos e arquivados, estes pela RPC), só com os campos usados na busca de duplicados."""
+    colunas = PROJECOES['identificacao_clientes']
+    ativos = ler_em_lotes(lambda: supabase.table('clientes').select(colunas).eq('ativo', True))
+    arquivados = ler_em_lotes(lambda: supabase.rpc('get_clientes_arquivados').select(colunas))
+    return ativos + arquivados
+
+def carregar_contratos(supabase, cliente_id):
+    """Carrega os contratos de um cliente específico."""
+    response = supabase.table('contratos').select('*').eq('cliente_id', cliente_id).order('data_upload', desc=True).execute()
+    return pd.DataFrame(response.data)
+
+def carregar_clientes(supabase):
+    """Apenas id e nome dos clientes ativos, para as caixas de seleção."""
+    response = supabase.table('clientes').select('id, nome').eq('ativo', True).order('nome').execute()
+    return pd.DataFrame(response.data)
+
+# --- Fornecedores e Contas a Pagar ---
+def carregar_fornecedores_ativos(supabase):
+    response = supabase.table('fornecedores').select(PROJECOES['fornecedores']).eq('ativo', True).order('nome_razao_social').execute()
+    return pd.DataFrame(response.data)
+
+def carregar_fornecedores_arquivados(supabase):
+    response = supabase.table('fornecedores').select(PROJECOES['fornecedores']).eq('ativo', False).order('nome_razao_social').execute()
+    return pd.DataFrame(response.data)
+
+def carregar_identificacao_fornecedores(supabase):
+    """Todos os fornecedores (ativos e arquivados), só com os campos usados na busca de duplicados."""
+    return ler_em_lotes(lambda: supabase.table('fornecedores').select(PROJECOES['identificacao_fornecedores']))
+
+def atualizar_status_vencidos(supabase) -> bool:
+    """Marca como atrasadas as parcelas e contas vencidas (RPC 'atualizar_status_parcelas'); False se a RPC falhar."""
+    try:
+        supabase.rpc('atualizar_status_parcelas').execute()
+        return True
+    except Exception as e: # Sem a atualização, as listas saem com o status atual; não impede a leitura
+        _log.warning("Falha ao atualizar o status das parcelas e contas: %s", e)
+        return False
+
+def filtrar_contas_a_pagar(consulta, hoje: str, obra_id=None, fornecedor_id=None, situacao=None, vencimento_de=None, vencimento_ate=None):
+    """
+    Aplica os filtros do painel na consulta. 'Atrasado' e 'Pendente' são decididos pelo vencimento
+    em relação a 'hoje' (ISO), não pelo status gravado, que só muda quando a conta é paga.
+    """
+    if obra_id:
+        consulta = consulta.eq('obra_id', obra_id)
+    if fornecedor_id:
+        consulta = consulta.eq('fornecedor_id', fornecedor_id)
+    if situacao == 'Pago':
+        consulta = consulta.eq('status', 'Pago')
+    elif situacao == 'Em aberto':
+        consulta = consulta.neq('status', 'Pago')
+    elif situacao == 'Atrasado':
+        consulta = consulta.neq('status', 'Pago').lt('data_vencimento', hoje)
+    elif situacao == 'Pendente':
+        consulta = consulta.neq('status', 'Pago').gte('data_vencimento', hoje)
+    if vencimento_de:
+        consulta = consulta.gte('data_vencimento', vencimento_de)
+    if vencimento_ate:
+        consulta = consulta.lte('data_vencimento', vencimento_ate)
+    return consulta
+
+def carregar_pagina_contas_a_pagar(supabase, filtros: dict, pagina: int, por_pagina: int):
+    """Uma página das contas que passam nos filtros, por vencimento; devolve (DataFrame, total de contas filtradas)."""
+    consulta = filtrar_contas_a_pagar(supabase.table('contas_a_pagar').select(PROJECOES['painel_contas'], count='exact'), **filtros)
+    inicio = pagina * por_pagina
+    response = consulta.order('data_vencimento').order('id').range(inicio, inicio + por_pagina - 1).execute()
+    return pd.DataFrame(response.data), response.count or 0
+
+def carregar_valores_contas_a_pagar(supabase, filtros: dict):
+    """Valor, status e datas de todas as contas filtradas, para os totais do painel."""
+    linhas = ler_em_lotes(lambda: filtrar_contas_a_pagar(
+        supabase.table('contas_a_pagar').select('id, valor, status, data_vencimento'), **filtros))
+    return pd.DataFrame(linhas, columns=['id', 'valor', 'status', 'data_vencimento'])
+
+# --- Obras ---
+def carregar_obras_ativas(supabase):
+    """Apenas id e nome das obras ativas, para as caixas de seleção."""
+    response = supabase.table('obras').select('id, nome_obra').eq('ativo', True).order('nome_obra').execute()
+    return pd.DataFrame(response.data)
+
+def carregar_obras(supabase):
+    response = supabase.table('obras').select('*').eq('ativo', True).order('nome_obra').execute()
+    return pd.DataFrame(response.data)
+
+def carregar_resumo_financeiro_obras(supabase):
+    """
+    Agregados por obra ativa somados no banco (RPC 'resumo_financeiro_obras': uma linha por obra, com os gastos
+    pagos por mês), sem trazer as parcelas e contas; resumir_obras só calcula margens e percentuais.
+    """
+    return resumir_obras(ler_em_lotes(lambda: supabase.rpc('resumo_financeiro_obras')))
+
+# --- Contas a Receber ---
+def carregar_debitos(supabase):
+    response = supabase.table('debitos').select(PROJECOES['debitos']).execute()
+    return pd.DataFrame(response.data)
+
+def carregar_parcelas(supabase, debito_id):
+    if not debito_id: return pd.DataFrame()
+    response = supabase.table('parcelas').select('*').eq('debito_id', debito_id).order('numero_parcela').execute()
+    return pd.DataFrame(response.data)
+
+# --- Corretores ---
+def carregar_corretores_ativos(supabase):
+    response = supabase.table('corretores').select(PROJECOES['corretores']).eq('ativo', True).order('nome').execute()
+    return pd.DataFrame(response.data)
+
+def carregar_corretores_arquivados(supabase):
+    response = supabase.table('corretores').select(PROJECOES['corretores']).eq('ativo', False).order('nome').execute()
+    return pd.DataFrame(response.data)
+
+def carregar_comissoes(supabase):
+    response = supabase.table('comissoes').select(PROJECOES['comissoes']).order('criado_em', desc=True).execute()
+    return pd.DataFrame(response.data)
+
+# --- Relatórios ---
+# Nomes juntados às linhas do ledger: tabela -> colunas (a primeira é o id)
+NOMES_LEDGER = {
+    'clientes': 'id, nome', 'debitos': 'id, descricao, obra_id', 'obras': 'id, nome_obra', 'fornecedores': 'id, nome_razao_social',
+}
+
+def carregar_todos_dados_financeiros(supabase):
+    """
+    Carrega todas as transações (a pagar e a receber) de uma vez. As linhas trazem só os ids; os nomes de
+    clientes, débitos, obras e fornecedores vêm uma vez cada e são juntados aqui, em vez de repetidos em cada parcela.
+    Tudo é lido em lotes, para nenhuma tabela ser cortada no limite de linhas por resposta do PostgREST.
+    """
+    parcelas = pd.DataFrame(ler_em_lotes(lambda: supabase.table('parcelas').select(PROJECOES['ledger_receber'])))
+    contas = pd.DataFrame(ler_em_lotes(lambda: supabase.table('contas_a_pagar').select(PROJECOES['ledger_pagar'])))
+    nomes = {tabela: pd.DataFrame(ler_em_lotes(lambda tabela=tabela, colunas=colunas: supabase.table(tabela).select(colunas)),
+                                  columns=colunas.split(', ')).set_index('id')
+             for tabela, colunas in NOMES_LEDGER.items()}
+    if not parcelas.empty:
+        debitos = nomes['debitos'].reindex(parcelas['debito_id'])
+        parcelas['nome_cliente'] = parcelas['cliente_id'].map(nomes['clientes']['nome']).fillna('N/A')
+        parcelas['descricao_debito'] = debitos['descricao'].to_numpy()
+        parcelas['obra_id'] = debitos['obra_id'].to_numpy()
+        parcelas['nome_obra'] = parcelas['obra_id'].map(nomes['obras']['nome_obra']).fillna('Sem obra')
+    if not contas.empty:
+        contas['nome_fornecedor'] = contas['fornecedor_id'].map(nomes['fornecedores']['nome_razao_social']).fillna('N/A')
+    return parcelas, contas
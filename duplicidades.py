@@ -0,0 +1,210 @@
+# duplicidades.py
+# Detecção de cadastros repetidos (clientes e fornecedores). Nomes e documentos são normalizados e
+# só são comparados os registros que dividem uma chave de bloco (dígitos do documento, chave fonética
+# do nome, contato), no lugar de comparar todos com todos.
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import combinations
+
+import pandas as pd
+import streamlit as st
+
+# Pontuação mínima (0 a 1) para um par ser apontado como possível duplicado
+LIMIAR = 0.85
+# Blocos maiores que isso (nomes muito comuns) são comparados por vizinhança na ordem alfabética
+MAX_BLOCO = 200
+JANELA = 10
+
+# Campos de cada tabela: nome, documento e contatos
+CAMPOS_CLIENTES = {'nome': 'nome', 'documento': 'cpf_cnpj', 'contatos': ('contato_email', 'contato_telefone')}
+CAMPOS_FORNECEDORES = {'nome': 'nome_razao_social', 'documento': 'cpf_cnpj', 'contatos': ('contato_principal',)}
+
+PALAVRAS_IGNORADAS = {'da', 'de', 'do', 'das', 'dos', 'e', 'ltda', 'me', 'epp', 'eireli', 'mei', 'sa', 'cia'}
+
+# Regras aplicadas em ordem sobre o nome sem acentos, para grafias do mesmo som caírem na mesma chave
+REGRAS_FONETICAS = [
+    (r'ph', 'f'), (r'th', 't'), (r'lh', 'l'), (r'nh', 'n'), (r'[cs]h', 'x'),
+    (r'g([ei])', r'j\1'), (r'gu([ei])', r'g\1'), (r'qu([ei])', r'k\1'), (r'q', 'k'),
+    (r'c([ei])', r's\1'), (r'c', 'k'),
+    (r'y', 'i'), (r'w', 'v'), (r'z', 's'), (r'h', ''), (r'm([^aeiou]|$)', r'n\1'),
+]
+
+# --- Normalização ---
+def sem_acentos(texto) -> str:
+    texto = str(texto).lower().replace('ç', 's')
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode()
+
+def digitos(texto) -> str:
+    return re.sub(r'\D', '', str(texto)) if texto is not None and texto == texto else ""
+
+def termos_do_nome(nome) -> list:
+    """Palavras do nome sem acentos, sem preposições e sem sufixos de empresa (Ltda, ME...)."""
+    if nome is None or nome != nome:
+        return []
+    return [t for t in re.findall(r'[a-z0-9]+', sem_acentos(nome)) if t not in PALAVRAS_IGNORADAS]
+
+@lru_cache(maxsize=50_000)
+def chave_fonetica(termo: str) -> str:
+    """Esqueleto consonantal do termo depois das regras do português (ex.: 'Thiago' e 'Tiago' -> 'tg')."""
+    for padrao, troca in REGRAS_FONETICAS:
+        termo = re.sub(padrao, troca, termo)
+    termo = re.sub(r'(.)\1+', r'\1', termo)
+    return termo[:1] + re.sub(r'[aeiou]', '', termo[1:])
+
+def _contato(valor) -> str:
+    """E-mail em minúsculas ou os 8 últimos dígitos do telefone; vazio se não for nenhum dos dois."""
+    if valor is None or valor != valor:
+        return ""
+    texto = str(valor).strip().lower()
+    if '@' in texto:
+        return texto
+    numero = digitos(texto)
+    return numero[-8:] if len(numero) >= 8 else ""
+
+# --- Índice ---
+class IndiceDuplicidades:
+    """Registros normalizados e seus blocos (chave -> ids). Serve tanto à varredura da base quanto à checagem de um cadastro novo."""
+    def __init__(self, registros: list, campos: dict):
+        self.campos = campos
+        self.registros = {}
+        self.blocos = {}
+        for registro in registros:
+            assinatura = self._assinar(registro)
+            self.registros[assinatura['id']] = assinatura
+            for chave in assinatura['chaves']:
+                self.blocos.setdefault(chave, []).append(assinatura['id'])
+
+    def _assinar(self, registro: dict) -> dict:
+        termos = termos_do_nome(registro.get(self.campos['nome']))
+        foneticas = [chave_fonetica(t) for t in termos]
+        documento = digitos(registro.get(self.campos['documento']))
+        documento = documento if len(documento) in (11, 14) else ""
+        contatos = {c for c in (_contato(registro.get(campo)) for campo in self.campos['contatos']) if c}
+        chaves = {f"doc:{documento}"} if documento else set()
+        if foneticas:
+            chaves.add(f"nome:{foneticas[0]}|{foneticas[-1]}")
+        if len(foneticas) >= 3:
+            chaves.add(f"nome:{foneticas[0]}|{foneticas[1]}")
+        chaves |= {f"contato:{c}" for c in contatos}
+        return {'id': registro.get('id'), 'nome': registro.get(self.campos['nome']), 'documento': registro.get(self.campos['documento']),
+                'texto': " ".join(termos), 'foneticas': set(foneticas), 'digitos': documento, 'contatos': contatos, 'chaves': chaves}
+
+    @staticmethod
+    def comparar(a: dict, b: dict, limiar: float = 0.0) -> tuple:
+        """(pontuação, motivos) de um par de assinaturas; pares que não podem chegar ao 'limiar' saem antes da comparação dos nomes."""
+        mesmo_documento = bool(a['digitos']) and a['digitos'] == b['digitos']
+        documentos_diferentes = bool(a['digitos'] and b['digitos']) and not mesmo_documento
+        mesmo_contato = bool(a['contatos'] & b['contatos'])
+        # Homônimos com documentos diferentes costumam ser pessoas diferentes
+        fator, bonus = (0.6 if documentos_diferentes else 1.0), (0.1 if mesmo_contato else 0.0)
+        if not mesmo_documento and fator + bonus < limiar:
+            return 0.0, []
+        similaridade = 0.0
+        if a['foneticas'] and b['foneticas']:
+            # Nome contido no outro (ex.: sem o sobrenome do meio) ou só com grafia diferente
+            menor = min(len(a['foneticas']), len(b['foneticas']))
+            if menor >= 2 and len(a['foneticas'] & b['foneticas']) == menor:
+                similaridade = 0.95
+        if a['texto'] and b['texto']:
+            comparador = SequenceMatcher(None, a['texto'], b['texto'])
+            if mesmo_documento or comparador.quick_ratio() * fator + bonus >= limiar:
+                similaridade = max(similaridade, comparador.ratio())
+        motivos = [f"nome semelhante ({similaridade:.0%})"] if similaridade >= 0.7 else []
+        pontuacao = similaridade * fator
+        if mesmo_documento:
+            motivos.insert(0, "mesmo CPF/CNPJ")
+            pontuacao = max(0.9, similaridade)
+        elif documentos_diferentes:
+            motivos.append("CPF/CNPJ diferentes")
+        if mesmo_contato:
+            motivos.append("mesmo contato")
+            pontuacao = min(1.0, pontuacao + bonus)
+        return pontuacao, motivos
+
+    def candidatos(self, registro: dict, limiar: float = LIMIAR, limite: int = 5) -> list:
+        """Cadastros já existentes parecidos com 'registro' (ainda sem id), do mais ao menos provável."""
+        novo = self._assinar(registro)
+        ids = {id_ for chave in novo['chaves'] for id_ in self.blocos.get(chave, ())}
+        resultado = []
+        for id_ in ids:
+            existente = self.registros[id_]
+            pontuacao, motivos = self.comparar(novo, existente, limiar)
+            if pontuacao >= limiar:
+                resultado.append({'id': id_, 'nome': existente['nome'], 'documento': existente['documento'],
+                                  'pontuacao': pontuacao, 'motivos': ", ".join(motivos)})
+        return sorted(resultado, key=lambda c: -c['pontuacao'])[:limite]
+
+    def _pares_candidatos(self):
+        vistos = set()
+        for ids in self.blocos.values():
+            if len(ids) > MAX_BLOCO:
+                ordenados = sorted(ids, key=lambda id_: self.registros[id_]['texto'])
+                pares = ((x, y) for i, x in enumerate(ordenados) for y in ordenados[i + 1:i + 1 + JANELA])
+            else:
+                pares = combinations(ids, 2)
+            for x, y in pares:
+                par = (x, y) if str(x) < str(y) else (y, x)
+                if par not in vistos:
+                    vistos.add(par)
+                    yield par
+
+    def pares(self, limiar: float = LIMIAR) -> pd.DataFrame:
+        """Todos os pares de possíveis duplicados da base, do mais ao menos provável."""
+        linhas = []
+        for x, y in self._pares_candidatos():
+            a, b = self.registros[x], self.registros[y]
+            pontuacao, motivos = self.comparar(a, b, limiar)
+            if pontuacao >= limiar:
+                linhas.append({'id_a': x, 'nome_a': a['nome'], 'documento_a': a['documento'],
+                               'id_b': y, 'nome_b': b['nome'], 'documento_b': b['documento'],
+                               'pontuacao': pontuacao, 'motivos': ", ".join(motivos)})
+        colunas = ['id_a', 'nome_a', 'documento_a', 'id_b', 'nome_b', 'documento_b', 'pontuacao', 'motivos']
+        return pd.DataFrame(linhas, columns=colunas).sort_values('pontuacao', ascending=False, ignore_index=True)
+
+# --- Uso nas Páginas ---
+def confirmar_cadastro(chave: str, indice, novo: dict, enviado: bool):
+    """
+    Devolve o cadastro a gravar, ou None. No envio, 'novo' é comparado com o índice (função que o devolve,
+    chamada só aqui); havendo parecidos, fica guardado na sessão com um aviso até o usuário confirmar ou cancelar.
+    """
+    if enviado:
+        candidatos = indice().candidatos(novo)
+        if not candidatos:
+            return novo
+        st.session_state[chave] = (novo, candidatos)
+    confirmado = st.session_state.pop(f"{chave}_confirmado", None)
+    if confirmado is not None:
+        return confirmado
+    if chave not in st.session_state:
+        return None
+    novo, candidatos = st.session_state[chave]
+    with st.container(border=True):
+        st.warning(f"⚠️ Já existe cadastro parecido com **{next(iter(novo.values()))}**. Confira antes de gravar.")
+        st.dataframe(pd.DataFrame(candidatos)[['nome', 'documento', 'pontuacao', 'motivos']], hide_index=True,
+                     use_container_width=True, column_config={
+                         'nome': "Cadastro existente", 'documento': "CPF/CNPJ", 'motivos': "Motivos",
+                         'pontuacao': st.column_config.ProgressColumn("Semelhança", min_value=0, max_value=1, format="percent")})
+        c1, c2 = st.columns(2)
+        c1.button("Cadastrar mesmo assim", key=f"{chave}_confirmar", type="primary", use_container_width=True,
+                  on_click=_decidir, args=(chave, True))
+        c2.button("Cancelar cadastro", key=f"{chave}_cancelar", use_container_width=True, on_click=_decidir, args=(chave, False))
+    return None
+
+def _decidir(chave: str, confirmar: bool):
+    # Roda antes da próxima execução da página, que então já não mostra o aviso
+    novo, _ = st.session_state.pop(chave)
+    if confirmar:
+        st.session_state[f"{chave}_confirmado"] = novo
+
+def mostrar_pares(df_pares: pd.DataFrame, rotulo: str):
+    """Tabela da varredura da base com os pares de possíveis duplicados."""
+    st.markdown(f"**Pares de possíveis duplicados:** {len(df_pares)}")
+    if df_pares.empty:
+        st.success(f"Nenhum {rotulo} com cara de duplicado.")
+        return
+    st.dataframe(df_pares.drop(columns=['id_a', 'id_b']), hide_index=True, use_container_width=True, column_config={
+        'nome_a': f"{rotulo.capitalize()} A", 'documento_a': "CPF/CNPJ A", 'nome_b': f"{rotulo.capitalize()} B",
+        'documento_b': "CPF/CNPJ B", 'motivos': "Motivos",
+        'pontuacao': st.column_config.ProgressColumn("Semelhança", min_value=0, max_value=1, format="percent")})
@@ -0,0 +1,145 @@
+# exportacao.py
+# Planilhas para a contabilidade (fluxo de caixa realizado, contas a receber e a pagar em aberto) em CSV
+# ou XLSX. As linhas saem do banco em lotes e vão direto para o arquivo, sem montar o ledger num DataFrame.
+import csv
+import io
+from datetime import date, timedelta
+
+from consultas import iterar_em_lotes
+from instrumentacao import medir
+from utils import formatar_moeda
+
+FORMATOS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel (XLSX)": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+FORMATO_MOEDA_XLSX = '"R$" #,##0.00;-"R$" #,##0.00'
+FORMATO_DATA_XLSX = 'DD/MM/YYYY'
+
+def _nome(relacao, campo: str):
+    return relacao.get(campo) if isinstance(relacao, dict) else None
+
+def _data(texto):
+    return date.fromisoformat(str(texto)[:10]) if texto else None
+
+# --- Linhas de Cada Relatório ---
+def _linhas_fluxo(supabase, inicio: date, fim: date):
+    """
+    Recebimentos e pagamentos do período em ordem de data. A leitura vai mês a mês: só as linhas de um
+    mês ficam em memória para serem ordenadas.
+    """
+    mes = inicio.replace(day=1)
+    while mes <= fim:
+        proximo = (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+        de, ate = max(mes, inicio), min(proximo - timedelta(days=1), fim)
+        entradas = iterar_em_lotes(lambda: supabase.table('parcelas')
+                                   .select('id, numero_parcela, valor_parcela, data_pagamento, clientes(nome), debitos(descricao, obras(nome_obra))')
+                                   .eq('status', 'Pago').gte('data_pagamento', de.isoformat()).lte('data_pagamento', ate.isoformat()))
+        saidas = iterar_em_lotes(lambda: supabase.table('contas_a_pagar')
+                                 .select('id, descricao, valor, data_pagamento, fornecedores(nome_razao_social), obras(nome_obra)')
+                                 .eq('status', 'Pago').gte('data_pagamento', de.isoformat()).lte('data_pagamento', ate.isoformat()))
+        linhas = [{
+            'data': _data(p['data_pagamento']), 'tipo': "Entrada", 'pessoa': _nome(p.get('clientes'), 'nome'),
+            'descricao': f"{_nome(p.get('debitos'), 'descricao') or 'Débito'} - parcela {p['numero_parcela']}",
+            'obra': _nome(_nome(p.get('debitos'), 'obras'), 'nome_obra'), 'valor': p['valor_parcela'],
+        } for lote in entradas for p in lote] + [{
+            'data': _data(c['data_pagamento']), 'tipo': "Saída", 'pessoa': _nome(c.get('fornecedores'), 'nome_razao_social'),
+            'descricao': c['descricao'], 'obra': _nome(c.get('obras'), 'nome_obra'),
+            'valor': -float(c['valor'] or 0),
+        } for lote in saidas for c in lote]
+        yield from sorted(linhas, key=lambda l: (l['data'], l['tipo']))
+        mes = proximo
+
+def _linhas_receber(supabase, hoje: date):
+    for lote in iterar_em_lotes(lambda: supabase.table('parcelas')
+                                .select('id, numero_parcela, valor_parcela, data_vencimento, clientes(nome), debitos(descricao, obras(nome_obra))')
+                                .neq('status', 'Pago')):
+        for p in lote:
+            vencimento = _data(p['data_vencimento'])
+            yield {'vencimento': vencimento, 'pessoa': _nome(p.get('clientes'), 'nome'), 'descricao': _nome(p.get('debitos'), 'descricao'),
+                   'parcela': p['numero_parcela'], 'obra': _nome(_nome(p.get('debitos'), 'obras'), 'nome_obra'),
+                   'valor': p['valor_parcela'], 'situacao': "Atrasado" if vencimento and vencimento < hoje else "A vencer"}
+
+def _linhas_pagar(supabase, hoje: date):
+    for lote in iterar_em_lotes(lambda: supabase.table('contas_a_pagar')
+                                .select('id, descricao, valor, data_vencimento, fornecedores(nome_razao_social), obras(nome_obra)')
+                                .neq('status', 'Pago')):
+        for c in lote:
+            vencimento = _data(c['data_vencimento'])
+            yield {'vencimento': vencimento, 'pessoa': _nome(c.get('fornecedores'), 'nome_razao_social'), 'descricao': c['descricao'],
+                   'obra': _nome(c.get('obras'), 'nome_obra'), 'valor': c['valor'],
+                   'situacao': "Atrasado" if vencimento and vencimento < hoje else "A vencer"}
+
+# Colunas de cada relatório: (título, campo da linha, tipo); 'periodo' indica se o relatório pede datas de início e fim
+RELATORIOS = {
+    "Fluxo de Caixa Realizado": {'linhas': _linhas_fluxo, 'periodo': True, 'colunas': [
+        ("Data", 'data', 'data'), ("Tipo", 'tipo', 'texto'), ("Cliente / Fornecedor", 'pessoa', 'texto'),
+        ("Descrição", 'descricao', 'texto'), ("Obra", 'obra', 'texto'), ("Valor", 'valor', 'moeda')]},
+    "Contas a Receber em Aberto": {'linhas': _linhas_receber, 'periodo': False, 'colunas': [
+        ("Vencimento", 'vencimento', 'data'), ("Cliente", 'pessoa', 'texto'), ("Débito", 'descricao', 'texto'),
+        ("Parcela", 'parcela', 'texto'), ("Obra", 'obra', 'texto'), ("Valor", 'valor', 'moeda'), ("Situação", 'situacao', 'texto')]},
+    "Contas a Pagar em Aberto": {'linhas': _linhas_pagar, 'periodo': False, 'colunas': [
+        ("Vencimento", 'vencimento', 'data'), ("Fornecedor", 'pessoa', 'texto'), ("Descrição", 'descricao', 'texto'),
+        ("Obra", 'obra', 'texto'), ("Valor", 'valor', 'moeda'), ("Situação", 'situacao', 'texto')]},
+}
+
+# --- Escrita dos Arquivos ---
+def _celula_csv(valor, tipo: str) -> str:
+    if valor is None:
+        return ""
+    if tipo == 'moeda':
+        return formatar_moeda(float(valor)).removeprefix("R$ ")
+    if tipo == 'data':
+        return valor.strftime('%d/%m/%Y')
+    return str(valor)
+
+def escrever_csv(linhas, colunas: list, destino):
+    """CSV no padrão do Excel em português: ';' como separador, vírgula decimal, datas dd/mm/aaaa e UTF-8 com BOM."""
+    texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+    escritor = csv.writer(texto, delimiter=';')
+    escritor.writerow([titulo for titulo, _, _ in colunas])
+    for linha in linhas:
+        escritor.writerow([_celula_csv(linha.get(campo), tipo) for _, campo, tipo in colunas])
+    texto.flush()
+    texto.detach()
+
+def escrever_xlsx(linhas, colunas: list, destino, titulo: str):
+    """XLSX em modo write_only do openpyxl: cada linha vai para o arquivo ao ser escrita, com valores e datas como números formatados."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet(titulo[:31])
+    planilha.freeze_panes = 'A2'
+    cabecalho = []
+    for nome, _, _ in colunas:
+        celula = WriteOnlyCell(planilha, value=nome)
+        celula.font = Font(bold=True)
+        cabecalho.append(celula)
+    planilha.append(cabecalho)
+    formatos = {'moeda': FORMATO_MOEDA_XLSX, 'data': FORMATO_DATA_XLSX}
+    for linha in linhas:
+        celulas = []
+        for _, campo, tipo in colunas:
+            valor = linha.get(campo)
+            if tipo in formatos and valor is not None:
+                valor = WriteOnlyCell(planilha, value=float(valor) if tipo == 'moeda' else valor)
+                valor.number_format = formatos[tipo]
+            celulas.append(valor)
+        planilha.append(celulas)
+    livro.save(destino)
+
+@medir('exportacao')
+def exportar(supabase, relatorio: str, formato: str, inicio: date = None, fim: date = None, hoje: date = None) -> io.BytesIO:
+    """Gera a planilha de um dos RELATORIOS no formato pedido (chave de FORMATOS)."""
+    definicao = RELATORIOS[relatorio]
+    hoje = hoje or date.today()
+    linhas = definicao['linhas'](supabase, inicio, fim) if definicao['periodo'] else definicao['linhas'](supabase, hoje)
+    destino = io.BytesIO()
+    if FORMATOS[formato][0] == 'xlsx':
+        escrever_xlsx(linhas, definicao['colunas'], destino, relatorio)
+    else:
+        escrever_csv(linhas, definicao['colunas'], destino)
+    destino.seek(0)
+    return destino
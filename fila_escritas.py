@@ -0,0 +1,266 @@
+# fila_escritas.py
+# Fila local e durável (SQLite) das escritas dos formulários: a página confirma na hora e uma thread
+# grava no Supabase em lotes por tabela, com novas tentativas e chaves de idempotência geradas aqui.
+import functools
+import hashlib
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+from instrumentacao import registrar_evento
+from utils import criar_cliente
+
+# Coluna (uuid, única) que as tabelas precisam ter para os inserts serem idempotentes
+COLUNA_IDEMPOTENCIA = 'chave_idempotencia'
+INTERVALO_S = 1.0
+TAMANHO_LOTE = 200
+MAX_TENTATIVAS = 8
+ESPERA_MAXIMA_S = 300
+
+_trava = threading.Lock()
+_fila = {'configurada': False, 'atual': None}
+_log = logging.getLogger(__name__)
+
+def _para_json(valor):
+    # Valores numpy (ids vindos de DataFrames) e datas
+    return valor.item() if hasattr(valor, 'item') else str(valor)
+
+class FilaEscritas:
+    """
+    Escritas pendentes num arquivo SQLite; sobrevivem a reinícios do processo e saem dele ao serem confirmadas.
+    Cada escrita guarda o access token da sessão que a fez e é enviada por um cliente com esse token
+    ('criar_cliente(token)'), para o RLS e as colunas de auditoria verem o usuário certo. O token só
+    fica guardado enquanto a escrita está pendente; a que falhou de vez o recebe de novo ao ser repetida.
+    """
+    def __init__(self, caminho: str, criar_cliente):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._criar_cliente = criar_cliente
+        self._thread = None
+        with self._conexao() as conexao:
+            conexao.execute("""
+                CREATE TABLE IF NOT EXISTS escritas (
+                    chave TEXT PRIMARY KEY, impressao TEXT NOT NULL, tabela TEXT NOT NULL, operacao TEXT NOT NULL,
+                    dados TEXT NOT NULL, id_linha INTEGER, descricao TEXT, criado_em REAL NOT NULL,
+                    tentativas INTEGER NOT NULL DEFAULT 0, proxima_tentativa REAL NOT NULL,
+                    erro TEXT, status TEXT NOT NULL DEFAULT 'pendente', sessao TEXT, token TEXT)""")
+            # Arquivos criados antes das colunas de sessão e token
+            colunas = {linha['name'] for linha in conexao.execute("PRAGMA table_info(escritas)")}
+            for coluna in ('sessao', 'token'):
+                if coluna not in colunas:
+                    conexao.execute(f"ALTER TABLE escritas ADD COLUMN {coluna} TEXT")
+            conexao.execute("CREATE INDEX IF NOT EXISTS escritas_status ON escritas (status, proxima_tentativa)")
+
+    def _conexao(self) -> sqlite3.Connection:
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=30)
+            conexao.row_factory = sqlite3.Row
+            conexao.execute("PRAGMA journal_mode=WAL")
+            self._local.conexao = conexao
+        return conexao
+
+    # --- Enfileiramento ---
+    def enfileirar(self, tabela: str, dados: dict, id_linha=None, descricao: str = "", sessao: str = None,
+                   token: str = None) -> str:
+        """
+        Guarda a escrita (insert, ou update da linha 'id_linha') e devolve sua chave. Um envio
+        idêntico da mesma sessão ainda pendente (duplo clique) devolve a chave do primeiro.
+        O 'token' mais recente da sessão passa a valer também para as escritas dela ainda pendentes.
+        """
+        operacao = 'insert' if id_linha is None else 'update'
+        dados_json = json.dumps(dados, sort_keys=True, default=_para_json)
+        id_linha = int(id_linha) if id_linha is not None else None
+        impressao = hashlib.sha256(json.dumps([sessao, tabela, operacao, id_linha, dados_json]).encode()).hexdigest()
+        with self._conexao() as conexao:
+            if sessao is not None:
+                conexao.execute("UPDATE escritas SET token = ? WHERE sessao = ? AND status = 'pendente'", (token, sessao))
+            existente = conexao.execute(
+                "SELECT chave FROM escritas WHERE impressao = ?", (impressao,)).fetchone()
+            if existente:
+                return existente['chave']
+            chave = str(uuid.uuid4())
+            agora = time.time()
+            conexao.execute(
+                "INSERT INTO escritas (chave, impressao, tabela, operacao, dados, id_linha, descricao, criado_em, proxima_tentativa, sessao, token) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (chave, impressao, tabela, operacao, dados_json, id_linha, descricao, agora, agora, sessao, token))
+        return chave
+
+    def pendentes(self, sessao: str, tabelas=None) -> list:
+        """Escritas da sessão ainda não confirmadas (pendentes ou que falharam), das mais antigas às mais novas."""
+        linhas = self._conexao().execute("SELECT * FROM escritas WHERE sessao IS ? ORDER BY criado_em", (sessao,)).fetchall()
+        return [dict(l) for l in linhas if not tabelas or l['tabela'] in tabelas]
+
+    def tentar_de_novo(self, chave: str, sessao: str, token: str = None):
+        """Volta a escrita da sessão para a fila, com o token atual dela."""
+        with self._conexao() as conexao:
+            conexao.execute("UPDATE escritas SET status = 'pendente', tentativas = 0, proxima_tentativa = ?, token = ? "
+                            "WHERE chave = ? AND sessao IS ?", (time.time(), token, chave, sessao))
+
+    def descartar(self, chave: str, sessao: str):
+        with self._conexao() as conexao:
+            conexao.execute("DELETE FROM escritas WHERE chave = ? AND sessao IS ?", (chave, sessao))
+
+    # --- Envio ---
+    def processar(self) -> int:
+        """Uma passada: envia as escritas vencidas em lotes por tabela e token e devolve quantas foram confirmadas."""
+        itens = self._conexao().execute(
+            "SELECT * FROM escritas WHERE status = 'pendente' AND proxima_tentativa <= ? ORDER BY criado_em LIMIT ?",
+            (time.time(), TAMANHO_LOTE)).fetchall()
+        lotes = {}
+        for item in itens:
+            dados = json.loads(item['dados'])
+            # Inserts com as mesmas colunas vão juntos num único upsert; updates vão um a um
+            grupo = (item['tabela'], tuple(sorted(dados)), item['token']) if item['operacao'] == 'insert' else (item['chave'],)
+            lotes.setdefault(grupo, []).append(item)
+        confirmadas = 0
+        clientes = {}
+        for lote in lotes.values():
+            token = lote[0]['token']
+            if token not in clientes:
+                clientes[token] = self._criar_cliente(token)
+            cliente = clientes[token]
+            try:
+                self._enviar(cliente, lote)
+            except Exception as e:
+                if len(lote) == 1:
+                    self._falhou(lote[0], e)
+                    continue
+                # Reenvia um a um para isolar a linha com problema
+                for item in lote:
+                    try:
+                        self._enviar(cliente, [item])
+                    except Exception as erro_item:
+                        self._falhou(item, erro_item)
+                    else:
+                        confirmadas += 1
+            else:
+                confirmadas += len(lote)
+        return confirmadas
+
+    def _enviar(self, cliente, lote: list):
+        inicio = time.perf_counter()
+        primeiro = lote[0]
+        if primeiro['operacao'] == 'insert':
+            linhas = [{**json.loads(item['dados']), COLUNA_IDEMPOTENCIA: item['chave']} for item in lote]
+            cliente.table(primeiro['tabela']).upsert(linhas, on_conflict=COLUNA_IDEMPOTENCIA, ignore_duplicates=True).execute()
+        else:
+            cliente.table(primeiro['tabela']).update(json.loads(primeiro['dados'])).eq('id', primeiro['id_linha']).execute()
+        with self._conexao() as conexao:
+            conexao.executemany("DELETE FROM escritas WHERE chave = ?", [(item['chave'],) for item in lote])
+        registrar_evento('fila', primeiro['tabela'], time.perf_counter() - inicio, linhas=len(lote), resultado='confirmada')
+
+    def _falhou(self, item, erro: Exception):
+        tentativas = item['tentativas'] + 1
+        espera = min(2 ** tentativas, ESPERA_MAXIMA_S) * random.uniform(0.5, 1.5)
+        status = 'falhou' if tentativas >= MAX_TENTATIVAS else 'pendente'
+        # Fora da fila o token não é mais necessário e não fica guardado no disco
+        token = item['token'] if status == 'pendente' else None
+        with self._conexao() as conexao:
+            conexao.execute("UPDATE escritas SET tentativas = ?, proxima_tentativa = ?, erro = ?, status = ?, token = ? WHERE chave = ?",
+                            (tentativas, time.time() + espera, str(erro)[:500], status, token, item['chave']))
+        registrar_evento('fila', item['tabela'], 0.0, sucesso=False, resultado=status)
+
+    def iniciar(self):
+        """Liga a thread de envio, uma vez por processo."""
+        with _trava:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name="fila-escritas", daemon=True)
+                self._thread.start()
+
+    def _executar(self):
+        while True:
+            time.sleep(INTERVALO_S)
+            try:
+                self.processar()
+            except Exception as e:
+                _log.warning("Falha ao processar a fila de escritas: %s", e)
+
+# --- Configuração ---
+def configurar(fila: FilaEscritas = None):
+    """Define (ou remove, com None) a fila do processo."""
+    with _trava:
+        _fila['atual'] = fila
+        _fila['configurada'] = True
+
+def fila_atual():
+    """Fila do processo; na primeira chamada é criada a partir do secret 'fila_sqlite', se existir."""
+    if not _fila['configurada']:
+        try:
+            caminho = st.secrets.get("fila_sqlite")
+        except Exception:
+            caminho = None
+        # Os secrets são lidos aqui, na execução da página: a thread de envio só recebe a fábrica de clientes
+        fabrica = functools.partial(criar_cliente, st.secrets["supabase_url"], st.secrets["supabase_key"]) if caminho else None
+        with _trava:
+            if not _fila['configurada']:
+                _fila['atual'] = FilaEscritas(caminho, fabrica) if caminho else None
+                _fila['configurada'] = True
+    return _fila['atual']
+
+# --- Uso nas Páginas ---
+def _token(cliente=None):
+    """Access token da sessão do usuário (o do cliente, já renovado, ou o do login), ou None sem login."""
+    try:
+        sessao = cliente.auth.get_session() if cliente is not None else None
+    except Exception:
+        sessao = None
+    if sessao is not None and getattr(sessao, 'access_token', None):
+        return sessao.access_token
+    return (st.session_state.get('user_session') or {}).get('access_token')
+
+def gravar(cliente, tabela: str, dados: dict, id_linha=None, descricao: str = "") -> bool:
+    """
+    Insert (ou update da linha 'id_linha') pela fila, se ela estiver ligada; senão, grava na hora.
+    Devolve True quando a escrita ficou na fila.
+    """
+    fila = fila_atual()
+    if fila is None:
+        consulta = cliente.table(tabela)
+        (consulta.insert(dados) if id_linha is None else consulta.update(dados).eq('id', id_linha)).execute()
+        return False
+    fila.iniciar()
+    fila.enfileirar(tabela, dados, id_linha, descricao, st.session_state.get('_instr_sessao'), _token(cliente))
+    st.toast(f"⏳ {descricao or tabela}: será gravado em segundo plano.")
+    return True
+
+def mostrar_pendentes(*tabelas: str):
+    """
+    Lista as escritas da sessão atual nas tabelas ainda não confirmadas. Enquanto houver alguma, o painel
+    se atualiza sozinho e recarrega a página a cada confirmação, para as listas mostrarem a linha gravada.
+    """
+    fila = fila_atual()
+    sessao = st.session_state.get('_instr_sessao')
+    if fila is None or not fila.pendentes(sessao, tabelas):
+        return
+    _painel_pendentes(tabelas, sessao)
+
+@st.fragment(run_every=2)
+def _painel_pendentes(tabelas: tuple, sessao: str):
+    fila = fila_atual()
+    itens = fila.pendentes(sessao, tabelas)
+    chave_contagem = f"_fila_{'_'.join(tabelas)}"
+    if not itens or len(itens) < st.session_state.get(chave_contagem, len(itens)):
+        st.session_state.pop(chave_contagem, None)
+        st.rerun()
+    st.session_state[chave_contagem] = len(itens)
+    with st.container(border=True):
+        st.markdown(f"**⏳ {len(itens)} alteração(ões) aguardando confirmação do servidor**")
+        for item in itens:
+            if item['status'] == 'falhou':
+                cols = st.columns([4, 1, 1])
+                cols[0].caption(f"⚠️ {item['descricao'] or item['tabela']} — falhou: {item['erro']}")
+                if cols[1].button("Tentar de novo", key=f"fila_repetir_{item['chave']}"):
+                    fila.tentar_de_novo(item['chave'], sessao, _token()); st.rerun()
+                if cols[2].button("Descartar", key=f"fila_descartar_{item['chave']}"):
+                    fila.descartar(item['chave'], sessao); st.rerun()
+            else:
+                tentativas = f" (tentativa {item['tentativas'] + 1})" if item['tentativas'] else ""
+                st.caption(f"⏳ {item['descricao'] or item['tabela']}{tentativas}")
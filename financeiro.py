@@ -0,0 +1,242 @@
+# financeiro.py
+# Cálculos financeiros puros (sem Streamlit), compartilhados pelas páginas.
+import numpy as np
+import pandas as pd
+
+# --- Painel Financeiro de Obras ---
+COLUNAS_RESUMO_OBRAS = [
+    'obra_id', 'nome_obra', 'status', 'orcamento', 'gasto', 'comprometido',
+    'a_receber', 'recebido', 'margem', 'margem_prevista', 'perc_orcamento', 'gasto_mensal_medio'
+]
+
+def _meses_decorridos(data_inicio: pd.Series, referencia: pd.Timestamp) -> pd.Series:
+    """Número de meses (mínimo 1) entre o início da obra e a data de referência."""
+    inicio = pd.to_datetime(data_inicio, errors='coerce')
+    meses = (referencia.year - inicio.dt.year) * 12 + (referencia.month - inicio.dt.month) + 1
+    return meses.fillna(1).clip(lower=1)
+
+def resumir_obras(registros: list, referencia: pd.Timestamp = None):
+    """
+    Monta (df_resumo, df_gastos_mensais) a partir das linhas da RPC 'resumo_financeiro_obras': uma por obra,
+    com as somas de recebíveis e contas já feitas no banco. Aqui só saem margens, % do orçamento e ritmo de gasto.
+    """
+    if referencia is None:
+        referencia = pd.Timestamp.today().normalize()
+    if not registros:
+        return pd.DataFrame(columns=COLUNAS_RESUMO_OBRAS), pd.DataFrame(columns=['obra_id', 'mes', 'valor'])
+
+    df_resumo = pd.DataFrame(registros).rename(columns={'id': 'obra_id', 'valor_obra': 'orcamento'})
+    for coluna in ('orcamento', 'a_receber', 'recebido', 'comprometido', 'gasto'):
+        df_resumo[coluna] = pd.to_numeric(df_resumo[coluna], errors='coerce').fillna(0.0)
+    df_resumo['margem'] = df_resumo['recebido'] - df_resumo['gasto']
+    df_resumo['margem_prevista'] = df_resumo['a_receber'] - df_resumo['comprometido']
+    df_resumo['perc_orcamento'] = (df_resumo['gasto'] / df_resumo['orcamento'].where(df_resumo['orcamento'] > 0)).fillna(0.0)
+    df_resumo['gasto_mensal_medio'] = df_resumo['gasto'] / _meses_decorridos(df_resumo['data_inicio'], referencia)
+
+    df_gastos_mensais = pd.DataFrame([
+        {'obra_id': r['id'], 'mes': g['mes'], 'valor': g['valor']} for r in registros for g in (r.get('gastos_mensais') or [])
+    ], columns=['obra_id', 'mes', 'valor'])
+    df_gastos_mensais['mes'] = pd.to_datetime(df_gastos_mensais['mes'], errors='coerce')
+    df_gastos_mensais['valor'] = pd.to_numeric(df_gastos_mensais['valor'], errors='coerce').fillna(0.0)
+
+    return df_resumo.sort_values('nome_obra', ignore_index=True)[COLUNAS_RESUMO_OBRAS], df_gastos_mensais
+
+# --- Ledger Normalizado ---
+def _extrair_campo(coluna: pd.Series, campo: str) -> pd.Series:
+    """Extrai um campo de uma coluna de objetos embutidos (dicts do PostgREST)."""
+    return coluna.map(lambda x: x.get(campo) if isinstance(x, dict) else None)
+
+def _ledger_vazio(colunas: list) -> pd.DataFrame:
+    """Ledger sem linhas, mas com valor numérico e datas como datetime (o .dt dos cálculos funciona igual)."""
+    return pd.DataFrame(columns=colunas).astype({'valor': float, 'data_vencimento': 'datetime64[ns]', 'data_pagamento': 'datetime64[ns]'})
+
+def normalizar_ledger_receber(df_parcelas: pd.DataFrame) -> pd.DataFrame:
+    """Achata as parcelas: nome/id do cliente em colunas próprias, datas como datetime e valor numérico."""
+    if df_parcelas.empty:
+        return _ledger_vazio(['id', 'cliente_id', 'nome_cliente', 'valor', 'status', 'data_vencimento', 'data_pagamento'])
+    df = df_parcelas.copy()
+    if 'clientes' in df.columns:
+        df['nome_cliente'] = _extrair_campo(df['clientes'], 'nome').fillna('N/A')
+        if 'cliente_id' not in df.columns:
+            df['cliente_id'] = _extrair_campo(df['clientes'], 'id')
+    if 'debitos' in df.columns:
+        df['descricao_debito'] = _extrair_campo(df['debitos'], 'descricao')
+        df['obra_id'] = _extrair_campo(df['debitos'], 'obra_id')
+        df['nome_obra'] = _extrair_campo(_extrair_campo(df['debitos'], 'obras'), 'nome_obra').fillna('Sem obra')
+    df['valor'] = pd.to_numeric(df['valor_parcela'], errors='coerce').fillna(0.0)
+    df['data_vencimento'] = pd.to_datetime(df['data_vencimento'], errors='coerce')
+    df['data_pagamento'] = pd.to_datetime(df.get('data_pagamento'), errors='coerce')
+    return df
+
+def normalizar_ledger_pagar(df_contas: pd.DataFrame) -> pd.DataFrame:
+    """Achata as contas a pagar: nome do fornecedor em coluna própria, datas como datetime e valor numérico."""
+    if df_contas.empty:
+        return _ledger_vazio(['id', 'nome_fornecedor', 'valor', 'status', 'data_vencimento', 'data_pagamento'])
+    df = df_contas.copy()
+    if 'fornecedores' in df.columns:
+        df['nome_fornecedor'] = _extrair_campo(df['fornecedores'], 'nome_razao_social').fillna('N/A')
+    df['valor'] = pd.to_numeric(df['valor'], errors='coerce').fillna(0.0)
+    df['data_vencimento'] = pd.to_datetime(df['data_vencimento'], errors='coerce')
+    df['data_pagamento'] = pd.to_datetime(df.get('data_pagamento'), errors='coerce')
+    return df
+
+# --- Painel de Contas a Pagar ---
+SITUACOES_CONTAS = ['Pago', 'Atrasado', 'Pendente']
+
+def situacao_contas(df_contas: pd.DataFrame, referencia: pd.Timestamp = None) -> pd.Series:
+    """'Pago', 'Atrasado' (vencida e em aberto) ou 'Pendente', pelo vencimento e não pelo status gravado."""
+    if referencia is None:
+        referencia = pd.Timestamp.today().normalize()
+    vencimento = pd.to_datetime(df_contas['data_vencimento'], errors='coerce')
+    situacao = np.where(df_contas['status'] == 'Pago', 'Pago', np.where(vencimento < referencia, 'Atrasado', 'Pendente'))
+    return pd.Series(situacao, index=df_contas.index)
+
+def resumir_contas_a_pagar(df_contas: pd.DataFrame, referencia: pd.Timestamp = None):
+    """
+    Totais por situação ({'Total', 'Pago', 'Atrasado', 'Pendente'}, com valor e quantidade) e
+    tabela mês de vencimento x situação com os valores, para o gráfico do painel.
+    """
+    df = pd.DataFrame({
+        'valor': pd.to_numeric(df_contas['valor'], errors='coerce').fillna(0.0),
+        'situacao': situacao_contas(df_contas, referencia),
+        'mes': pd.to_datetime(df_contas['data_vencimento'], errors='coerce').dt.to_period('M').dt.to_timestamp(),
+    })
+    por_situacao = df.groupby('situacao')['valor'].agg(['sum', 'count']).reindex(SITUACOES_CONTAS, fill_value=0)
+    totais = {s: {'valor': float(por_situacao.at[s, 'sum']), 'quantidade': int(por_situacao.at[s, 'count'])} for s in SITUACOES_CONTAS}
+    totais['Total'] = {'valor': float(df['valor'].sum()), 'quantidade': len(df)}
+    por_mes = df.pivot_table(index='mes', columns='situacao', values='valor', aggfunc='sum', fill_value=0.0)
+    return totais, por_mes.reindex(columns=SITUACOES_CONTAS, fill_value=0.0)
+
+# --- Projeção de Fluxo de Caixa ---
+FREQUENCIAS_PROJECAO = {"Diária": "D", "Semanal": "W", "Mensal": "M"}
+
+def distribuicao_atraso(media_dias: float, desvio_dias: float, pontos: int = 9):
+    """Discretiza o atraso de pagamento numa distribuição normal truncada em zero: (atrasos_em_dias, pesos)."""
+    if desvio_dias <= 0:
+        return np.array([max(int(round(media_dias)), 0)]), np.array([1.0])
+    z = np.linspace(-2, 2, pontos)
+    pesos = np.exp(-z ** 2 / 2)
+    atrasos = np.clip(np.round(media_dias + desvio_dias * z), 0, None).astype(np.int64)
+    return atrasos, pesos / pesos.sum()
+
+def taxa_inadimplencia_historica(df_receber: pd.DataFrame, referencia: pd.Timestamp = None) -> pd.Series:
+    """Por cliente, fração do valor já vencido que continua em aberto."""
+    if referencia is None:
+        referencia = pd.Timestamp.today().normalize()
+    vencidas = df_receber[df_receber['data_vencimento'] < referencia]
+    if vencidas.empty:
+        return pd.Series(dtype=float)
+    em_aberto = vencidas['valor'].where(vencidas['status'] != 'Pago', 0.0)
+    totais = vencidas.groupby('cliente_id')['valor'].sum()
+    return (em_aberto.groupby(vencidas['cliente_id']).sum() / totais.where(totais > 0)).fillna(0.0)
+
+def _somar_por_dia(dias: np.ndarray, valores: np.ndarray, horizonte: int) -> np.ndarray:
+    """Soma valores por deslocamento em dias, descartando o que cai fora do horizonte."""
+    dentro = (dias >= 0) & (dias < horizonte)
+    return np.bincount(dias[dentro], weights=valores[dentro], minlength=horizonte)
+
+def projetar_fluxo_caixa(df_receber: pd.DataFrame, df_pagar: pd.DataFrame, meses: int = 24, frequencia: str = "M",
+                         taxa_inadimplencia=0.0, atraso_medio: float = 0.0, atraso_desvio: float = 0.0,
+                         saldo_inicial: float = 0.0, referencia: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Projeta entradas (parcelas em aberto) e saídas (contas a pagar em aberto) a partir dos vencimentos.
+    'taxa_inadimplencia' pode ser um número ou uma Series indexada por cliente_id; o atraso das
+    entradas segue uma distribuição normal truncada. Itens já vencidos são projetados a partir de hoje.
+    Devolve um DataFrame por período com entradas, saídas, líquido e saldo acumulado.
+    """
+    if referencia is None:
+        referencia = pd.Timestamp.today().normalize()
+    inicio = np.datetime64(referencia.date(), 'D')
+    horizonte = int((np.datetime64((referencia + pd.DateOffset(months=meses)).date(), 'D') - inicio).astype(np.int64))
+
+    receber = df_receber[df_receber['status'] != 'Pago']
+    dias_receber = (receber['data_vencimento'].values.astype('datetime64[D]') - inicio).astype(np.int64)
+    dias_receber = np.maximum(dias_receber, 0)
+    if isinstance(taxa_inadimplencia, pd.Series):
+        taxas = receber['cliente_id'].map(taxa_inadimplencia).fillna(0.0).to_numpy(dtype=float)
+    else:
+        taxas = np.full(len(receber), float(taxa_inadimplencia))
+    valores_receber = receber['valor'].to_numpy(dtype=float) * (1.0 - np.clip(taxas, 0.0, 1.0))
+
+    atrasos, pesos = distribuicao_atraso(atraso_medio, atraso_desvio)
+    entradas = _somar_por_dia(
+        (dias_receber[:, None] + atrasos[None, :]).ravel(),
+        (valores_receber[:, None] * pesos[None, :]).ravel(),
+        horizonte
+    )
+
+    pagar = df_pagar[df_pagar['status'] != 'Pago']
+    dias_pagar = np.maximum((pagar['data_vencimento'].values.astype('datetime64[D]') - inicio).astype(np.int64), 0)
+    saidas = _somar_por_dia(dias_pagar, pagar['valor'].to_numpy(dtype=float), horizonte)
+
+    datas = pd.date_range(referencia, periods=horizonte, freq='D')
+    df_diario = pd.DataFrame({'entradas': entradas, 'saidas': saidas}, index=datas)
+    df_projecao = df_diario.groupby(df_diario.index.to_period(frequencia)).sum()
+    df_projecao.index = df_projecao.index.to_timestamp()
+    df_projecao['liquido'] = df_projecao['entradas'] - df_projecao['saidas']
+    df_projecao['saldo_acumulado'] = saldo_inicial + df_projecao['liquido'].cumsum()
+    return df_projecao
+
+# --- Aging de Recebíveis ---
+FAIXAS_AGING = ["A vencer", "0–30 dias", "31–60 dias", "61–90 dias", "90+ dias"]
+_LIMITES_AGING = [-np.inf, 0, 30, 60, 90, np.inf]
+
+def calcular_aging(df_receber: pd.DataFrame, referencia: pd.Timestamp = None) -> pd.DataFrame:
+    """Parcelas em aberto com os dias de atraso e a faixa de aging ('A vencer' para as que ainda não venceram)."""
+    if referencia is None:
+        referencia = pd.Timestamp.today().normalize()
+    df = df_receber[(df_receber['status'] != 'Pago') & df_receber['data_vencimento'].notna()].copy()
+    df['dias_atraso'] = (referencia - df['data_vencimento']).dt.days
+    df['faixa'] = pd.cut(df['dias_atraso'], bins=_LIMITES_AGING, labels=FAIXAS_AGING, right=True)
+    return df
+
+def resumir_aging(df_aging: pd.DataFrame, agrupar_por: str) -> pd.DataFrame:
+    """Tabela cruzada grupo x faixa de aging com o valor em aberto, ordenada pelo total."""
+    resumo = df_aging.pivot_table(index=agrupar_por, columns='faixa', values='valor', aggfunc='sum', fill_value=0.0, observed=False)
+    resumo = resumo.reindex(columns=FAIXAS_AGING, fill_value=0.0)
+    resumo['Total'] = resumo.sum(axis=1)
+    return resumo.sort_values('Total', ascending=False)
+
+# --- Extrato por Cliente ---
+def montar_indice_extratos(df_receber: pd.DataFrame):
+    """
+    Índice cliente -> parcelas (já ordenadas por vencimento), montado uma vez por versão do ledger.
+    Devolve (df_clientes, indice), onde df_clientes tem 'id' e 'nome' dos clientes com parcelas.
+    """
+    if df_receber.empty:
+        return pd.DataFrame(columns=['id', 'nome']), {}
+    df = df_receber.dropna(subset=['cliente_id']).sort_values('data_vencimento', kind='stable')
+    indice = {cliente_id: grupo for cliente_id, grupo in df.groupby('cliente_id', sort=False)}
+    df_clientes = (df[['cliente_id', 'nome_cliente']].drop_duplicates('cliente_id')
+                   .rename(columns={'cliente_id': 'id', 'nome_cliente': 'nome'})
+                   .sort_values('nome').reset_index(drop=True))
+    return df_clientes, indice
+
+# --- Extrato de Comissões ---
+PERIODOS_EXTRATO = {"Mensal": "M", "Trimestral": "Q", "Anual": "Y"}
+
+def extrato_comissoes(df_comissoes: pd.DataFrame, frequencia: str = "M") -> pd.DataFrame:
+    """
+    Comissões pendentes, pagas e o total por corretor e período, num único groupby. Pagas contam no
+    período do pagamento; pendentes, no do lançamento.
+    """
+    colunas = ['corretor_id', 'nome_corretor', 'periodo', 'pendente', 'pago', 'total', 'quantidade']
+    if df_comissoes.empty:
+        return pd.DataFrame(columns=colunas)
+    paga = (df_comissoes['status'] == 'Paga').to_numpy()
+    valor = pd.to_numeric(df_comissoes['valor_comissao'], errors='coerce').fillna(0.0).to_numpy()
+    # data_pagamento é uma data; criado_em vem do PostgREST com fuso ('+00:00'): cada uma é lida à parte
+    pagamento = pd.to_datetime(df_comissoes['data_pagamento'], errors='coerce')
+    lancamento = pd.to_datetime(df_comissoes['criado_em'], errors='coerce', utc=True, format='mixed').dt.tz_convert(None)
+    data = pagamento.where(paga, lancamento)
+    df = pd.DataFrame({
+        'corretor_id': df_comissoes['corretor_id'],
+        'nome_corretor': df_comissoes['nome_corretor'] if 'nome_corretor' in df_comissoes else _extrair_campo(df_comissoes['corretores'], 'nome').fillna('N/A'),
+        'periodo': data.dt.to_period(frequencia).dt.start_time,
+        'pendente': np.where(paga, 0.0, valor),
+        'pago': np.where(paga, valor, 0.0),
+    })
+    extrato = (df.groupby(['corretor_id', 'nome_corretor', 'periodo'], as_index=False, sort=True)
+                 .agg(pendente=('pendente', 'sum'), pago=('pago', 'sum'), quantidade=('pago', 'size')))
+    extrato['total'] = extrato['pendente'] + extrato['pago']
+    return extrato[colunas]
@@ -0,0 +1,304 @@
+# instrumentacao.py
+# Medição leve das chamadas ao Supabase, do cache e do tempo de cada execução das páginas.
+import functools
+import json
+import threading
+import time
+from collections import deque
+from io import BytesIO
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import resiliencia
+
+MAX_EVENTOS = 5000
+
+_trava = threading.Lock()
+_eventos = deque(maxlen=MAX_EVENTOS)
+_agregados = {}
+_local = threading.local()
+
+# --- Registro de Eventos ---
+def _contexto_execucao():
+    """Sessão, página e número da execução atual (ou None fora de uma execução do Streamlit)."""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None, None, None
+    try:
+        return (
+            st.session_state.get('_instr_sessao'),
+            st.session_state.get('_instr_pagina'),
+            st.session_state.get('_instr_execucao'),
+        )
+    except Exception:
+        return None, None, None
+
+def registrar_evento(tipo: str, nome: str, duracao_s: float, linhas: int = None, bytes_: int = None,
+                     sucesso: bool = True, resultado: str = None, contexto: tuple = None):
+    """
+    Guarda um evento (consulta, rpc, storage, pdf, cache ou execucao) e atualiza os agregados do processo.
+    'contexto' (sessão, página, execução) dispensa a leitura do session_state.
+    """
+    sessao, pagina, execucao = contexto or _contexto_execucao()
+    evento = {
+        'ts': time.time(), 'sessao': sessao, 'pagina': pagina, 'execucao': execucao,
+        'tipo': tipo, 'nome': nome, 'duracao_ms': round(duracao_s * 1000, 3),
+        'linhas': linhas, 'bytes': bytes_, 'sucesso': sucesso, 'resultado': resultado,
+    }
+    chave = (tipo, nome, resultado or ('ok' if sucesso else 'erro'))
+    with _trava:
+        _eventos.append(evento)
+        agregado = _agregados.setdefault(chave, {'chamadas': 0, 'segundos': 0.0, 'linhas': 0, 'bytes': 0})
+        agregado['chamadas'] += 1
+        agregado['segundos'] += duracao_s
+        agregado['linhas'] += linhas or 0
+        agregado['bytes'] += bytes_ or 0
+
+def eventos(sessao=None, execucao=None) -> list:
+    """Cópia dos eventos registrados, opcionalmente filtrados por sessão e execução."""
+    with _trava:
+        copia = list(_eventos)
+    return [e for e in copia if (sessao is None or e['sessao'] == sessao) and (execucao is None or e['execucao'] == execucao)]
+
+def agregados() -> dict:
+    """Cópia dos agregados do processo: {(tipo, nome, resultado): {'chamadas', 'segundos', 'linhas', 'bytes'}}."""
+    with _trava:
+        return {chave: dict(valor) for chave, valor in _agregados.items()}
+
+def _estimar_bytes(dados) -> int:
+    """Tamanho aproximado do payload JSON; listas grandes são estimadas a partir de uma amostra."""
+    if dados is None:
+        return 0
+    if isinstance(dados, list) and len(dados) > 200:
+        amostra = len(json.dumps(dados[:200], default=str))
+        return int(amostra * len(dados) / 200)
+    return len(json.dumps(dados, default=str))
+
+def _medir_chamada(tipo, nome, funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    try:
+        resultado = funcao(*args, **kwargs)
+    except Exception:
+        registrar_evento(tipo, nome, time.perf_counter() - inicio, sucesso=False)
+        raise
+    duracao = time.perf_counter() - inicio
+    dados = getattr(resultado, 'data', resultado)
+    linhas = len(dados) if isinstance(dados, list) else None
+    if tipo == 'storage':
+        arquivo = kwargs.get('file')
+        bytes_ = len(arquivo) if isinstance(arquivo, (bytes, bytearray)) else None
+    else:
+        bytes_ = _estimar_bytes(dados)
+    registrar_evento(tipo, nome, duracao, linhas=linhas, bytes_=bytes_)
+    return resultado
+
+# --- Cliente Supabase Instrumentado ---
+OPERACOES_CONSULTA = ('select', 'insert', 'update', 'upsert', 'delete')
+
+class _ConsultaInstrumentada:
+    """
+    Envolve um request builder do PostgREST e mede o 'execute()' final. Escritas e RPCs
+    bem-sucedidas são repassadas a 'ao_escrever(tabela_ou_rpc, operacao, linhas)'.
+    """
+    def __init__(self, builder, tipo: str, nome: str, ao_escrever=None):
+        self._builder = builder
+        self._tipo = tipo
+        self._nome = nome
+        self._ao_escrever = ao_escrever
+
+    def execute(self):
+        resultado = _medir_chamada(self._tipo, self._nome, resiliencia.chamar, self._tipo, self._nome, self._builder.execute)
+        if self._ao_escrever is not None:
+            alvo, _, operacao = self._nome.partition('.')
+            if self._tipo == 'rpc' or operacao not in ('', 'select'):
+                self._ao_escrever(alvo, operacao.upper() or 'RPC', getattr(resultado, 'data', None))
+        return resultado
+
+    def __getattr__(self, atributo):
+        valor = getattr(self._builder, atributo)
+        if not callable(valor):
+            return valor
+        @functools.wraps(valor)
+        def encadear(*args, **kwargs):
+            resultado = valor(*args, **kwargs)
+            if not hasattr(resultado, 'execute'):
+                return resultado
+            nome = f"{self._nome}.{atributo}" if atributo in OPERACOES_CONSULTA else self._nome
+            return _ConsultaInstrumentada(resultado, self._tipo, nome, self._ao_escrever)
+        return encadear
+
+class _BucketInstrumentado:
+    """Envolve um bucket do Storage e mede cada operação (upload, list, remove...), com o tempo limite do Storage."""
+    def __init__(self, bucket, nome: str):
+        self._bucket = bucket
+        self._nome = nome
+
+    def __getattr__(self, atributo):
+        valor = getattr(self._bucket, atributo)
+        if not callable(valor):
+            return valor
+        nome = f"{self._nome}.{atributo}"
+        return functools.partial(_medir_chamada, 'storage', nome, resiliencia.chamar, 'storage', nome, valor)
+
+class _StorageInstrumentado:
+    def __init__(self, storage):
+        self._storage = storage
+
+    def from_(self, bucket: str):
+        return _BucketInstrumentado(self._storage.from_(bucket), bucket)
+
+    def __getattr__(self, atributo):
+        return getattr(self._storage, atributo)
+
+class ClienteInstrumentado:
+    """Proxy do cliente Supabase: tabelas, RPCs e Storage passam pela medição; o resto (auth...) é repassado."""
+    def __init__(self, cliente, ao_escrever=None):
+        self._cliente = cliente
+        self._ao_escrever = ao_escrever
+        self.storage = _StorageInstrumentado(cliente.storage)
+
+    def table(self, tabela: str):
+        return _ConsultaInstrumentada(self._cliente.table(tabela), 'consulta', tabela, self._ao_escrever)
+
+    from_ = table
+
+    def rpc(self, funcao: str, params: dict = None, *args, **kwargs):
+        return _ConsultaInstrumentada(self._cliente.rpc(funcao, params or {}, *args, **kwargs), 'rpc', funcao, self._ao_escrever)
+
+    def __getattr__(self, atributo):
+        return getattr(self._cliente, atributo)
+
+# --- Decoradores ---
+def medir(tipo: str, nome: str = None):
+    """Decorador que mede a duração de uma função (ex.: geração de PDF) e o tamanho do buffer devolvido."""
+    def decorador(func):
+        @functools.wraps(func)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            resultado = func(*args, **kwargs)
+            bytes_ = resultado.getbuffer().nbytes if isinstance(resultado, BytesIO) else None
+            registrar_evento(tipo, nome or func.__name__, time.perf_counter() - inicio, bytes_=bytes_)
+            return resultado
+        return medida
+    return decorador
+
+def cache_medido(**opcoes_cache):
+    """
+    Igual a st.cache_data(**opcoes_cache), registrando acerto ou falta de cache a cada chamada.
+    A falta é detectada quando o corpo da função chega a executar.
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def executar(*args, **kwargs):
+            _local.pilha_cache[-1]['falta'] = True
+            return func(*args, **kwargs)
+
+        em_cache = st.cache_data(**opcoes_cache)(executar)
+
+        @functools.wraps(func)
+        def chamar(*args, **kwargs):
+            pilha = _local.__dict__.setdefault('pilha_cache', [])
+            quadro = {'falta': False}
+            pilha.append(quadro)
+            inicio = time.perf_counter()
+            try:
+                return em_cache(*args, **kwargs)
+            finally:
+                pilha.pop()
+                registrar_evento('cache', func.__qualname__, time.perf_counter() - inicio,
+                                 resultado='miss' if quadro['falta'] else 'hit')
+        chamar.clear = em_cache.clear
+        return chamar
+    return decorador
+
+# --- Execução das Páginas ---
+def iniciar_execucao(pagina: str):
+    """Marca o início de uma execução (rerun) da página."""
+    st.session_state.setdefault('_instr_sessao', f"{time.time_ns():x}")
+    st.session_state['_instr_pagina'] = pagina
+    st.session_state['_instr_execucao'] = st.session_state.get('_instr_execucao', 0) + 1
+    # Guardado na thread da execução: depois de um st.stop()/st.rerun(), ler o session_state levanta de novo
+    _local.execucao = (_contexto_execucao(), time.perf_counter())
+
+def finalizar_execucao():
+    """Registra o tempo total da execução atual da página (uma vez por execução, mesmo interrompida)."""
+    execucao = _local.__dict__.pop('execucao', None)
+    if execucao is not None:
+        contexto, inicio = execucao
+        registrar_evento('execucao', contexto[1] or '?', time.perf_counter() - inicio, contexto=contexto)
+
+# --- Exportação ---
+def exportar_jsonl() -> str:
+    """Eventos brutos em JSON Lines."""
+    return "\n".join(json.dumps(e, ensure_ascii=False) for e in eventos())
+
+def _escapar_rotulo(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _rotulos(**rotulos) -> str:
+    return ",".join(f'{chave}="{_escapar_rotulo(valor)}"' for chave, valor in rotulos.items())
+
+def exportar_prometheus() -> str:
+    """Agregados do processo no formato texto de exposição do Prometheus."""
+    totais = agregados()
+    linhas = [
+        "# HELP gestao_chamadas_total Chamadas medidas por tipo, nome e resultado.",
+        "# TYPE gestao_chamadas_total counter",
+    ]
+    linhas += [f"gestao_chamadas_total{{{_rotulos(tipo=t, nome=n, resultado=r)}}} {a['chamadas']}" for (t, n, r), a in totais.items()]
+    linhas += [
+        "# HELP gestao_chamada_duracao_segundos_total Tempo acumulado das chamadas.",
+        "# TYPE gestao_chamada_duracao_segundos_total counter",
+    ]
+    linhas += [f"gestao_chamada_duracao_segundos_total{{{_rotulos(tipo=t, nome=n, resultado=r)}}} {a['segundos']:.6f}" for (t, n, r), a in totais.items()]
+    linhas += [
+        "# HELP gestao_chamada_linhas_total Linhas devolvidas pelas chamadas.",
+        "# TYPE gestao_chamada_linhas_total counter",
+    ]
+    linhas += [f"gestao_chamada_linhas_total{{{_rotulos(tipo=t, nome=n, resultado=r)}}} {a['linhas']}" for (t, n, r), a in totais.items() if a['linhas']]
+    linhas += [
+        "# HELP gestao_chamada_bytes_total Bytes (aproximados) transferidos pelas chamadas.",
+        "# TYPE gestao_chamada_bytes_total counter",
+    ]
+    linhas += [f"gestao_chamada_bytes_total{{{_rotulos(tipo=t, nome=n, resultado=r)}}} {a['bytes']}" for (t, n, r), a in totais.items() if a['bytes']]
+    return "\n".join(linhas) + "\n"
+
+# --- Painel (somente administradores) ---
+def usuario_e_admin() -> bool:
+    """Administradores são os emails listados em 'admin_emails' nos Secrets."""
+    try:
+        admins = st.secrets.get("admin_emails", [])
+    except Exception:
+        return False
+    return st.session_state.get('user_email') in admins
+
+def painel_de_desempenho():
+    """
+    Fecha a medição da execução atual e, para administradores, mostra o painel na barra lateral.
+    As páginas chamam no 'finally' do corpo, então execuções encerradas por st.stop()/st.rerun() também são medidas.
+    """
+    finalizar_execucao()
+    if not usuario_e_admin():
+        return
+
+    import pandas as pd
+    sessao, _, execucao = _contexto_execucao()
+    eventos_execucao = eventos(sessao=sessao, execucao=execucao)
+    with st.sidebar.expander("⏱️ Desempenho"):
+        tempo_execucao = next((e['duracao_ms'] for e in reversed(eventos_execucao) if e['tipo'] == 'execucao'), None)
+        remotas = [e for e in eventos_execucao if e['tipo'] in ('consulta', 'rpc', 'storage')]
+        caches = [e for e in eventos_execucao if e['tipo'] == 'cache']
+        c1, c2 = st.columns(2)
+        c1.metric("Execução", f"{tempo_execucao:.0f} ms" if tempo_execucao is not None else "—")
+        c2.metric("Chamadas", len(remotas))
+        c1.metric("Cache (acertos)", sum(e['resultado'] == 'hit' for e in caches))
+        c2.metric("Cache (faltas)", sum(e['resultado'] == 'miss' for e in caches))
+
+        if eventos_execucao:
+            df = pd.DataFrame(eventos_execucao)[['tipo', 'nome', 'duracao_ms', 'linhas', 'bytes', 'resultado', 'sucesso']]
+            st.dataframe(df.sort_values('duracao_ms', ascending=False), hide_index=True, use_container_width=True)
+
+        st.download_button("Exportar JSON Lines", data=exportar_jsonl(), file_name="metricas.jsonl",
+                           mime="application/x-ndjson", use_container_width=True, key="_instr_jsonl")
+        st.download_button("Exportar Prometheus", data=exportar_prometheus(), file_name="metricas.prom",
+                           mime="text/plain", use_container_width=True, key="_instr_prom")
@@ -0,0 +1,80 @@
+# pagamentos.py
+# Registro de pagamento com comprovante (parcelas, contas a pagar e comissões): o arquivo sobe para o
+# Storage enquanto uma única RPC dá a baixa, e os arquivos que ficam sem uso são removidos em segundo plano.
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from utils import sanitizar_nome_arquivo
+
+BUCKET = 'comprovantes'
+# Por tabela: RPC que dá a baixa (status, data e URL do comprovante) e pasta dos comprovantes no bucket
+ALVOS = {
+    'parcelas': ('registrar_pagamento_parcela', 'comprovantes'),
+    'contas_a_pagar': ('registrar_pagamento_conta', 'comprovantes_contas'),
+    'comissoes': ('registrar_pagamento_comissao', 'comprovantes_comissao'),
+}
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='pagamentos')
+_log = logging.getLogger(__name__)
+
+class PagamentoSemComprovante(Exception):
+    """A baixa foi gravada, mas o comprovante não chegou ao Storage."""
+
+# --- Comprovantes no Storage ---
+def caminho_comprovante(tabela: str, id_linha, nome_arquivo: str) -> str:
+    """Caminho novo a cada envio ('<pasta>/<id>_<sufixo>_<nome>'): reenviar nunca esbarra num arquivo que já existe."""
+    return f"{ALVOS[tabela][1]}/{id_linha}_{uuid.uuid4().hex[:8]}_{sanitizar_nome_arquivo(nome_arquivo)}"
+
+def caminho_da_url(url) -> str:
+    """Caminho no bucket de uma URL pública de comprovante, ou None se a URL não for do bucket."""
+    marcador = f"/object/public/{BUCKET}/"
+    if not url or marcador not in url:
+        return None
+    return url.split(marcador, 1)[1].split('?', 1)[0] or None
+
+def _remover(supabase, caminhos: list):
+    try:
+        supabase.storage.from_(BUCKET).remove(caminhos)
+    except Exception as e:
+        _log.warning("Falha ao remover comprovantes sem uso %s: %s", caminhos, e)
+
+def remover_em_segundo_plano(supabase, *caminhos):
+    """Agenda a remoção dos arquivos (ignora os vazios) sem segurar a página."""
+    caminhos = [c for c in caminhos if c]
+    if caminhos:
+        _executor.submit(_remover, supabase, caminhos)
+
+# --- Baixa ---
+def registrar(supabase, tabela: str, id_linha, data_pagamento: date, comprovante=None):
+    """
+    Dá a baixa da linha de 'tabela' (uma das ALVOS) com o comprovante opcional (arquivo do st.file_uploader).
+    O upload e a RPC correm juntos, então a espera é a da mais lenta das duas. Se a RPC falhar, o arquivo
+    enviado é removido; se o upload falhar, a linha volta ao comprovante anterior e PagamentoSemComprovante
+    é levantada com a baixa já gravada. O comprovante substituído sai do Storage em segundo plano.
+    """
+    rpc, _ = ALVOS[tabela]
+    caminho = url = envio = None
+    if comprovante is not None:
+        caminho = caminho_comprovante(tabela, id_linha, comprovante.name)
+        bucket = supabase.storage.from_(BUCKET)
+        url = bucket.get_public_url(caminho)
+        envio = _executor.submit(bucket.upload, file=comprovante.getvalue(), path=caminho,
+                                 file_options={"content-type": comprovante.type})
+    try:
+        anterior = supabase.rpc(rpc, {'p_id': int(id_linha), 'p_data_pagamento': data_pagamento.isoformat(),
+                                      'p_comprovante_url': url}).execute().data
+    except Exception:
+        if envio is not None:
+            # Baixa não gravada: o arquivo, se chegar a subir, não é de ninguém
+            envio.add_done_callback(lambda f: f.exception() is None and remover_em_segundo_plano(supabase, caminho))
+        raise
+    if envio is not None:
+        try:
+            envio.result()
+        except Exception as e:
+            supabase.table(tabela).update({'comprovante_url': anterior}).eq('id', int(id_linha)).execute()
+            raise PagamentoSemComprovante(str(e)) from e
+    if url and anterior != url:
+        remover_em_segundo_plano(supabase, caminho_da_url(anterior))
@@ -2,58 +2,62 @@
 import streamlit as st
 import pandas as pd
 from datetime import date
-import re
-from utils import check_auth, get_supabase_client, formatar_moeda
-
-# --- Funções de Utilidade ---
-def sanitizar_nome_arquivo(nome_arquivo: str) -> str:
-    nome_limpo = re.sub(r'[^\w\.\-]', '_', nome_arquivo)
-    return nome_limpo
-
-# --- Autenticação e Conexão ---
-st.set_page_config(page_title="Contas a Pagar", layout="wide", page_icon="🧾")
-check_auth("a área de Contas a Pagar")
-supabase = get_supabase_client()
-
-# --- Lógica da Sidebar ---
-with st.sidebar:
-    st.header("Modo de Acesso")
-    if st.session_state.get('logged_in'):
-        st.success(f"Logado como: {st.session_state.user_email}")
-        if st.button("Logout", use_container_width=True):
-            supabase.auth.sign_out()
-            for key in st.session_state.keys():
-                del st.session_state[key]
-            st.rerun()
-    st.markdown("---"); st.info("Desenvolvido por @Rogerio Souza")
+from utils import formatar_moeda, grade_selecionavel
+from bootstrap import iniciar_pagina
+from fila_escritas import gravar, mostrar_pendentes
+import consultas
+import financeiro
+import recorrencias
+from instrumentacao import painel_de_desempenho
+from alteracoes import cache_por_tabelas
+from duplicidades import IndiceDuplicidades, CAMPOS_FORNECEDORES, confirmar_cadastro, mostrar_pares
+from pagamentos import registrar, PagamentoSemComprovante
+
+# --- Autenticação, Conexão e Sidebar ---
+supabase = iniciar_pagina("Contas a Pagar", "🧾", area="a área de Contas a Pagar")
+
+CONTAS_POR_PAGINA = 50
+SITUACOES_FILTRO = ["Todas", "Em aberto", "Atrasado", "Pendente", "Pago"]
 
 # --- Funções da Página ---
-@st.cache_data(ttl=60)
+@cache_por_tabelas('fornecedores')
 def carregar_fornecedores_ativos():
-    response = supabase.table('fornecedores').select('*').eq('ativo', True).order('nome_razao_social').execute()
-    return pd.DataFrame(response.data)
+    return consultas.carregar_fornecedores_ativos(supabase)
 
-@st.cache_data(ttl=60)
+@cache_por_tabelas('fornecedores')
 def carregar_fornecedores_arquivados():
-    response = supabase.table('fornecedores').select('*').eq('ativo', False).order('nome_razao_social').execute()
-    return pd.DataFrame(response.data)
+    return consultas.carregar_fornecedores_arquivados(supabase)
+
+@cache_por_tabelas('fornecedores')
+def indice_duplicidades():
+    return IndiceDuplicidades(consultas.carregar_identificacao_fornecedores(supabase), CAMPOS_FORNECEDORES)
+
+@cache_por_tabelas('fornecedores')
+def carregar_duplicados():
+    return indice_duplicidades().pares()
+
+@cache_por_tabelas('contas_a_pagar', chave='id')
+def carregar_detalhes_conta(conta_id):
+    return consultas.carregar_detalhes(supabase, 'contas_a_pagar', conta_id)
 
-@st.cache_data(ttl=60)
+@cache_por_tabelas('obras')
 def carregar_obras_ativas():
-    response = supabase.table('obras').select('id, nome_obra').eq('ativo', True).order('nome_obra').execute()
-    return pd.DataFrame(response.data)
+    return consultas.carregar_obras_ativas(supabase)
 
-@st.cache_data(ttl=30)
-def carregar_contas_a_pagar():
-    try:
-        supabase.rpc('atualizar_status_parcelas').execute() # Atualiza status de contas a pagar também, se a função for adaptada
-    except: pass # Ignora erro se a função não for para contas a pagar
-    response = supabase.table('contas_a_pagar').select('*, fornecedores(nome_razao_social), obras(nome_obra)').order('data_vencimento').execute()
-    return pd.DataFrame(response.data)
+# Filtros como tupla de pares (hashável e estável) para entrarem na chave do cache
+@cache_por_tabelas('contas_a_pagar', 'fornecedores', 'obras')
+def carregar_pagina_contas(filtros: tuple, pagina: int):
+    return consultas.carregar_pagina_contas_a_pagar(supabase, dict(filtros), pagina, CONTAS_POR_PAGINA)
+
+@cache_por_tabelas('contas_a_pagar')
+def resumir_contas(filtros: tuple):
+    return financeiro.resumir_contas_a_pagar(consultas.carregar_valores_contas_a_pagar(supabase, dict(filtros)),
+                                             pd.Timestamp(dict(filtros)['hoje']))
 
 def cadastrar_fornecedor(nome, cpf_cnpj, contato, tipo_servico):
     try:
-        supabase.table('fornecedores').insert({'nome_razao_social': nome, 'cpf_cnpj': cpf_cnpj, 'contato_principal': contato, 'tipo_servico': tipo_servico}).execute()
+        gravar(supabase, 'fornecedores', {'nome_razao_social': nome, 'cpf_cnpj': cpf_cnpj, 'contato_principal': contato, 'tipo_servico': tipo_servico},
+               descricao=f"Novo fornecedor: {nome}")
         return True
     except Exception as e: st.error(f"Erro ao cadastrar fornecedor: {e}"); return False
 
@@ -67,68 +71,306 @@ def reativar_fornecedor(fornecedor_id):
         supabase.rpc('reativar_fornecedor', {'p_fornecedor_id': fornecedor_id}).execute(); return True
     except Exception as e: st.error(f"Erro ao reativar fornecedor: {e}"); return False
 
+@cache_por_tabelas(recorrencias.TABELA_REGRAS, 'fornecedores', 'obras')
+def carregar_regras_recorrentes():
+    return pd.DataFrame(recorrencias.carregar_regras(supabase))
+
+def gerar_contas_recorrentes(regras=None):
+    """Gera as contas da janela móvel (idempotente); devolve quantas foram enviadas, ou None em caso de erro."""
+    try:
+        return recorrencias.materializar(supabase, regras=regras)
+    except Exception as e: st.error(f"Erro ao gerar contas recorrentes: {e}"); return None
+
+def cadastrar_regra_recorrente(fornecedor_id, obra_id, descricao, valor, frequencia, data_inicio, data_fim, reajuste_anual):
+    try:
+        supabase.table(recorrencias.TABELA_REGRAS).insert({
+            'fornecedor_id': fornecedor_id, 'obra_id': obra_id, 'descricao': descricao, 'valor': valor,
+            'frequencia': frequencia, 'data_inicio': data_inicio.strftime('%Y-%m-%d'),
+            'data_fim': data_fim.strftime('%Y-%m-%d') if data_fim else None, 'reajuste_anual': reajuste_anual
+        }).execute()
+        return True
+    except Exception as e: st.error(f"Erro ao cadastrar conta recorrente: {e}"); return False
+
+def encerrar_regra_recorrente(regra_id):
+    """Desativa a regra e apaga as contas futuras ainda não pagas que ela já tinha gerado."""
+    try:
+        supabase.table(recorrencias.TABELA_REGRAS).update({'ativo': False}).eq('id', regra_id).execute()
+        supabase.table('contas_a_pagar').delete().eq('recorrencia_id', regra_id).neq('status', 'Pago') \
+            .gt('data_vencimento', date.today().isoformat()).execute()
+        return True
+    except Exception as e: st.error(f"Erro ao encerrar conta recorrente: {e}"); return False
+
+def lancar_despesa(fornecedor_id, obra_id, descricao, valor, data_vencimento, obs):
+    try:
+        gravar(supabase, 'contas_a_pagar', {
+            'fornecedor_id': fornecedor_id, 'obra_id': obra_id, 'descricao': descricao, 'valor': valor,
+            'data_vencimento': data_vencimento.strftime('%Y-%m-%d'), 'status': 'Pendente', 'observacoes': obs
+        }, descricao=f"Nova despesa: {descricao}")
+        return True
+    except Exception as e: st.error(f"Erro ao lançar despesa: {e}"); return False
+
 def registrar_pagamento_conta(conta_id, data_pagamento, comprovante_file):
-    # (Esta função e outras lógicas permanecem as mesmas da versão anterior)
-    # ... (código omitido por brevidade, mas deve ser mantido como estava)
-    pass
+    try:
+        registrar(supabase, 'contas_a_pagar', conta_id, data_pagamento, comprovante_file)
+        return True
+    except PagamentoSemComprovante as e:
+        st.toast(f"⚠️ Pagamento registrado, mas o comprovante não foi enviado: {e}"); return True
+    except Exception as e: st.error(f"Erro ao registrar pagamento: {e}"); return False
 
 
 # --- Construção da Página ---
-st.image("https://placehold.co/1200x200/d9534f/FFFFFF?text=Contas+a+Pagar", use_container_width=True)
-st.title("🧾 Gestão de Contas a Pagar")
-st.markdown("Cadastre e controle todas as despesas e contas a pagar da construtora.")
-
-tab_painel, tab_lancar, tab_fornecedores = st.tabs(["Painel de Despesas", "Lançar Nova Despesa", "Gerenciar Fornecedores"])
-
-with tab_painel:
-    # (Código do Painel de Despesas permanece o mesmo)
-    pass
-
-with tab_lancar:
-    # (Código para Lançar Despesa permanece o mesmo)
-    pass
-
-# <<<<===== AQUI ESTÁ A IMPLEMENTAÇÃO COMPLETA =====>>>>
-with tab_fornecedores:
-    st.subheader("Gerenciar Cadastro de Fornecedores")
-    tab_forn_ativos, tab_forn_arquivados = st.tabs(["Fornecedores Ativos", "Fornecedores Arquivados"])
-
-    with tab_forn_ativos:
-        df_fornecedores_ativos = carregar_fornecedores_ativos()
-        st.markdown(f"**Total de fornecedores ativos:** {len(df_fornecedores_ativos)}")
-        for _, row in df_fornecedores_ativos.iterrows():
-            with st.expander(f"{row['nome_razao_social']}"):
-                st.write(f"**CPF/CNPJ:** {row.get('cpf_cnpj', 'N/A')}")
-                st.write(f"**Contato:** {row.get('contato_principal', 'N/A')}")
-                st.write(f"**Tipo de Serviço:** {row.get('tipo_servico', 'N/A')}")
-                if st.button("Arquivar Fornecedor", key=f"arquivar_forn_{row['id']}", type="secondary"):
-                    arquivar_fornecedor(row['id'])
-                    st.success(f"Fornecedor '{row['nome_razao_social']}' arquivado.")
-                    st.cache_data.clear(); st.rerun()
-    
-    with tab_forn_arquivados:
-        df_fornecedores_arquivados = carregar_fornecedores_arquivados()
-        st.markdown(f"**Total de fornecedores arquivados:** {len(df_fornecedores_arquivados)}")
-        for _, row in df_fornecedores_arquivados.iterrows():
-            with st.expander(f"{row['nome_razao_social']}"):
-                st.write(f"**CPF/CNPJ:** {row.get('cpf_cnpj', 'N/A')}")
-                if st.button("Reativar Fornecedor", key=f"reativar_forn_{row['id']}", type="primary"):
-                    reativar_fornecedor(row['id'])
-                    st.success(f"Fornecedor '{row['nome_razao_social']}' reativado.")
-                    st.cache_data.clear(); st.rerun()
-
-    st.markdown("---")
-    with st.form("novo_fornecedor_form", clear_on_submit=True):
-        st.subheader("Cadastrar Novo Fornecedor")
-        c1, c2 = st.columns(2)
-        nome_forn = c1.text_input("Nome / Razão Social*")
-        cpf_cnpj_forn = c2.text_input("CPF / CNPJ")
-        contato_forn = c1.text_input("Contato (Telefone/Email)")
-        tipo_servico_forn = c2.text_input("Tipo de Serviço/Material")
-        if st.form_submit_button("Salvar Novo Fornecedor", use_container_width=True, type="primary"):
-            if not nome_forn:
+try:
+    st.image("https://placehold.co/1200x200/d9534f/FFFFFF?text=Contas+a+Pagar", use_container_width=True)
+    st.title("🧾 Gestão de Contas a Pagar")
+    st.markdown("Cadastre e controle todas as despesas e contas a pagar da construtora.")
+    mostrar_pendentes('fornecedores', 'contas_a_pagar')
+
+    # Uma vez por dia em cada sessão, marca as parcelas e contas que venceram como atrasadas
+    if st.session_state.get('_status_atualizado_em') != date.today() and consultas.atualizar_status_vencidos(supabase):
+        st.session_state['_status_atualizado_em'] = date.today()
+
+    # Uma vez por dia em cada sessão, completa a janela das contas recorrentes (sem escrita se já estiver completa)
+    if st.session_state.get('_recorrentes_geradas_em') != date.today():
+        df_regras = carregar_regras_recorrentes()
+        if not df_regras.empty and gerar_contas_recorrentes(df_regras.to_dict('records')) is not None:
+            st.session_state['_recorrentes_geradas_em'] = date.today()
+
+    if "fornecedor" in st.query_params:
+        st.info("O fornecedor buscado está selecionado na aba **Gerenciar Fornecedores**.")
+    tab_painel, tab_lancar, tab_recorrentes, tab_fornecedores = st.tabs(
+        ["Painel de Despesas", "Lançar Nova Despesa", "🔁 Contas Recorrentes", "Gerenciar Fornecedores"])
+
+    df_obras = carregar_obras_ativas()
+    obras_dict = pd.Series(df_obras.id.values, index=df_obras.nome_obra).to_dict() if not df_obras.empty else {}
+    df_fornecedores = carregar_fornecedores_ativos()
+    fornecedores_dict = (pd.Series(df_fornecedores.id.values, index=df_fornecedores.nome_razao_social).to_dict()
+                         if not df_fornecedores.empty else {})
+
+    with tab_painel:
+        st.subheader("Painel de Despesas")
+        c1, c2, c3 = st.columns(3)
+        obra_filtro = c1.selectbox("Obra", ["Todas"] + list(obras_dict.keys()))
+        fornecedor_filtro = c2.selectbox("Fornecedor", ["Todos"] + list(fornecedores_dict.keys()))
+        situacao_filtro = c3.selectbox("Situação", SITUACOES_FILTRO, index=1)
+        c4, c5 = st.columns(2)
+        vencimento_de = c4.date_input("Vencimento a partir de", value=None, format="DD/MM/YYYY")
+        vencimento_ate = c5.date_input("Vencimento até", value=None, format="DD/MM/YYYY")
+
+        # Os filtros vão para a consulta: só a página visível e as colunas dos totais saem do banco
+        filtros = (
+            ('hoje', date.today().isoformat()),
+            ('obra_id', int(obras_dict[obra_filtro]) if obra_filtro in obras_dict else None),
+            ('fornecedor_id', int(fornecedores_dict[fornecedor_filtro]) if fornecedor_filtro in fornecedores_dict else None),
+            ('situacao', situacao_filtro if situacao_filtro != "Todas" else None),
+            ('vencimento_de', vencimento_de.isoformat() if vencimento_de else None),
+            ('vencimento_ate', vencimento_ate.isoformat() if vencimento_ate else None),
+        )
+        totais, por_mes = resumir_contas(filtros)
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Total filtrado", formatar_moeda(totais['Total']['valor']), f"{totais['Total']['quantidade']} conta(s)", delta_color="off")
+        m2.metric("Atrasado", formatar_moeda(totais['Atrasado']['valor']), f"{totais['Atrasado']['quantidade']} conta(s)", delta_color="off")
+        m3.metric("A vencer", formatar_moeda(totais['Pendente']['valor']), f"{totais['Pendente']['quantidade']} conta(s)", delta_color="off")
+        m4.metric("Pago", formatar_moeda(totais['Pago']['valor']), f"{totais['Pago']['quantidade']} conta(s)", delta_color="off")
+        if not por_mes.empty:
+            with st.expander("Valores por mês de vencimento"):
+                st.bar_chart(por_mes, color=["#5cb85c", "#d9534f", "#f0ad4e"])
+
+        total_contas = totais['Total']['quantidade']
+        n_paginas = max((total_contas - 1) // CONTAS_POR_PAGINA + 1, 1)
+        # Filtros novos voltam para a primeira página; menos contas (ex.: após pagamentos) não deixam a página fora do intervalo
+        if st.session_state.get('_contas_filtros') != filtros:
+            st.session_state['_contas_filtros'] = filtros
+            st.session_state['contas_pagina'] = 1
+        elif st.session_state.get('contas_pagina', 1) > n_paginas:
+            st.session_state['contas_pagina'] = n_paginas
+        if n_paginas > 1:
+            pagina = st.number_input(f"Página (de {n_paginas})", min_value=1, max_value=n_paginas, step=1, key="contas_pagina")
+        else:
+            pagina = 1
+        df_pagina, _ = carregar_pagina_contas(filtros, int(pagina) - 1)
+
+        if df_pagina.empty:
+            st.info("Nenhuma conta encontrada com esses filtros.")
+        else:
+            df_pagina = df_pagina.assign(
+                nome_fornecedor=df_pagina['fornecedores'].apply(lambda x: x['nome_razao_social'] if isinstance(x, dict) else 'N/A'),
+                nome_obra=df_pagina['obras'].apply(lambda x: x['nome_obra'] if isinstance(x, dict) else None),
+                valor_fmt=df_pagina['valor'].apply(formatar_moeda),
+                vencimento_fmt=pd.to_datetime(df_pagina['data_vencimento']).dt.strftime('%d/%m/%Y'),
+                situacao=financeiro.situacao_contas(df_pagina, pd.Timestamp(date.today())),
+            )
+            inicio = (int(pagina) - 1) * CONTAS_POR_PAGINA
+            st.caption(f"Contas {inicio + 1}–{inicio + len(df_pagina)} de {total_contas}")
+            conta = grade_selecionavel(df_pagina, {
+                'vencimento_fmt': "Vencimento", 'descricao': "Descrição", 'nome_fornecedor': "Fornecedor",
+                'nome_obra': "Obra", 'valor_fmt': "Valor", 'situacao': "Situação"
+            }, chave="grade_contas")
+            if conta is not None:
+                with st.container(border=True):
+                    st.markdown(f"#### {conta['descricao']} ({conta['valor_fmt']})")
+                    st.markdown(f"**Fornecedor:** {conta['nome_fornecedor']} | **Obra:** {conta['nome_obra'] or 'Nenhuma'} | **Vencimento:** {conta['vencimento_fmt']}")
+                    # Observações e comprovante só são lidos para a conta selecionada
+                    detalhes = carregar_detalhes_conta(int(conta['id']))
+                    if detalhes.get('observacoes'):
+                        st.caption(detalhes['observacoes'])
+                    if conta['situacao'] == 'Pago':
+                        st.success(f"✅ Pago em {pd.to_datetime(conta['data_pagamento']).strftime('%d/%m/%Y')}")
+                        if detalhes.get('comprovante_url'):
+                            st.link_button("Ver Comprovante", url=detalhes['comprovante_url'])
+                    else:
+                        if conta['situacao'] == 'Atrasado':
+                            st.error("🔴 Atrasado")
+                        with st.form(f"form_pagamento_conta_{conta['id']}", clear_on_submit=True):
+                            data_pgto = st.date_input("Data do Pagamento", value=date.today(), format="DD/MM/YYYY")
+                            comprovante = st.file_uploader("Anexar Comprovante", type=['pdf', 'jpg', 'png', 'jpeg'])
+                            if st.form_submit_button("Registrar Pagamento", type="primary"):
+                                if registrar_pagamento_conta(int(conta['id']), data_pgto, comprovante):
+                                    st.success("Pagamento registrado!"); st.rerun()
+
+    with tab_lancar:
+        st.subheader("Lançar Nova Despesa")
+        if not fornecedores_dict:
+            st.warning("Nenhum fornecedor ativo cadastrado. Cadastre um na aba 'Gerenciar Fornecedores'.")
+        else:
+            with st.form("nova_despesa_form", clear_on_submit=True):
+                c1, c2 = st.columns(2)
+                fornecedor_selecionado = c1.selectbox("Fornecedor*", options=fornecedores_dict.keys())
+                obra_selecionada = c2.selectbox("Vincular a obra", options=["Nenhuma"] + list(obras_dict.keys()))
+                descricao_despesa = st.text_input("Descrição*", help="Ex: Concreto - medição 3")
+                c3, c4 = st.columns(2)
+                valor_despesa = c3.number_input("Valor (R$)*", min_value=0.01, format="%.2f")
+                vencimento_despesa = c4.date_input("Vencimento*", value=date.today(), format="DD/MM/YYYY")
+                obs_despesa = st.text_area("Observações")
+                if st.form_submit_button("Lançar Despesa", type="primary", use_container_width=True):
+                    if not all([fornecedor_selecionado, descricao_despesa, valor_despesa, vencimento_despesa]):
+                        st.error("Preencha todos os campos obrigatórios (*).")
+                    else:
+                        obra_id = obras_dict.get(obra_selecionada)  # None se "Nenhuma"
+                        if lancar_despesa(int(fornecedores_dict[fornecedor_selecionado]), int(obra_id) if obra_id is not None else None,
+                                          descricao_despesa, valor_despesa, vencimento_despesa, obs_despesa):
+                            st.success(f"Despesa '{descricao_despesa}' lançada com sucesso!")
+
+    with tab_recorrentes:
+        st.subheader("Contas Recorrentes")
+        st.caption(f"Aluguéis, locações e custos fixos por fornecedor e obra. As contas dos próximos {recorrencias.JANELA_DIAS} dias "
+                   "são geradas automaticamente no Painel de Despesas, sem duplicar as que já existem.")
+        df_regras = carregar_regras_recorrentes()
+        if df_regras.empty:
+            st.info("Nenhuma conta recorrente cadastrada.")
+        else:
+            df_regras = df_regras.assign(
+                nome_fornecedor=df_regras['fornecedores'].apply(lambda x: x['nome_razao_social'] if isinstance(x, dict) else 'N/A'),
+                nome_obra=df_regras['obras'].apply(lambda x: x['nome_obra'] if isinstance(x, dict) else None),
+                valor_fmt=df_regras['valor'].apply(formatar_moeda),
+                periodo=pd.to_datetime(df_regras['data_inicio']).dt.strftime('%d/%m/%Y') + " → " +
+                        pd.to_datetime(df_regras['data_fim']).dt.strftime('%d/%m/%Y').fillna("sem fim"),
+            )
+            regra = grade_selecionavel(df_regras, {
+                'descricao': "Descrição", 'nome_fornecedor': "Fornecedor", 'nome_obra': "Obra", 'valor_fmt': "Valor",
+                'frequencia': "Frequência", 'periodo': "Período", 'reajuste_anual': "Reajuste anual (%)"
+            }, chave="grade_recorrentes")
+            if regra is not None:
+                with st.container(border=True):
+                    st.markdown(f"#### {regra['descricao']} ({regra['valor_fmt']}, {regra['frequencia'].lower()})")
+                    if regra.get('gerada_ate'):
+                        st.caption(f"Contas geradas até {pd.to_datetime(regra['gerada_ate']).strftime('%d/%m/%Y')}")
+                    if st.button("Encerrar recorrência", key=f"encerrar_recorrente_{regra['id']}", type="secondary",
+                                 help="Desativa a regra e apaga as contas futuras ainda não pagas"):
+                        if encerrar_regra_recorrente(int(regra['id'])):
+                            st.success("Recorrência encerrada."); st.rerun()
+
+        if st.button("Gerar contas agora", help=f"Completa as contas dos próximos {recorrencias.JANELA_DIAS} dias"):
+            enviadas = gerar_contas_recorrentes()
+            if enviadas is not None:
+                st.success(f"{enviadas} conta(s) gerada(s)." if enviadas else "As contas da janela já estavam geradas.")
+
+        if fornecedores_dict:
+            with st.form("nova_recorrente_form", clear_on_submit=True):
+                st.markdown("##### Nova Conta Recorrente")
+                c1, c2 = st.columns(2)
+                fornecedor_rec = c1.selectbox("Fornecedor*", options=fornecedores_dict.keys())
+                obra_rec = c2.selectbox("Vincular a obra", options=["Nenhuma"] + list(obras_dict.keys()))
+                descricao_rec = st.text_input("Descrição*", help="Ex: Aluguel de andaimes")
+                c3, c4, c5 = st.columns(3)
+                valor_rec = c3.number_input("Valor (R$)*", min_value=0.01, format="%.2f")
+                frequencia_rec = c4.selectbox("Frequência*", list(recorrencias.FREQUENCIAS))
+                reajuste_rec = c5.number_input("Reajuste anual (%)", min_value=0.0, step=0.5, format="%.2f")
+                c6, c7 = st.columns(2)
+                inicio_rec = c6.date_input("Primeiro vencimento*", value=date.today(), format="DD/MM/YYYY")
+                fim_rec = c7.date_input("Último vencimento (opcional)", value=None, format="DD/MM/YYYY")
+                if st.form_submit_button("Cadastrar e Gerar Contas", type="primary", use_container_width=True):
+                    if not all([fornecedor_rec, descricao_rec, valor_rec, inicio_rec]):
+                        st.error("Preencha todos os campos obrigatórios (*).")
+                    elif fim_rec and fim_rec < inicio_rec:
+                        st.error("O último vencimento deve ser depois do primeiro.")
+                    else:
+                        obra_id = obras_dict.get(obra_rec)
+                        if cadastrar_regra_recorrente(int(fornecedores_dict[fornecedor_rec]), int(obra_id) if obra_id is not None else None,
+                                                      descricao_rec, valor_rec, frequencia_rec, inicio_rec, fim_rec, reajuste_rec):
+                            enviadas = gerar_contas_recorrentes()
+                            if enviadas is not None:
+                                st.success(f"Conta recorrente cadastrada; {enviadas} conta(s) gerada(s).")
+
+    # <<<<===== AQUI ESTÁ A IMPLEMENTAÇÃO COMPLETA =====>>>>
+    with tab_fornecedores:
+        st.subheader("Gerenciar Cadastro de Fornecedores")
+        tab_forn_ativos, tab_forn_arquivados, tab_forn_duplicados = st.tabs(["Fornecedores Ativos", "Fornecedores Arquivados", "Possíveis Duplicados"])
+
+        with tab_forn_ativos:
+            df_fornecedores_ativos = carregar_fornecedores_ativos()
+            st.markdown(f"**Total de fornecedores ativos:** {len(df_fornecedores_ativos)}")
+            row = grade_selecionavel(df_fornecedores_ativos, {
+                'nome_razao_social': "Nome / Razão Social", 'cpf_cnpj': "CPF/CNPJ",
+                'contato_principal': "Contato", 'tipo_servico': "Tipo de Serviço"
+            }, chave="grade_fornecedores_ativos", id_padrao=st.query_params.get("fornecedor"))
+            if row is not None:
+                with st.container(border=True):
+                    st.markdown(f"#### {row['nome_razao_social']}")
+                    st.write(f"**CPF/CNPJ:** {row.get('cpf_cnpj', 'N/A')}")
+                    st.write(f"**Contato:** {row.get('contato_principal', 'N/A')}")
+                    st.write(f"**Tipo de Serviço:** {row.get('tipo_servico', 'N/A')}")
+                    if st.button("Arquivar Fornecedor", key=f"arquivar_forn_{row['id']}", type="secondary"):
+                        arquivar_fornecedor(row['id'])
+                        st.success(f"Fornecedor '{row['nome_razao_social']}' arquivado.")
+                        st.rerun()
+
+        with tab_forn_arquivados:
+            df_fornecedores_arquivados = carregar_fornecedores_arquivados()
+            st.markdown(f"**Total de fornecedores arquivados:** {len(df_fornecedores_arquivados)}")
+            row = grade_selecionavel(df_fornecedores_arquivados, {
+                'nome_razao_social': "Nome / Razão Social", 'cpf_cnpj': "CPF/CNPJ", 'tipo_servico': "Tipo de Serviço"
+            }, chave="grade_fornecedores_arquivados")
+            if row is not None:
+                with st.container(border=True):
+                    st.markdown(f"#### {row['nome_razao_social']}")
+                    st.write(f"**CPF/CNPJ:** {row.get('cpf_cnpj', 'N/A')}")
+                    if st.button("Reativar Fornecedor", key=f"reativar_forn_{row['id']}", type="primary"):
+                        reativar_fornecedor(row['id'])
+                        st.success(f"Fornecedor '{row['nome_razao_social']}' reativado.")
+                        st.rerun()
+
+        with tab_forn_duplicados:
+            st.caption("Comparação de todos os fornecedores por CPF/CNPJ, nome (inclusive com grafias diferentes) e contato.")
+            mostrar_pares(carregar_duplicados(), "fornecedor")
+
+        st.markdown("---")
+        with st.form("novo_fornecedor_form", clear_on_submit=True):
+            st.subheader("Cadastrar Novo Fornecedor")
+            c1, c2 = st.columns(2)
+            nome_forn = c1.text_input("Nome / Razão Social*")
+            cpf_cnpj_forn = c2.text_input("CPF / CNPJ")
+            contato_forn = c1.text_input("Contato (Telefone/Email)")
+            tipo_servico_forn = c2.text_input("Tipo de Serviço/Material")
+            enviado = st.form_submit_button("Salvar Novo Fornecedor", use_container_width=True, type="primary")
+            if enviado and not nome_forn:
                 st.error("O campo 'Nome / Razão Social' é obrigatório.")
-            else:
-                if cadastrar_fornecedor(nome_forn, cpf_cnpj_forn, contato_forn, tipo_servico_forn):
-                    st.success("Fornecedor cadastrado com sucesso!")
-                    st.cache_data.clear()
\ No newline at end of file
+                enviado = False
+
+        # Antes de gravar, procura fornecedores parecidos (mesmo CPF/CNPJ, nome com outra grafia, mesmo contato)
+        novo = confirmar_cadastro("fornecedor_parecido", indice_duplicidades, {
+            'nome_razao_social': nome_forn, 'cpf_cnpj': cpf_cnpj_forn, 'contato_principal': contato_forn, 'tipo_servico': tipo_servico_forn,
+        }, enviado)
+        if novo and cadastrar_fornecedor(*novo.values()):
+            st.success("Fornecedor cadastrado com sucesso!")
+finally:
+    painel_de_desempenho()
\ No newline at end of file
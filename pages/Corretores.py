@@ -1,75 +1,80 @@
 # pages/4_Corretores.py
 import streamlit as st
 import pandas as pd
+import calendar
 from datetime import date
-from supabase import create_client, Client
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-import re
-
-# --- Funções de Utilidade Essenciais (Copiadas para autossuficiência) ---
-def conectar_supabase() -> Client:
-    try:
-        url = st.secrets["supabase_url"]; key = st.secrets["supabase_key"]
-        return create_client(url, key)
-    except Exception:
-        st.error("🚨 **Erro de Conexão:** Verifique as credenciais do Supabase nos Secrets."); st.stop()
-
-def check_auth(pagina: str = "esta página"):
-    if 'logged_in' not in st.session_state or not st.session_state.logged_in:
-        st.warning(f"🔒 Por favor, faça o login para acessar {pagina}."); st.stop()
-
-def formatar_moeda(valor):
-    if valor is None: return "R$ 0,00"
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-def sanitizar_nome_arquivo(nome_arquivo: str) -> str:
-    nome_limpo = re.sub(r'[^\w\.\-]', '_', nome_arquivo)
-    return nome_limpo
-
-# --- Autenticação e Conexão ---
-st.set_page_config(page_title="Corretores", layout="wide", page_icon="🤝")
-check_auth("a área de Corretores")
-supabase = create_client(st.secrets["supabase_url"], st.secrets["supabase_key"])
-if 'user_session' in st.session_state:
-    supabase.auth.set_session(st.session_state.user_session['access_token'], st.session_state.user_session['refresh_token'])
-
-# --- Lógica da Sidebar ---
-with st.sidebar:
-    st.header("Modo de Acesso")
-    if st.session_state.get('logged_in'):
-        st.success(f"Logado como: {st.session_state.user_email}")
-        if st.button("Logout", use_container_width=True):
-            supabase.auth.sign_out()
-            for key in st.session_state.keys():
-                del st.session_state[key]
-            st.rerun()
-    st.markdown("---")
-    st.info("Desenvolvido por @Rogerio Souza")
+from utils import formatar_moeda, sanitizar_nome_arquivo, botao_pdf, grade_selecionavel
+from bootstrap import iniciar_pagina
+from fila_escritas import gravar, mostrar_pendentes
+from instrumentacao import painel_de_desempenho
+from alteracoes import cache_por_tabelas
+from recibos import gerar_recibo_comissao_pdf, gerar_recibo_comissoes_consolidado_pdf
+import consultas
+import financeiro
+import comissoes
+from pagamentos import registrar, PagamentoSemComprovante
+
+# --- Autenticação, Conexão e Sidebar ---
+supabase = iniciar_pagina("Corretores", "🤝", area="a área de Corretores")
 
 # --- Funções Específicas da Página ---
-@st.cache_data(ttl=60)
+@cache_por_tabelas('corretores')
 def carregar_corretores_ativos():
-    response = supabase.table('corretores').select('*').eq('ativo', True).order('nome').execute()
-    return pd.DataFrame(response.data)
+    return consultas.carregar_corretores_ativos(supabase)
 
-@st.cache_data(ttl=60)
+@cache_por_tabelas('corretores')
 def carregar_corretores_arquivados():
-    response = supabase.table('corretores').select('*').eq('ativo', False).order('nome').execute()
-    return pd.DataFrame(response.data)
+    return consultas.carregar_corretores_arquivados(supabase)
 
-@st.cache_data(ttl=60)
+@cache_por_tabelas('comissoes', 'corretores')
 def carregar_comissoes():
-    response = supabase.table('comissoes').select('*, corretores(nome)').order('criado_em', desc=True).execute()
-    return pd.DataFrame(response.data)
+    return consultas.carregar_comissoes(supabase)
+
+@cache_por_tabelas('comissoes', chave='id')
+def carregar_detalhes_comissao(comissao_id):
+    return consultas.carregar_detalhes(supabase, 'comissoes', comissao_id)
+
+@cache_por_tabelas('comissoes', 'corretores')
+def carregar_extrato_comissoes(frequencia: str):
+    df_comissoes = carregar_comissoes()
+    return financeiro.extrato_comissoes(df_comissoes, financeiro.PERIODOS_EXTRATO[frequencia])
+
+@cache_por_tabelas(comissoes.TABELA_TAXAS, 'corretores')
+def carregar_taxas():
+    return comissoes.carregar_taxas(supabase)
+
+@cache_por_tabelas('debitos', 'comissoes', comissoes.TABELA_TAXAS, 'corretores', 'clientes')
+def carregar_previa_fechamento(ate: str):
+    return comissoes.calcular(comissoes.carregar_vendas_sem_comissao(supabase, date.fromisoformat(ate)), carregar_taxas())
+
+def cadastrar_taxa(corretor_id, valor_minimo, percentual):
+    try:
+        supabase.table(comissoes.TABELA_TAXAS).insert({
+            'corretor_id': corretor_id, 'valor_minimo': valor_minimo, 'percentual': percentual
+        }).execute()
+        return True
+    except Exception as e:
+        st.error(f"Erro ao cadastrar taxa: {e}"); return False
+
+def remover_taxa(taxa_id):
+    try:
+        supabase.table(comissoes.TABELA_TAXAS).delete().eq('id', taxa_id).execute(); return True
+    except Exception as e:
+        st.error(f"Erro ao remover taxa: {e}"); return False
+
+def fechar_comissoes(df_previa):
+    """Lança todas as comissões da prévia; devolve quantas foram enviadas, ou None em caso de erro."""
+    try:
+        return comissoes.lancar(supabase, df_previa)
+    except Exception as e:
+        st.error(f"Erro ao lançar as comissões: {e}"); return None
 
 def cadastrar_corretor(nome, cpf, creci, telefone, email):
     try:
-        supabase.table('corretores').insert({
+        gravar(supabase, 'corretores', {
             'nome': nome, 'cpf': cpf, 'creci': creci, 
             'telefone': telefone, 'email': email
-        }).execute()
+        }, descricao=f"Novo corretor: {nome}")
         return True
     except Exception as e:
         st.error(f"Erro ao cadastrar corretor: {e}"); return False
@@ -86,160 +91,279 @@ def reativar_corretor(corretor_id):
     except Exception as e:
         st.error(f"Erro ao reativar corretor: {e}"); return False
 
-def gerar_recibo_comissao_pdf(comissao, corretor_nome):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    p.drawString(100, height - 100, "RECIBO DE PAGAMENTO DE COMISSÃO")
-    p.drawString(100, height - 120, "--------------------------------------------------")
-    p.drawString(100, height - 140, f"Pagamos a: {corretor_nome}")
-    p.drawString(100, height - 160, f"O valor de: {formatar_moeda(comissao['valor_comissao'])}")
-    p.drawString(100, height - 180, f"Referente a: Comissão da venda - {comissao['descricao_venda']}")
-    p.drawString(100, height - 200, f"Data do Pagamento: {pd.to_datetime(comissao['data_pagamento']).strftime('%d/%m/%Y')}")
-    p.drawString(100, height - 240, "_________________________")
-    p.drawString(100, height - 250, "Assinatura (Construtora)")
-    p.showPage(); p.save(); buffer.seek(0)
-    return buffer
-
 # --- Construção da Página ---
-st.image("https://placehold.co/1200x200/6f42c1/FFFFFF?text=Gestão+de+Corretores", use_container_width=True)
-st.title("🤝 Gestão de Corretores e Comissões")
-
-# <<<<===== AQUI ESTÁ A MUDANÇA =====>>>>
-# Invertemos a ordem das abas e das variáveis
-tab_gerenciar_corretores, tab_comissoes = st.tabs([" Cadastrar e Gerenciar Corretores", " Lançar e Visualizar Comissões"])
-
-# O bloco de código de gerenciar corretores agora vem primeiro
-with tab_gerenciar_corretores:
-    st.subheader("Gerenciar Cadastro de Corretores")
-    
-    # Abas internas para Ativos e Arquivados
-    tab_ativos, tab_arquivados = st.tabs(["Corretores Ativos", "Corretores Arquivados"])
-    
-    with tab_ativos:
+try:
+    st.image("https://placehold.co/1200x200/6f42c1/FFFFFF?text=Gestão+de+Corretores", use_container_width=True)
+    st.title("🤝 Gestão de Corretores e Comissões")
+    mostrar_pendentes('corretores', 'comissoes')
+
+    # <<<<===== AQUI ESTÁ A MUDANÇA =====>>>>
+    # Invertemos a ordem das abas e das variáveis
+    tab_gerenciar_corretores, tab_comissoes, tab_fechamento, tab_extratos = st.tabs(
+        [" Cadastrar e Gerenciar Corretores", " Lançar e Visualizar Comissões", " Fechamento de Comissões", " Extratos por Corretor"])
+
+    # O bloco de código de gerenciar corretores agora vem primeiro
+    with tab_gerenciar_corretores:
+        st.subheader("Gerenciar Cadastro de Corretores")
+
+        # Abas internas para Ativos e Arquivados
+        tab_ativos, tab_arquivados = st.tabs(["Corretores Ativos", "Corretores Arquivados"])
+
+        with tab_ativos:
+            df_corretores_ativos = carregar_corretores_ativos()
+            st.markdown(f"**Total de corretores ativos:** {len(df_corretores_ativos)}")
+            row = grade_selecionavel(df_corretores_ativos, {
+                'nome': "Nome", 'cpf': "CPF", 'creci': "CRECI", 'telefone': "Telefone", 'email': "Email"
+            }, chave="grade_corretores_ativos", id_padrao=st.query_params.get("corretor"))
+            if row is not None:
+                with st.container(border=True):
+                    st.markdown(f"#### {row['nome']}")
+                    st.write(f"**CPF:** {row.get('cpf', 'N/A')}")
+                    st.write(f"**CRECI:** {row.get('creci', 'N/A')}")
+                    st.write(f"**Email:** {row.get('email', 'N/A')}")
+                    st.write(f"**Telefone:** {row.get('telefone', 'N/A')}")
+                    if st.button("Arquivar Corretor", key=f"arquivar_{row['id']}", type="secondary"):
+                        arquivar_corretor(row['id'])
+                        st.success(f"Corretor '{row['nome']}' arquivado.")
+                        st.rerun()
+
+        with tab_arquivados:
+            df_corretores_arquivados = carregar_corretores_arquivados()
+            st.markdown(f"**Total de corretores arquivados:** {len(df_corretores_arquivados)}")
+            row = grade_selecionavel(df_corretores_arquivados, {
+                'nome': "Nome", 'cpf': "CPF", 'creci': "CRECI"
+            }, chave="grade_corretores_arquivados")
+            if row is not None:
+                with st.container(border=True):
+                    st.markdown(f"#### {row['nome']}")
+                    st.write(f"**CPF:** {row.get('cpf', 'N/A')}")
+                    st.write(f"**CRECI:** {row.get('creci', 'N/A')}")
+                    if st.button("Reativar Corretor", key=f"reativar_{row['id']}", type="primary"):
+                        reativar_corretor(row['id'])
+                        st.success(f"Corretor '{row['nome']}' reativado.")
+                        st.rerun()
+
+        st.markdown("---")
+        with st.form("novo_corretor_form", clear_on_submit=True):
+            st.subheader("Cadastrar Novo Corretor")
+            c1, c2 = st.columns(2)
+            nome = c1.text_input("Nome Completo*")
+            cpf = c2.text_input("CPF")
+            creci = c1.text_input("CRECI")
+            telefone = c2.text_input("Telefone")
+            email = c1.text_input("Email")
+            if st.form_submit_button("Salvar Novo Corretor", use_container_width=True, type="primary"):
+                if not nome:
+                    st.error("O campo 'Nome Completo' é obrigatório.")
+                else:
+                    if cadastrar_corretor(nome, cpf, creci, telefone, email):
+                        st.success("Corretor cadastrado com sucesso!")
+
+    # O bloco de código de comissões agora vem em segundo
+    with tab_comissoes:
+        st.subheader("Lançar Nova Comissão")
+        st.caption("Vendas lançadas em Contas a Receber com corretor não precisam ser digitadas: entram no Fechamento de Comissões.")
         df_corretores_ativos = carregar_corretores_ativos()
-        st.markdown(f"**Total de corretores ativos:** {len(df_corretores_ativos)}")
-        for _, row in df_corretores_ativos.iterrows():
-            with st.expander(f"{row['nome']}"):
-                st.write(f"**CPF:** {row.get('cpf', 'N/A')}")
-                st.write(f"**CRECI:** {row.get('creci', 'N/A')}")
-                st.write(f"**Email:** {row.get('email', 'N/A')}")
-                st.write(f"**Telefone:** {row.get('telefone', 'N/A')}")
-                if st.button("Arquivar Corretor", key=f"arquivar_{row['id']}", type="secondary"):
-                    arquivar_corretor(row['id'])
-                    st.success(f"Corretor '{row['nome']}' arquivado.")
-                    st.cache_data.clear(); st.rerun()
-    
-    with tab_arquivados:
-        df_corretores_arquivados = carregar_corretores_arquivados()
-        st.markdown(f"**Total de corretores arquivados:** {len(df_corretores_arquivados)}")
-        for _, row in df_corretores_arquivados.iterrows():
-            with st.expander(f"{row['nome']}"):
-                st.write(f"**CPF:** {row.get('cpf', 'N/A')}")
-                st.write(f"**CRECI:** {row.get('creci', 'N/A')}")
-                if st.button("Reativar Corretor", key=f"reativar_{row['id']}", type="primary"):
-                    reativar_corretor(row['id'])
-                    st.success(f"Corretor '{row['nome']}' reativado.")
-                    st.cache_data.clear(); st.rerun()
-
-    st.markdown("---")
-    with st.form("novo_corretor_form", clear_on_submit=True):
-        st.subheader("Cadastrar Novo Corretor")
-        c1, c2 = st.columns(2)
-        nome = c1.text_input("Nome Completo*")
-        cpf = c2.text_input("CPF")
-        creci = c1.text_input("CRECI")
-        telefone = c2.text_input("Telefone")
-        email = c1.text_input("Email")
-        if st.form_submit_button("Salvar Novo Corretor", use_container_width=True, type="primary"):
-            if not nome:
-                st.error("O campo 'Nome Completo' é obrigatório.")
+
+        if df_corretores_ativos.empty:
+            st.warning("Nenhum corretor ativo cadastrado. Cadastre um corretor na aba 'Cadastrar e Gerenciar Corretores' para começar.")
+        else:
+            corretores_dict = pd.Series(df_corretores_ativos.id.values, index=df_corretores_ativos.nome).to_dict()
+            with st.form("nova_comissao_form", clear_on_submit=True):
+                col1, col2 = st.columns(2)
+                with col1:
+                    corretor_selecionado = st.selectbox("Selecione o Corretor*", options=corretores_dict.keys())
+                    valor_venda = st.number_input("Valor da Venda (R$)*", min_value=0.01, format="%.2f")
+                    percentual = st.number_input("Percentual da Comissão (%)*", min_value=0.01, max_value=100.0, format="%.2f")
+                with col2:
+                    descricao = st.text_area("Descrição da Venda*", help="Ex: Venda Apto 101 para o cliente João Silva")
+
+                submitted = st.form_submit_button("Lançar Comissão", type="primary", use_container_width=True)
+                if submitted:
+                    if not all([corretor_selecionado, valor_venda, percentual, descricao]):
+                        st.error("Preencha todos os campos obrigatórios (*).")
+                    else:
+                        corretor_id = corretores_dict[corretor_selecionado]
+                        valor_comissao = valor_venda * (percentual / 100)
+                        nova_comissao = {
+                            "corretor_id": corretor_id, "descricao_venda": descricao,
+                            "valor_venda": valor_venda, "percentual_comissao": percentual,
+                            "valor_comissao": valor_comissao, "status": "Pendente"
+                        }
+                        try:
+                            gravar(supabase, 'comissoes', nova_comissao,
+                                   descricao=f"Comissão de {formatar_moeda(valor_comissao)} para {corretor_selecionado}")
+                            st.success(f"Comissão de {formatar_moeda(valor_comissao)} para {corretor_selecionado} lançada com sucesso!")
+                        except Exception as e:
+                            st.error(f"Erro ao lançar comissão: {e}")
+
+        st.markdown("---")
+        st.subheader("Histórico de Comissões")
+
+        df_comissoes = carregar_comissoes()
+        if df_comissoes.empty:
+            st.info("Nenhuma comissão foi lançada ainda.")
+        else:
+            df_comissoes['nome_corretor'] = df_comissoes['corretores'].apply(lambda x: x['nome'] if isinstance(x, dict) else 'Corretor não encontrado')
+
+            filtro_status = st.selectbox("Filtrar por Status:", ["Todas", "Pendente", "Paga"])
+            df_filtrado = df_comissoes
+            if filtro_status != "Todas":
+                df_filtrado = df_comissoes[df_comissoes['status'] == filtro_status]
+
+            df_filtrado = df_filtrado.assign(
+                valor_venda_fmt=df_filtrado['valor_venda'].apply(formatar_moeda),
+                valor_comissao_fmt=df_filtrado['valor_comissao'].apply(formatar_moeda),
+                data_pagamento_fmt=pd.to_datetime(df_filtrado['data_pagamento']).dt.strftime('%d/%m/%Y').fillna('---'),
+            )
+            row = grade_selecionavel(df_filtrado, {
+                'nome_corretor': "Corretor", 'descricao_venda': "Venda", 'valor_venda_fmt': "Valor da Venda",
+                'percentual_comissao': "%", 'valor_comissao_fmt': "Comissão", 'status': "Status", 'data_pagamento_fmt': "Pagamento"
+            }, chave="grade_comissoes")
+            if row is not None:
+                with st.container(border=True):
+                    st.markdown(f"#### {row['nome_corretor']} - {row['descricao_venda']}")
+                    cols = st.columns(2)
+                    cols[0].markdown(f"**Valor:** {formatar_moeda(row['valor_comissao'])}")
+                    cols[0].markdown(f"**Status:** {row['status']}")
+                    if row['status'] == 'Paga':
+                        cols[0].markdown(f"**Data Pagamento:** {pd.to_datetime(row['data_pagamento']).strftime('%d/%m/%Y')}")
+
+                        with cols[1]:
+                            botao_pdf("Gerar Recibo", f"recibo_comissao_{row['id']}",
+                                      lambda: gerar_recibo_comissao_pdf(row, row['nome_corretor']),
+                                      f"recibo_comissao_{row['id']}.pdf", use_container_width=True)
+                            comprovante_url = carregar_detalhes_comissao(int(row['id'])).get('comprovante_url')
+                            if comprovante_url:
+                                st.link_button("Ver Comprovante", url=comprovante_url, use_container_width=True)
+
+                    if row['status'] == 'Pendente':
+                        with cols[1].popover("Registrar Pagamento", use_container_width=True):
+                            with st.form(f"form_pgto_comissao_{row['id']}", clear_on_submit=True):
+                                data_pgto = st.date_input("Data do Pagamento", value=date.today(), key=f"data_pgto_{row['id']}")
+                                comprovante = st.file_uploader("Anexar Comprovante", type=['pdf', 'jpg', 'png', 'jpeg'], key=f"comp_{row['id']}")
+                                if st.form_submit_button("Confirmar Pagamento", type="primary"):
+                                    try:
+                                        registrar(supabase, 'comissoes', row['id'], data_pgto, comprovante)
+                                        st.success("Pagamento registrado!")
+                                        st.rerun()
+                                    except PagamentoSemComprovante as e:
+                                        st.toast(f"⚠️ Pagamento registrado, mas o comprovante não foi enviado: {e}")
+                                        st.rerun()
+                                    except Exception as e:
+                                        st.error(f"Erro ao registrar pagamento: {e}")
+
+    with tab_fechamento:
+        st.subheader("Tabela de Taxas")
+        st.caption(f"Percentual de comissão por faixa de valor da venda. A faixa do corretor vale sobre a faixa geral; "
+                   f"sem nenhuma faixa, a comissão é de {comissoes.PERCENTUAL_PADRAO:g}%.")
+        df_taxas = carregar_taxas()
+        if df_taxas.empty:
+            st.info("Nenhuma faixa cadastrada.")
+        else:
+            df_taxas = df_taxas.assign(
+                nome_corretor=df_taxas['corretores'].apply(lambda x: x['nome'] if isinstance(x, dict) else "Todos os corretores"),
+                valor_minimo_fmt=df_taxas['valor_minimo'].apply(formatar_moeda),
+            )
+            taxa = grade_selecionavel(df_taxas, {
+                'nome_corretor': "Corretor", 'valor_minimo_fmt': "Vendas a partir de", 'percentual': "Comissão (%)"
+            }, chave="grade_taxas")
+            if taxa is not None:
+                if st.button("Remover faixa", key=f"remover_taxa_{taxa['id']}", type="secondary"):
+                    if remover_taxa(int(taxa['id'])):
+                        st.success("Faixa removida."); st.rerun()
+
+        df_corretores_taxa = carregar_corretores_ativos()
+        corretores_taxa = (pd.Series(df_corretores_taxa.id.values, index=df_corretores_taxa.nome).to_dict()
+                           if not df_corretores_taxa.empty else {})
+        with st.form("nova_taxa_form", clear_on_submit=True):
+            c1, c2, c3 = st.columns([2, 1, 1])
+            corretor_taxa = c1.selectbox("Corretor", ["Todos os corretores"] + list(corretores_taxa.keys()))
+            valor_minimo = c2.number_input("Vendas a partir de (R$)", min_value=0.0, format="%.2f")
+            percentual_taxa = c3.number_input("Comissão (%)", min_value=0.01, max_value=100.0, value=comissoes.PERCENTUAL_PADRAO, format="%.2f")
+            if st.form_submit_button("Adicionar Faixa", use_container_width=True):
+                corretor_id = int(corretores_taxa[corretor_taxa]) if corretor_taxa in corretores_taxa else None
+                if cadastrar_taxa(corretor_id, valor_minimo, percentual_taxa):
+                    st.success("Faixa adicionada."); st.rerun()
+
+        st.markdown("---")
+        st.subheader("Fechamento do Mês")
+        st.caption("Vendas (débitos com corretor) ainda sem comissão. Todas as comissões da prévia são lançadas de uma vez, "
+                   "como pendentes; rodar de novo não duplica nenhuma.")
+        hoje = date.today()
+        fechamento_ate = st.date_input("Vendas lançadas até", value=hoje.replace(day=calendar.monthrange(hoje.year, hoje.month)[1]),
+                                       format="DD/MM/YYYY", key="fechamento_ate")
+        df_previa = carregar_previa_fechamento(fechamento_ate.isoformat())
+        if df_previa.empty:
+            st.success("Todas as vendas com corretor até essa data já têm comissão.")
+        else:
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Vendas sem comissão", len(df_previa))
+            m2.metric("Valor das vendas", formatar_moeda(df_previa['valor_venda'].sum()))
+            m3.metric("Comissões a lançar", formatar_moeda(df_previa['valor_comissao'].sum()))
+            por_corretor = df_previa.groupby('nome_corretor', as_index=False).agg(
+                vendas=('debito_id', 'size'), valor_venda=('valor_venda', 'sum'), valor_comissao=('valor_comissao', 'sum'))
+            st.dataframe(por_corretor.assign(
+                valor_venda=por_corretor['valor_venda'].apply(formatar_moeda),
+                valor_comissao=por_corretor['valor_comissao'].apply(formatar_moeda),
+            ), hide_index=True, use_container_width=True, column_config={
+                'nome_corretor': "Corretor", 'vendas': "Vendas", 'valor_venda': "Valor das Vendas", 'valor_comissao': "Comissão"})
+            with st.expander(f"Prévia das {len(df_previa)} comissões"):
+                st.dataframe(df_previa.assign(
+                    data_venda=pd.to_datetime(df_previa['data_venda']).dt.strftime('%d/%m/%Y'),
+                    valor_venda=df_previa['valor_venda'].apply(formatar_moeda),
+                    valor_comissao=df_previa['valor_comissao'].apply(formatar_moeda),
+                )[['nome_corretor', 'nome_cliente', 'descricao_venda', 'data_venda', 'valor_venda', 'percentual_comissao', 'valor_comissao']],
+                    hide_index=True, use_container_width=True, column_config={
+                        'nome_corretor': "Corretor", 'nome_cliente': "Cliente", 'descricao_venda': "Venda", 'data_venda': "Data",
+                        'valor_venda': "Valor da Venda", 'percentual_comissao': "%", 'valor_comissao': "Comissão"})
+            if st.button(f"Lançar {len(df_previa)} comissão(ões)", type="primary", use_container_width=True):
+                enviadas = fechar_comissoes(df_previa)
+                if enviadas is not None:
+                    st.success(f"{enviadas} comissão(ões) lançada(s) como pendentes."); st.rerun()
+
+    with tab_extratos:
+        st.subheader("Extrato de Comissões por Corretor")
+        c1, c2 = st.columns([2, 1])
+        frequencia_extrato = c2.selectbox("Período", list(financeiro.PERIODOS_EXTRATO))
+        df_extrato = carregar_extrato_comissoes(frequencia_extrato)
+        if df_extrato.empty:
+            st.info("Nenhuma comissão foi lançada ainda.")
+        else:
+            corretores_extrato = df_extrato[['corretor_id', 'nome_corretor']].drop_duplicates('corretor_id').sort_values('nome_corretor')
+            nome_extrato = c1.selectbox("Corretor", corretores_extrato['nome_corretor'])
+            corretor_id = corretores_extrato.loc[corretores_extrato['nome_corretor'] == nome_extrato, 'corretor_id'].iloc[0]
+            extrato = df_extrato[df_extrato['corretor_id'] == corretor_id].sort_values('periodo', ascending=False)
+
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Pendente", formatar_moeda(extrato['pendente'].sum()))
+            m2.metric("Pago", formatar_moeda(extrato['pago'].sum()))
+            m3.metric("Total", formatar_moeda(extrato['total'].sum()))
+            formato_periodo = {"Mensal": "%m/%Y", "Trimestral": "%m/%Y", "Anual": "%Y"}[frequencia_extrato]
+            st.dataframe(pd.DataFrame({
+                'Período': extrato['periodo'].dt.strftime(formato_periodo),
+                'Comissões': extrato['quantidade'],
+                'Pendente': extrato['pendente'].apply(formatar_moeda),
+                'Pago': extrato['pago'].apply(formatar_moeda),
+                'Total': extrato['total'].apply(formatar_moeda),
+            }), hide_index=True, use_container_width=True)
+
+            st.markdown("##### Recibo Consolidado")
+            st.caption("Um único PDF com todas as comissões pagas ao corretor no período escolhido.")
+            hoje = date.today()
+            c3, c4 = st.columns(2)
+            inicio_recibo = c3.date_input("De", value=hoje.replace(day=1), format="DD/MM/YYYY", key="recibo_inicio")
+            fim_recibo = c4.date_input("Até", value=hoje, format="DD/MM/YYYY", key="recibo_fim")
+            df_comissoes = carregar_comissoes()
+            data_pagamento = pd.to_datetime(df_comissoes['data_pagamento'], errors='coerce')
+            df_pagas = df_comissoes[(df_comissoes['corretor_id'] == corretor_id) & (df_comissoes['status'] == 'Paga')
+                                    & (data_pagamento >= pd.Timestamp(inicio_recibo)) & (data_pagamento <= pd.Timestamp(fim_recibo))]
+            if df_pagas.empty:
+                st.info("Nenhuma comissão paga a este corretor no período.")
             else:
-                if cadastrar_corretor(nome, cpf, creci, telefone, email):
-                    st.success("Corretor cadastrado com sucesso!")
-                    st.cache_data.clear()
-
-# O bloco de código de comissões agora vem em segundo
-with tab_comissoes:
-    st.subheader("Lançar Nova Comissão")
-    df_corretores_ativos = carregar_corretores_ativos()
-
-    if df_corretores_ativos.empty:
-        st.warning("Nenhum corretor ativo cadastrado. Cadastre um corretor na aba 'Cadastrar e Gerenciar Corretores' para começar.")
-    else:
-        corretores_dict = pd.Series(df_corretores_ativos.id.values, index=df_corretores_ativos.nome).to_dict()
-        with st.form("nova_comissao_form", clear_on_submit=True):
-            col1, col2 = st.columns(2)
-            with col1:
-                corretor_selecionado = st.selectbox("Selecione o Corretor*", options=corretores_dict.keys())
-                valor_venda = st.number_input("Valor da Venda (R$)*", min_value=0.01, format="%.2f")
-                percentual = st.number_input("Percentual da Comissão (%)*", min_value=0.01, max_value=100.0, format="%.2f")
-            with col2:
-                descricao = st.text_area("Descrição da Venda*", help="Ex: Venda Apto 101 para o cliente João Silva")
-            
-            submitted = st.form_submit_button("Lançar Comissão", type="primary", use_container_width=True)
-            if submitted:
-                if not all([corretor_selecionado, valor_venda, percentual, descricao]):
-                    st.error("Preencha todos os campos obrigatórios (*).")
-                else:
-                    corretor_id = corretores_dict[corretor_selecionado]
-                    valor_comissao = valor_venda * (percentual / 100)
-                    nova_comissao = {
-                        "corretor_id": corretor_id, "descricao_venda": descricao,
-                        "valor_venda": valor_venda, "percentual_comissao": percentual,
-                        "valor_comissao": valor_comissao, "status": "Pendente"
-                    }
-                    try:
-                        supabase.table('comissoes').insert(nova_comissao).execute()
-                        st.success(f"Comissão de {formatar_moeda(valor_comissao)} para {corretor_selecionado} lançada com sucesso!")
-                        st.cache_data.clear()
-                    except Exception as e:
-                        st.error(f"Erro ao lançar comissão: {e}")
-
-    st.markdown("---")
-    st.subheader("Histórico de Comissões")
-    
-    df_comissoes = carregar_comissoes()
-    if df_comissoes.empty:
-        st.info("Nenhuma comissão foi lançada ainda.")
-    else:
-        df_comissoes['nome_corretor'] = df_comissoes['corretores'].apply(lambda x: x['nome'] if isinstance(x, dict) else 'Corretor não encontrado')
-        
-        filtro_status = st.selectbox("Filtrar por Status:", ["Todas", "Pendente", "Paga"])
-        df_filtrado = df_comissoes
-        if filtro_status != "Todas":
-            df_filtrado = df_comissoes[df_comissoes['status'] == filtro_status]
-        
-        for _, row in df_filtrado.iterrows():
-            with st.expander(f"**{row['nome_corretor']}** - {row['descricao_venda']} - Valor: **{formatar_moeda(row['valor_comissao'])}**"):
-                cols = st.columns(2)
-                cols[0].markdown(f"**Status:** {row['status']}")
-                if row['status'] == 'Paga':
-                    cols[0].markdown(f"**Data Pagamento:** {pd.to_datetime(row['data_pagamento']).strftime('%d/%m/%Y')}")
-                    
-                    with cols[1]:
-                        pdf_recibo = gerar_recibo_comissao_pdf(row, row['nome_corretor'])
-                        st.download_button(label="Gerar Recibo", data=pdf_recibo, file_name=f"recibo_comissao_{row['id']}.pdf", mime="application/pdf", use_container_width=True, key=f"recibo_{row['id']}")
-                        if row.get('comprovante_url'):
-                            st.link_button("Ver Comprovante", url=row['comprovante_url'], use_container_width=True)
-                
-                if row['status'] == 'Pendente':
-                    with cols[1].popover("Registrar Pagamento", use_container_width=True):
-                        with st.form(f"form_pgto_comissao_{row['id']}", clear_on_submit=True):
-                            data_pgto = st.date_input("Data do Pagamento", value=date.today(), key=f"data_pgto_{row['id']}")
-                            comprovante = st.file_uploader("Anexar Comprovante", type=['pdf', 'jpg', 'png', 'jpeg'], key=f"comp_{row['id']}")
-                            if st.form_submit_button("Confirmar Pagamento", type="primary"):
-                                update_data = {'status': 'Paga', 'data_pagamento': data_pgto.strftime('%Y-%m-%d')}
-                                if comprovante:
-                                    nome_sanitizado = sanitizar_nome_arquivo(comprovante.name)
-                                    file_path = f"comprovantes_comissao/{row['id']}_{nome_sanitizado}"
-                                    supabase.storage.from_("comprovantes").upload(file=comprovante.getvalue(), path=file_path, file_options={"content-type": comprovante.type})
-                                    update_data['comprovante_url'] = supabase.storage.from_('comprovantes').get_public_url(file_path)
-                                
-                                try:
-                                    supabase.table('comissoes').update(update_data).eq('id', row['id']).execute()
-                                    st.success("Pagamento registrado!")
-                                    st.cache_data.clear()
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"Erro ao registrar pagamento: {e}")
\ No newline at end of file
+                st.write(f"**{len(df_pagas)} comissão(ões) paga(s)**, total de {formatar_moeda(df_pagas['valor_comissao'].sum())}.")
+                botao_pdf("Gerar Recibo Consolidado", f"recibo_consolidado_{corretor_id}_{inicio_recibo}_{fim_recibo}",
+                          lambda: gerar_recibo_comissoes_consolidado_pdf(df_pagas, nome_extrato, inicio_recibo, fim_recibo),
+                          f"recibo_comissoes_{sanitizar_nome_arquivo(nome_extrato)}_{inicio_recibo:%Y%m%d}_{fim_recibo:%Y%m%d}.pdf")
+finally:
+    painel_de_desempenho()
\ No newline at end of file
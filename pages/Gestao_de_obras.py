@@ -2,31 +2,25 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, timedelta
-from supabase import create_client, Client
-from utils import check_auth, get_supabase_client, formatar_moeda
-
-# --- Autenticação e Conexão ---
-st.set_page_config(page_title="Gestão de Obras", layout="wide", page_icon="🏗️")
-check_auth("a área de Gestão de Obras")
-supabase = get_supabase_client()
-
-# --- Lógica da Sidebar ---
-with st.sidebar:
-    st.header("Modo de Acesso")
-    if st.session_state.get('logged_in'):
-        st.success(f"Logado como: {st.session_state.user_email}")
-        if st.button("Logout", use_container_width=True):
-            supabase.auth.sign_out()
-            for key in st.session_state.keys():
-                del st.session_state[key]
-            st.rerun()
-    st.markdown("---"); st.info("Desenvolvido por @Rogerio Souza")
+from supabase import Client
+from utils import formatar_moeda
+from bootstrap import iniciar_pagina
+from fila_escritas import gravar, mostrar_pendentes
+import consultas
+from instrumentacao import painel_de_desempenho
+from alteracoes import cache_por_tabelas
+
+# --- Autenticação, Conexão e Sidebar ---
+supabase = iniciar_pagina("Gestão de Obras", "🏗️", area="a área de Gestão de Obras")
 
 # --- Funções da Página ---
-@st.cache_data(ttl=60)
+@cache_por_tabelas('obras')
 def carregar_obras(_supabase_client: Client) -> pd.DataFrame:
-    response = _supabase_client.table('obras').select('*').eq('ativo', True).order('nome_obra').execute()
-    return pd.DataFrame(response.data)
+    return consultas.carregar_obras(_supabase_client)
+
+@cache_por_tabelas('obras', 'debitos', 'parcelas', 'contas_a_pagar')
+def carregar_resumo_financeiro_obras(_supabase_client: Client):
+    return consultas.carregar_resumo_financeiro_obras(_supabase_client)
 
 def cadastrar_obra(nome, endereco, data_inicio, data_fim_prevista, status, valor, responsavel, obs):
     try:
@@ -35,60 +29,104 @@ def cadastrar_obra(nome, endereco, data_inicio, data_fim_prevista, status, valor
             'data_fim_prevista': data_fim_prevista.strftime('%Y-%m-%d'), 'status': status, 'valor_obra': valor,
             'responsavel_obra': responsavel, 'observacoes': obs
         }
-        supabase.table('obras').insert(obra_data).execute(); return True
+        gravar(supabase, 'obras', obra_data, descricao=f"Nova obra: {nome}"); return True
     except Exception as e:
         st.error(f"Erro ao cadastrar obra: {e}"); return False
 
 # --- Construção da Página ---
-st.image("https://placehold.co/1200x200/f0ad4e/FFFFFF?text=Gestão+de+Obras", use_container_width=True)
-st.title("🏗️ Gestão de Obras")
-st.markdown("Cadastre e acompanhe o andamento de suas obras.")
-
-tab_painel, tab_cadastro = st.tabs(["Painel de Obras", "Cadastrar Nova Obra"])
-
-with tab_painel:
-    st.subheader("Lista de Obras Cadastradas")
-    
-    df_obras = carregar_obras(supabase)
-
-    if df_obras.empty:
-        st.info("Nenhuma obra cadastrada. Adicione uma na aba 'Cadastrar Nova Obra'.")
-    else:
-        for _, row in df_obras.iterrows():
-            with st.expander(f"**{row.get('nome_obra', 'N/A')}** | Status: {row.get('status', 'N/A')}"):
-                st.markdown(f"**Responsável:** {row.get('responsavel_obra', 'N/A')}")
-                st.markdown(f"**Endereço:** {row.get('endereco', 'N/A')}")
-                
-                col1, col2, col3 = st.columns(3)
-                col1.markdown(f"**Início:** {pd.to_datetime(row.get('data_inicio')).strftime('%d/%m/%Y') if row.get('data_inicio') else 'N/A'}")
-                col2.markdown(f"**Previsão de Término:** {pd.to_datetime(row.get('data_fim_prevista')).strftime('%d/%m/%Y') if row.get('data_fim_prevista') else 'N/A'}")
-                col3.markdown(f"**Valor da Obra:** {formatar_moeda(row.get('valor_obra'))}")
-                
-                st.markdown("**Observações:**")
-                st.info(f"{row.get('observacoes', 'Nenhuma observação.')}")
-
-
-with tab_cadastro:
-    st.subheader("Cadastrar Nova Obra")
-    with st.form("nova_obra_form", clear_on_submit=True):
-        nome = st.text_input("Nome da Obra*", help="Campo obrigatório")
-        endereco = st.text_input("Endereço da Obra")
-        responsavel = st.text_input("Responsável pela Obra (Mestre de Obra)")
-        
-        col_data1, col_data2 = st.columns(2)
-        data_inicio = col_data1.date_input("Data de Início", value=date.today())
-        data_fim_prevista = col_data2.date_input("Data Prevista de Conclusão", value=date.today() + timedelta(days=365))
-        
-        col_status, col_valor = st.columns(2)
-        status = col_status.selectbox("Status Inicial", ["Planejamento", "Em Andamento", "Pausada", "Finalizada"])
-        valor = col_valor.number_input("Valor da Obra (R$)", min_value=0.0, format="%.2f")
-        
-        obs = st.text_area("Observações")
-        
-        if st.form_submit_button("Salvar Nova Obra", type="primary", use_container_width=True):
-            if not nome: 
-                st.error("O campo 'Nome da Obra' é obrigatório.")
+try:
+    st.image("https://placehold.co/1200x200/f0ad4e/FFFFFF?text=Gestão+de+Obras", use_container_width=True)
+    st.title("🏗️ Gestão de Obras")
+    st.markdown("Cadastre e acompanhe o andamento de suas obras.")
+    mostrar_pendentes('obras')
+
+    tab_painel, tab_financeiro, tab_cadastro = st.tabs(["Painel de Obras", "💰 Painel Financeiro", "Cadastrar Nova Obra"])
+
+    with tab_painel:
+        st.subheader("Lista de Obras Cadastradas")
+
+        df_obras = carregar_obras(supabase)
+
+        if df_obras.empty:
+            st.info("Nenhuma obra cadastrada. Adicione uma na aba 'Cadastrar Nova Obra'.")
+        else:
+            for _, row in df_obras.iterrows():
+                with st.expander(f"**{row.get('nome_obra', 'N/A')}** | Status: {row.get('status', 'N/A')}", expanded=str(row['id']) == st.query_params.get("obra")):
+                    st.markdown(f"**Responsável:** {row.get('responsavel_obra', 'N/A')}")
+                    st.markdown(f"**Endereço:** {row.get('endereco', 'N/A')}")
+
+                    col1, col2, col3 = st.columns(3)
+                    col1.markdown(f"**Início:** {pd.to_datetime(row.get('data_inicio')).strftime('%d/%m/%Y') if row.get('data_inicio') else 'N/A'}")
+                    col2.markdown(f"**Previsão de Término:** {pd.to_datetime(row.get('data_fim_prevista')).strftime('%d/%m/%Y') if row.get('data_fim_prevista') else 'N/A'}")
+                    col3.markdown(f"**Valor da Obra:** {formatar_moeda(row.get('valor_obra'))}")
+
+                    st.markdown("**Observações:**")
+                    st.info(f"{row.get('observacoes', 'Nenhuma observação.')}")
+
+
+    with tab_financeiro:
+        st.subheader("Desempenho Financeiro por Obra")
+
+        df_resumo, df_gastos_mensais = carregar_resumo_financeiro_obras(supabase)
+
+        if df_resumo.empty:
+            st.info("Nenhuma obra ativa para analisar.")
+        else:
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Orçamento Total", formatar_moeda(df_resumo['orcamento'].sum()))
+            c2.metric("Total Gasto", formatar_moeda(df_resumo['gasto'].sum()))
+            c3.metric("Total Recebido", formatar_moeda(df_resumo['recebido'].sum()))
+            c4.metric("Margem Realizada", formatar_moeda(df_resumo['margem'].sum()))
+
+            df_display = pd.DataFrame({
+                'Obra': df_resumo['nome_obra'],
+                'Status': df_resumo['status'],
+                'Orçamento': df_resumo['orcamento'].apply(formatar_moeda),
+                'Gasto': df_resumo['gasto'].apply(formatar_moeda),
+                '% do Orçamento': df_resumo['perc_orcamento'] * 100,
+                'Contas Lançadas': df_resumo['comprometido'].apply(formatar_moeda),
+                'A Receber (Total)': df_resumo['a_receber'].apply(formatar_moeda),
+                'Recebido': df_resumo['recebido'].apply(formatar_moeda),
+                'Margem Realizada': df_resumo['margem'].apply(formatar_moeda),
+                'Margem Prevista': df_resumo['margem_prevista'].apply(formatar_moeda),
+                'Gasto Médio/Mês': df_resumo['gasto_mensal_medio'].apply(formatar_moeda),
+            })
+            st.dataframe(
+                df_display, use_container_width=True, hide_index=True,
+                column_config={'% do Orçamento': st.column_config.ProgressColumn('% do Orçamento', format="%.0f%%", min_value=0, max_value=100)}
+            )
+
+            st.markdown("### Gastos Mensais da Obra")
+            obras_dict = pd.Series(df_resumo.obra_id.values, index=df_resumo.nome_obra).to_dict()
+            obra_selecionada = st.selectbox("Selecione a obra", options=obras_dict.keys(), key="obra_gastos_mensais")
+            df_gastos_obra = df_gastos_mensais[df_gastos_mensais['obra_id'] == obras_dict[obra_selecionada]]
+            if df_gastos_obra.empty:
+                st.info("Nenhum pagamento registrado para esta obra.")
             else:
-                if cadastrar_obra(nome, endereco, data_inicio, data_fim_prevista, status, valor, responsavel, obs):
-                    st.success(f"Obra '{nome}' cadastrada com sucesso!")
-                    st.cache_data.clear()
\ No newline at end of file
+                st.bar_chart(df_gastos_obra.set_index('mes')['valor'])
+
+    with tab_cadastro:
+        st.subheader("Cadastrar Nova Obra")
+        with st.form("nova_obra_form", clear_on_submit=True):
+            nome = st.text_input("Nome da Obra*", help="Campo obrigatório")
+            endereco = st.text_input("Endereço da Obra")
+            responsavel = st.text_input("Responsável pela Obra (Mestre de Obra)")
+
+            col_data1, col_data2 = st.columns(2)
+            data_inicio = col_data1.date_input("Data de Início", value=date.today())
+            data_fim_prevista = col_data2.date_input("Data Prevista de Conclusão", value=date.today() + timedelta(days=365))
+
+            col_status, col_valor = st.columns(2)
+            status = col_status.selectbox("Status Inicial", ["Planejamento", "Em Andamento", "Pausada", "Finalizada"])
+            valor = col_valor.number_input("Valor da Obra (R$)", min_value=0.0, format="%.2f")
+
+            obs = st.text_area("Observações")
+
+            if st.form_submit_button("Salvar Nova Obra", type="primary", use_container_width=True):
+                if not nome: 
+                    st.error("O campo 'Nome da Obra' é obrigatório.")
+                else:
+                    if cadastrar_obra(nome, endereco, data_inicio, data_fim_prevista, status, valor, responsavel, obs):
+                        st.success(f"Obra '{nome}' cadastrada com sucesso!")
+finally:
+    painel_de_desempenho()
\ No newline at end of file
@@ -1,232 +1,303 @@
 # pages/1_Relatorios_Financeiros.py
 import streamlit as st
 import pandas as pd
+import time
 from datetime import date, timedelta
-from supabase import create_client, Client
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from utils import check_auth, get_supabase_client, formatar_moeda
-
-# --- Autenticação e Conexão ---
-st.set_page_config(page_title="Relatórios Financeiros", layout="wide", page_icon="📈")
-check_auth("os Relatórios Financeiros")
-supabase = get_supabase_client()
-
-# --- Lógica da Sidebar ---
-with st.sidebar:
-    st.header("Modo de Acesso")
-    if st.session_state.get('logged_in'):
-        st.success(f"Logado como: {st.session_state.user_email}")
-        if st.button("Logout", use_container_width=True):
-            supabase.auth.sign_out()
-            for key in st.session_state.keys():
-                del st.session_state[key]
-            st.rerun()
-    st.markdown("---"); st.info("Desenvolvido por @Rogerio Souza")
+from supabase import Client
+from utils import formatar_moeda, botao_pdf, sanitizar_nome_arquivo
+from bootstrap import iniciar_pagina
+from instrumentacao import painel_de_desempenho
+from alteracoes import cache_por_tabelas
+from recibos import gerar_extrato_cliente_pdf
+import consultas
+import exportacao
+from financeiro import (
+    normalizar_ledger_receber, normalizar_ledger_pagar, projetar_fluxo_caixa,
+    taxa_inadimplencia_historica, FREQUENCIAS_PROJECAO, calcular_aging, resumir_aging, FAIXAS_AGING,
+    montar_indice_extratos
+)
+
+# --- Autenticação, Conexão e Sidebar ---
+supabase = iniciar_pagina("Relatórios Financeiros", "📈", area="os Relatórios Financeiros")
 
 # --- Funções da Página ---
-@st.cache_data(ttl=300)
+TABELAS_LEDGER = ('parcelas', 'clientes', 'debitos', 'obras', 'contas_a_pagar', 'fornecedores')
+
+@cache_por_tabelas(*TABELAS_LEDGER)
 def carregar_todos_dados_financeiros(_supabase_client: Client):
-    """Carrega todas as transações (a pagar e a receber) de uma vez."""
-    parcelas_resp = _supabase_client.table('parcelas').select('*, clientes(nome)').execute()
-    contas_resp = _supabase_client.table('contas_a_pagar').select('*, fornecedores(nome_razao_social)').execute()
-    return pd.DataFrame(parcelas_resp.data), pd.DataFrame(contas_resp.data)
-
-@st.cache_data(ttl=300)
-def carregar_clientes_com_debitos(_supabase_client: Client):
-    """Carrega apenas clientes que têm débitos associados."""
-    response = _supabase_client.table('clientes').select('id, nome').in_('id', [d['cliente_id'] for d in _supabase_client.table('debitos').select('cliente_id').execute().data]).execute()
-    return pd.DataFrame(response.data)
-
-def gerar_extrato_cliente_pdf(df_extrato: pd.DataFrame, cliente_nome: str, totais: dict):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(72, height - 72, f"Extrato Financeiro - {cliente_nome}")
-    p.setFont("Helvetica", 10)
-    p.drawString(72, height - 90, f"Gerado em: {date.today().strftime('%d/%m/%Y')}")
-    
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(72, height - 120, "Resumo:")
-    p.setFont("Helvetica", 11)
-    p.drawString(72, height - 135, f"Valor Total dos Débitos: {totais['total_debitos']}")
-    p.drawString(72, height - 150, f"Total Pago: {totais['total_pago']}")
-    p.drawString(72, height - 165, f"Saldo Devedor: {totais['saldo_devedor']}")
-
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(72, height - 200, "Histórico de Parcelas:")
-    
-    y = height - 220
-    p.setFont("Helvetica-Bold", 9)
-    p.drawString(75, y, "Vencimento")
-    p.drawString(155, y, "Descrição")
-    p.drawString(355, y, "Valor")
-    p.drawString(425, y, "Status")
-    p.drawString(505, y, "Data Pgto.")
-    y -= 15
-    
-    p.setFont("Helvetica", 9)
-    for _, row in df_extrato.iterrows():
-        if y < 60:
-            p.showPage()
-            y = height - 72
-            p.setFont("Helvetica", 9)
-            
-        p.drawString(75, y, str(row['Vencimento']))
-        p.drawString(155, y, str(row['Descrição']))
-        p.drawString(355, y, str(row['Valor']))
-        p.drawString(425, y, str(row['Status']))
-        p.drawString(505, y, str(row['Data Pagamento']))
-        y -= 12
-        
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return buffer
+    """Carrega todas as transações (a pagar e a receber) de uma vez, junto com um identificador da versão carregada."""
+    df_receber, df_pagar = consultas.carregar_todos_dados_financeiros(_supabase_client)
+    return df_receber, df_pagar, time.time_ns()
+
+@cache_por_tabelas(*TABELAS_LEDGER)
+def carregar_ledger_normalizado(_supabase_client: Client):
+    """Versão achatada (datas e valores já convertidos) das transações, usada pelas análises vetorizadas."""
+    df_receber, df_pagar, _ = carregar_todos_dados_financeiros(_supabase_client)
+    return normalizar_ledger_receber(df_receber), normalizar_ledger_pagar(df_pagar)
+
+@cache_por_tabelas(*TABELAS_LEDGER)
+def carregar_aging(_supabase_client: Client):
+    """Parcelas em aberto já classificadas por faixa de atraso; os filtros de detalhamento trabalham sobre esta cópia."""
+    df_receber_norm, _ = carregar_ledger_normalizado(_supabase_client)
+    return calcular_aging(df_receber_norm)
+
+@st.cache_resource(max_entries=2)
+def carregar_indice_extratos(versao_ledger: int, _supabase_client: Client):
+    """Índice cliente -> parcelas, construído uma vez por versão do ledger e compartilhado (somente leitura) entre execuções."""
+    df_receber_norm, _ = carregar_ledger_normalizado(_supabase_client)
+    return montar_indice_extratos(df_receber_norm)
 
 # --- Construção da Página ---
+try:
+    # <<<<===== AQUI ESTÁ A MUDANÇA =====>>>>
+    st.image("https://placehold.co/1200x200/17a2b8/FFFFFF?text=Relatórios+Financeiros", use_container_width=True)
+    st.title("📈 Relatórios Financeiros")
+    # O título de texto simples foi removido e substituído pela imagem acima
 
-# <<<<===== AQUI ESTÁ A MUDANÇA =====>>>>
-st.image("https://placehold.co/1200x200/17a2b8/FFFFFF?text=Relatórios+Financeiros", use_container_width=True)
-st.title("📈 Relatórios Financeiros")
-# O título de texto simples foi removido e substituído pela imagem acima
-
-st.markdown("Analise completa de contas a pagar e receber.")
-
-df_receber_raw, df_pagar_raw = carregar_todos_dados_financeiros(supabase)
-
-tab_painel, tab_fluxo, tab_extrato = st.tabs(["Painel de Controle", "📊 Fluxo de Caixa Realizado", "📄 Extrato por Cliente"])
-
-with tab_painel:
-    st.subheader("Resumo Financeiro Instantâneo")
-    col1, col2, col3, col4 = st.columns(4)
-    
-    if not df_receber_raw.empty and 'status' in df_receber_raw.columns:
-        total_a_receber = pd.to_numeric(df_receber_raw[df_receber_raw['status'].isin(['Pendente', 'Atrasado'])]['valor_parcela'], errors='coerce').sum()
-        total_atrasado = pd.to_numeric(df_receber_raw[df_receber_raw['status'] == 'Atrasado']['valor_parcela'], errors='coerce').sum()
-    else:
-        total_a_receber = 0
-        total_atrasado = 0
-    col1.metric("💰 Total a Receber", formatar_moeda(total_a_receber))
-    col4.metric("⚠️ Recebimentos em Atraso", formatar_moeda(total_atrasado), delta_color="inverse")
-
-    recebido_mes_atual = 0
-    if not df_receber_raw.empty and 'data_pagamento' in df_receber_raw.columns and 'status' in df_receber_raw.columns:
-        df_receber_pagas = df_receber_raw.dropna(subset=['data_pagamento'])
-        if not df_receber_pagas.empty:
-            df_receber_pagas['data_pagamento'] = pd.to_datetime(df_receber_pagas['data_pagamento'])
-            recebido_mes_atual = pd.to_numeric(df_receber_pagas[(df_receber_pagas['status'] == 'Pago') & (df_receber_pagas['data_pagamento'].dt.month == pd.Timestamp.now().month) & (df_receber_pagas['data_pagamento'].dt.year == pd.Timestamp.now().year)]['valor_parcela']).sum()
-    col2.metric("✅ Recebido este Mês", formatar_moeda(recebido_mes_atual))
-
-    total_a_pagar = 0
-    if not df_pagar_raw.empty and 'status' in df_pagar_raw.columns:
-        total_a_pagar = pd.to_numeric(df_pagar_raw[df_pagar_raw['status'].isin(['Pendente', 'Atrasado'])]['valor'], errors='coerce').sum()
-    col3.metric("💸 Total a Pagar", formatar_moeda(total_a_pagar))
-    
-    # O resto da aba do painel continua...
-
-with tab_fluxo:
-    st.subheader("Análise de Fluxo de Caixa por Período")
-    
-    hoje = date.today()
-    col_data1, col_data2 = st.columns(2)
-    data_inicio = col_data1.date_input("Data de Início", value=hoje.replace(day=1))
-    data_fim = col_data2.date_input("Data de Fim", value=hoje)
-
-    if data_inicio > data_fim:
-        st.error("A data de início não pode ser posterior à data de fim.")
-    else:
-        df_receber_periodo = pd.DataFrame()
-        if not df_receber_raw.empty and 'data_pagamento' in df_receber_raw.columns:
-             df_receber_periodo = df_receber_raw.dropna(subset=['data_pagamento'])
-             df_receber_periodo['data_pagamento'] = pd.to_datetime(df_receber_periodo['data_pagamento'])
-             df_receber_periodo = df_receber_periodo[df_receber_periodo['data_pagamento'].dt.date.between(data_inicio, data_fim)]
-
-        df_pagar_periodo = pd.DataFrame()
-        if not df_pagar_raw.empty and 'data_pagamento' in df_pagar_raw.columns:
-            df_pagar_periodo = df_pagar_raw.dropna(subset=['data_pagamento'])
-            df_pagar_periodo['data_pagamento'] = pd.to_datetime(df_pagar_periodo['data_pagamento'])
-            df_pagar_periodo = df_pagar_periodo[df_pagar_periodo['data_pagamento'].dt.date.between(data_inicio, data_fim)]
-
-        total_recebido_periodo = pd.to_numeric(df_receber_periodo['valor_parcela']).sum() if not df_receber_periodo.empty else 0
-        total_pago_periodo = pd.to_numeric(df_pagar_periodo['valor']).sum() if not df_pagar_periodo.empty else 0
-        saldo_periodo = total_recebido_periodo - total_pago_periodo
+    st.markdown("Analise completa de contas a pagar e receber.")
 
-        st.markdown("---")
-        c1, c2, c3 = st.columns(3)
-        c1.metric("Total Recebido no Período", formatar_moeda(total_recebido_periodo))
-        c2.metric("Total Pago no Período", formatar_moeda(total_pago_periodo))
-        c3.metric("Saldo do Período", formatar_moeda(saldo_periodo))
-        
-        if not df_receber_periodo.empty:
-            df_receber_periodo['data'] = pd.to_datetime(df_receber_periodo['data_pagamento'])
-            receitas_mensais = df_receber_periodo.set_index('data').resample('M')['valor_parcela'].sum()
+    df_receber_raw, df_pagar_raw, versao_ledger = carregar_todos_dados_financeiros(supabase)
+
+    tab_painel, tab_fluxo, tab_projecao, tab_aging, tab_extrato, tab_exportar = st.tabs(["Painel de Controle", "📊 Fluxo de Caixa Realizado", "🔮 Projeção de Caixa", "⏳ Aging de Recebíveis", "📄 Extrato por Cliente", "📥 Exportar Planilhas"])
+
+    with tab_painel:
+        st.subheader("Resumo Financeiro Instantâneo")
+        col1, col2, col3, col4 = st.columns(4)
+
+        if not df_receber_raw.empty and 'status' in df_receber_raw.columns:
+            total_a_receber = pd.to_numeric(df_receber_raw[df_receber_raw['status'].isin(['Pendente', 'Atrasado'])]['valor_parcela'], errors='coerce').sum()
+            total_atrasado = pd.to_numeric(df_receber_raw[df_receber_raw['status'] == 'Atrasado']['valor_parcela'], errors='coerce').sum()
         else:
-            receitas_mensais = pd.Series()
-            
-        if not df_pagar_periodo.empty:
-            df_pagar_periodo['data'] = pd.to_datetime(df_pagar_periodo['data_pagamento'])
-            despesas_mensais = df_pagar_periodo.set_index('data').resample('M')['valor'].sum()
+            total_a_receber = 0
+            total_atrasado = 0
+        col1.metric("💰 Total a Receber", formatar_moeda(total_a_receber))
+        col4.metric("⚠️ Recebimentos em Atraso", formatar_moeda(total_atrasado), delta_color="inverse")
+
+        recebido_mes_atual = 0
+        if not df_receber_raw.empty and 'data_pagamento' in df_receber_raw.columns and 'status' in df_receber_raw.columns:
+            df_receber_pagas = df_receber_raw.dropna(subset=['data_pagamento'])
+            if not df_receber_pagas.empty:
+                df_receber_pagas['data_pagamento'] = pd.to_datetime(df_receber_pagas['data_pagamento'])
+                recebido_mes_atual = pd.to_numeric(df_receber_pagas[(df_receber_pagas['status'] == 'Pago') & (df_receber_pagas['data_pagamento'].dt.month == pd.Timestamp.now().month) & (df_receber_pagas['data_pagamento'].dt.year == pd.Timestamp.now().year)]['valor_parcela']).sum()
+        col2.metric("✅ Recebido este Mês", formatar_moeda(recebido_mes_atual))
+
+        total_a_pagar = 0
+        if not df_pagar_raw.empty and 'status' in df_pagar_raw.columns:
+            total_a_pagar = pd.to_numeric(df_pagar_raw[df_pagar_raw['status'].isin(['Pendente', 'Atrasado'])]['valor'], errors='coerce').sum()
+        col3.metric("💸 Total a Pagar", formatar_moeda(total_a_pagar))
+
+        # O resto da aba do painel continua...
+
+    with tab_fluxo:
+        st.subheader("Análise de Fluxo de Caixa por Período")
+
+        hoje = date.today()
+        col_data1, col_data2 = st.columns(2)
+        data_inicio = col_data1.date_input("Data de Início", value=hoje.replace(day=1))
+        data_fim = col_data2.date_input("Data de Fim", value=hoje)
+
+        if data_inicio > data_fim:
+            st.error("A data de início não pode ser posterior à data de fim.")
         else:
-            despesas_mensais = pd.Series()
-            
-        df_fluxo_caixa = pd.DataFrame({'Receitas': receitas_mensais, 'Despesas': despesas_mensais}).fillna(0)
-        
-        st.markdown("### Evolução Mensal (Receitas vs. Despesas)")
-        if not df_fluxo_caixa.empty:
-            st.bar_chart(df_fluxo_caixa)
+            df_receber_periodo = pd.DataFrame()
+            if not df_receber_raw.empty and 'data_pagamento' in df_receber_raw.columns:
+                 df_receber_periodo = df_receber_raw.dropna(subset=['data_pagamento'])
+                 df_receber_periodo['data_pagamento'] = pd.to_datetime(df_receber_periodo['data_pagamento'])
+                 df_receber_periodo = df_receber_periodo[df_receber_periodo['data_pagamento'].dt.date.between(data_inicio, data_fim)]
+
+            df_pagar_periodo = pd.DataFrame()
+            if not df_pagar_raw.empty and 'data_pagamento' in df_pagar_raw.columns:
+                df_pagar_periodo = df_pagar_raw.dropna(subset=['data_pagamento'])
+                df_pagar_periodo['data_pagamento'] = pd.to_datetime(df_pagar_periodo['data_pagamento'])
+                df_pagar_periodo = df_pagar_periodo[df_pagar_periodo['data_pagamento'].dt.date.between(data_inicio, data_fim)]
+
+            total_recebido_periodo = pd.to_numeric(df_receber_periodo['valor_parcela']).sum() if not df_receber_periodo.empty else 0
+            total_pago_periodo = pd.to_numeric(df_pagar_periodo['valor']).sum() if not df_pagar_periodo.empty else 0
+            saldo_periodo = total_recebido_periodo - total_pago_periodo
+
+            st.markdown("---")
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Total Recebido no Período", formatar_moeda(total_recebido_periodo))
+            c2.metric("Total Pago no Período", formatar_moeda(total_pago_periodo))
+            c3.metric("Saldo do Período", formatar_moeda(saldo_periodo))
+
+            if not df_receber_periodo.empty:
+                df_receber_periodo['data'] = pd.to_datetime(df_receber_periodo['data_pagamento'])
+                receitas_mensais = df_receber_periodo.set_index('data').resample('M')['valor_parcela'].sum()
+            else:
+                receitas_mensais = pd.Series()
+
+            if not df_pagar_periodo.empty:
+                df_pagar_periodo['data'] = pd.to_datetime(df_pagar_periodo['data_pagamento'])
+                despesas_mensais = df_pagar_periodo.set_index('data').resample('M')['valor'].sum()
+            else:
+                despesas_mensais = pd.Series()
+
+            df_fluxo_caixa = pd.DataFrame({'Receitas': receitas_mensais, 'Despesas': despesas_mensais}).fillna(0)
+
+            st.markdown("### Evolução Mensal (Receitas vs. Despesas)")
+            if not df_fluxo_caixa.empty:
+                st.bar_chart(df_fluxo_caixa)
+            else:
+                st.info("Nenhum dado financeiro no período selecionado para exibir o gráfico.")
+
+    with tab_projecao:
+        st.subheader("Projeção do Saldo de Caixa")
+        st.caption("Projeta o saldo a partir dos vencimentos das parcelas e contas a pagar em aberto. Itens já vencidos entram a partir de hoje.")
+
+        df_receber_norm, df_pagar_norm = carregar_ledger_normalizado(supabase)
+
+        col_p1, col_p2, col_p3 = st.columns(3)
+        horizonte_meses = col_p1.slider("Horizonte (meses)", min_value=1, max_value=36, value=12)
+        frequencia_label = col_p2.radio("Agrupamento", list(FREQUENCIAS_PROJECAO.keys()), index=2, horizontal=True)
+        saldo_inicial = col_p3.number_input("Saldo Inicial em Caixa (R$)", value=0.0, format="%.2f")
+
+        col_p4, col_p5, col_p6 = st.columns(3)
+        modo_inadimplencia = col_p4.selectbox("Inadimplência", ["Taxa única", "Histórico de cada cliente"])
+        if modo_inadimplencia == "Taxa única":
+            taxa_inadimplencia = col_p4.slider("Taxa de inadimplência (%)", min_value=0, max_value=100, value=0) / 100
+        else:
+            taxa_inadimplencia = taxa_inadimplencia_historica(df_receber_norm)
+        atraso_medio = col_p5.number_input("Atraso médio dos recebimentos (dias)", min_value=0, value=0, step=1)
+        atraso_desvio = col_p6.number_input("Variação do atraso (desvio, dias)", min_value=0, value=0, step=1)
+
+        df_projecao = projetar_fluxo_caixa(
+            df_receber_norm, df_pagar_norm, meses=horizonte_meses, frequencia=FREQUENCIAS_PROJECAO[frequencia_label],
+            taxa_inadimplencia=taxa_inadimplencia, atraso_medio=atraso_medio, atraso_desvio=atraso_desvio,
+            saldo_inicial=saldo_inicial
+        )
+
+        st.markdown("---")
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Entradas Previstas", formatar_moeda(df_projecao['entradas'].sum()))
+        c2.metric("Saídas Previstas", formatar_moeda(df_projecao['saidas'].sum()))
+        c3.metric("Saldo ao Final", formatar_moeda(df_projecao['saldo_acumulado'].iloc[-1]))
+        c4.metric("Menor Saldo Projetado", formatar_moeda(df_projecao['saldo_acumulado'].min()),
+                  help=f"Em {df_projecao['saldo_acumulado'].idxmin().strftime('%d/%m/%Y')}")
+
+        st.markdown("### Saldo Acumulado")
+        st.line_chart(df_projecao['saldo_acumulado'])
+        st.markdown("### Entradas vs. Saídas")
+        st.bar_chart(df_projecao[['entradas', 'saidas']].rename(columns={'entradas': 'Entradas', 'saidas': 'Saídas'}))
+
+        df_projecao_display = pd.DataFrame({
+            'Período': df_projecao.index.strftime('%d/%m/%Y'),
+            'Entradas': df_projecao['entradas'].apply(formatar_moeda),
+            'Saídas': df_projecao['saidas'].apply(formatar_moeda),
+            'Líquido': df_projecao['liquido'].apply(formatar_moeda),
+            'Saldo Acumulado': df_projecao['saldo_acumulado'].apply(formatar_moeda),
+        })
+        st.dataframe(df_projecao_display, use_container_width=True, hide_index=True)
+
+    with tab_aging:
+        st.subheader("Aging de Recebíveis em Aberto")
+
+        df_aging = carregar_aging(supabase)
+
+        if df_aging.empty:
+            st.info("Nenhuma parcela em aberto.")
         else:
-            st.info("Nenhum dado financeiro no período selecionado para exibir o gráfico.")
-
-with tab_extrato:
-    st.subheader("Extrato Financeiro por Cliente")
-    df_clientes_com_debitos = carregar_clientes_com_debitos(supabase)
-
-    if df_clientes_com_debitos.empty:
-        st.info("Nenhum cliente com débitos lançados foi encontrado.")
-    else:
-        clientes_dict = pd.Series(df_clientes_com_debitos.id.values, index=df_clientes_com_debitos.nome).to_dict()
-        cliente_selecionado_nome = st.selectbox("Selecione um cliente para gerar o extrato", options=clientes_dict.keys())
-
-        if cliente_selecionado_nome:
-            cliente_id = clientes_dict[cliente_selecionado_nome]
-            
-            extrato_df = df_receber_raw[df_receber_raw['clientes'].apply(lambda x: x['id'] if isinstance(x, dict) else -1) == cliente_id]
-            extrato_df = extrato_df.sort_values('data_vencimento')
-
-            if extrato_df.empty:
-                st.warning("Este cliente não possui parcelas.")
+            col_a1, col_a2 = st.columns(2)
+            agrupamento = col_a1.radio("Agrupar por", ["Cliente", "Obra"], horizontal=True)
+            incluir_a_vencer = col_a2.toggle("Incluir parcelas a vencer", value=False)
+            coluna_grupo = 'nome_cliente' if agrupamento == "Cliente" else 'nome_obra'
+
+            df_aging_visivel = df_aging if incluir_a_vencer else df_aging[df_aging['faixa'] != "A vencer"]
+            faixas_visiveis = FAIXAS_AGING if incluir_a_vencer else FAIXAS_AGING[1:]
+
+            totais_faixa = df_aging_visivel.groupby('faixa', observed=False)['valor'].sum()
+            for coluna, faixa in zip(st.columns(len(faixas_visiveis)), faixas_visiveis):
+                coluna.metric(faixa, formatar_moeda(totais_faixa.get(faixa, 0.0)))
+
+            df_resumo_aging = resumir_aging(df_aging_visivel, coluna_grupo)[faixas_visiveis + ['Total']]
+            st.dataframe(df_resumo_aging.map(formatar_moeda), use_container_width=True)
+
+            st.markdown("### Detalhar Faixa")
+            col_d1, col_d2 = st.columns(2)
+            faixa_selecionada = col_d1.selectbox("Faixa", faixas_visiveis)
+            grupo_selecionado = col_d2.selectbox(agrupamento, ["Todos"] + df_resumo_aging.index.tolist())
+
+            df_detalhe = df_aging_visivel[df_aging_visivel['faixa'] == faixa_selecionada]
+            if grupo_selecionado != "Todos":
+                df_detalhe = df_detalhe[df_detalhe[coluna_grupo] == grupo_selecionado]
+
+            if df_detalhe.empty:
+                st.info("Nenhuma parcela nesta faixa.")
             else:
-                total_debitos = pd.to_numeric(extrato_df['valor_parcela']).sum()
-                total_pago = pd.to_numeric(extrato_df[extrato_df['status'] == 'Pago']['valor_parcela']).sum()
-                saldo_devedor = total_debitos - total_pago
-
-                st.markdown("---")
-                c1, c2, c3 = st.columns(3)
-                c1.metric("Valor Total em Débitos", formatar_moeda(total_debitos))
-                c2.metric("Total Pago", formatar_moeda(total_pago))
-                c3.metric("Saldo Devedor", formatar_moeda(saldo_devedor))
-
-                df_display = extrato_df.copy()
-                df_display['Vencimento'] = pd.to_datetime(df_display['data_vencimento']).dt.strftime('%d/%m/%Y')
-                df_display['Valor'] = df_display['valor_parcela'].apply(formatar_moeda)
-                df_display['Status'] = df_display['status']
-                df_display['Data Pagamento'] = pd.to_datetime(df_display['data_pagamento']).dt.strftime('%d/%m/%Y').fillna('---')
-                
-                debitos_cliente_resp = supabase.table('debitos').select('descricao').eq('cliente_id', cliente_id).execute()
-                descricoes = [d['descricao'] for d in debitos_cliente_resp.data]
-                df_display['Descrição'] = ", ".join(descricoes) if descricoes else "Débito Geral"
-                
-                st.dataframe(df_display[['Vencimento', 'Descrição', 'Valor', 'Status', 'Data Pagamento']], use_container_width=True, hide_index=True)
-
-                totais = {"total_debitos": formatar_moeda(total_debitos), "total_pago": formatar_moeda(total_pago), "saldo_devedor": formatar_moeda(saldo_devedor)}
-                pdf_bytes = gerar_extrato_cliente_pdf(df_display, cliente_selecionado_nome, totais)
-                st.download_button(
-                    label="📄 Gerar Extrato em PDF",
-                    data=pdf_bytes,
-                    file_name=f"extrato_{cliente_selecionado_nome.replace(' ', '_')}.pdf",
-                    mime="application/pdf"
-                )
\ No newline at end of file
+                df_detalhe = df_detalhe.sort_values('dias_atraso', ascending=False)
+                st.dataframe(pd.DataFrame({
+                    'Cliente': df_detalhe['nome_cliente'],
+                    'Obra': df_detalhe['nome_obra'],
+                    'Débito': df_detalhe['descricao_debito'],
+                    'Parcela': df_detalhe['numero_parcela'],
+                    'Vencimento': df_detalhe['data_vencimento'].dt.strftime('%d/%m/%Y'),
+                    'Dias em Atraso': df_detalhe['dias_atraso'].clip(lower=0),
+                    'Valor': df_detalhe['valor'].apply(formatar_moeda),
+                }), use_container_width=True, hide_index=True)
+
+    with tab_extrato:
+        st.subheader("Extrato Financeiro por Cliente")
+        df_clientes_com_debitos, indice_extratos = carregar_indice_extratos(versao_ledger, supabase)
+
+        if df_clientes_com_debitos.empty:
+            st.info("Nenhum cliente com débitos lançados foi encontrado.")
+        else:
+            clientes_dict = pd.Series(df_clientes_com_debitos.id.values, index=df_clientes_com_debitos.nome).to_dict()
+            cliente_selecionado_nome = st.selectbox("Selecione um cliente para gerar o extrato", options=clientes_dict.keys())
+
+            if cliente_selecionado_nome:
+                cliente_id = clientes_dict[cliente_selecionado_nome]
+                extrato_df = indice_extratos.get(cliente_id, pd.DataFrame())
+
+                if extrato_df.empty:
+                    st.warning("Este cliente não possui parcelas.")
+                else:
+                    total_debitos = extrato_df['valor'].sum()
+                    total_pago = extrato_df.loc[extrato_df['status'] == 'Pago', 'valor'].sum()
+                    saldo_devedor = total_debitos - total_pago
+
+                    st.markdown("---")
+                    c1, c2, c3 = st.columns(3)
+                    c1.metric("Valor Total em Débitos", formatar_moeda(total_debitos))
+                    c2.metric("Total Pago", formatar_moeda(total_pago))
+                    c3.metric("Saldo Devedor", formatar_moeda(saldo_devedor))
+
+                    df_display = pd.DataFrame({
+                        'Vencimento': extrato_df['data_vencimento'].dt.strftime('%d/%m/%Y'),
+                        'Descrição': extrato_df['descricao_debito'].fillna("Débito Geral"),
+                        'Valor': extrato_df['valor'].apply(formatar_moeda),
+                        'Status': extrato_df['status'],
+                        'Data Pagamento': extrato_df['data_pagamento'].dt.strftime('%d/%m/%Y').fillna('---'),
+                    })
+
+                    st.dataframe(df_display[['Vencimento', 'Descrição', 'Valor', 'Status', 'Data Pagamento']], use_container_width=True, hide_index=True)
+
+                    totais = {"total_debitos": formatar_moeda(total_debitos), "total_pago": formatar_moeda(total_pago), "saldo_devedor": formatar_moeda(saldo_devedor)}
+                    botao_pdf("📄 Gerar Extrato em PDF", f"extrato_{cliente_id}_{versao_ledger}",
+                              lambda: gerar_extrato_cliente_pdf(df_display, cliente_selecionado_nome, totais),
+                              f"extrato_{cliente_selecionado_nome.replace(' ', '_')}.pdf")
+
+    with tab_exportar:
+        st.subheader("Exportar Planilhas")
+        st.caption("Planilhas completas para a contabilidade, lidas do banco em lotes e montadas só quando você clica em baixar. "
+                   "O CSV usa ';' como separador e vírgula decimal; no Excel, valores e datas saem como números formatados.")
+        c1, c2 = st.columns([2, 1])
+        relatorio_exportar = c1.selectbox("Relatório", list(exportacao.RELATORIOS))
+        formato_exportar = c2.radio("Formato", list(exportacao.FORMATOS), horizontal=True)
+        parametros_exportar = {}
+        nome_arquivo = sanitizar_nome_arquivo(relatorio_exportar.lower())
+        if exportacao.RELATORIOS[relatorio_exportar]['periodo']:
+            hoje = date.today()
+            c3, c4 = st.columns(2)
+            parametros_exportar['inicio'] = c3.date_input("De", value=hoje.replace(month=1, day=1), format="DD/MM/YYYY", key="exportar_inicio")
+            parametros_exportar['fim'] = c4.date_input("Até", value=hoje, format="DD/MM/YYYY", key="exportar_fim")
+            nome_arquivo += f"_{parametros_exportar['inicio']:%Y%m%d}_{parametros_exportar['fim']:%Y%m%d}"
+        extensao, mime = exportacao.FORMATOS[formato_exportar]
+        if parametros_exportar and parametros_exportar['inicio'] > parametros_exportar['fim']:
+            st.error("A data de início não pode ser posterior à data de fim.")
+        else:
+            st.download_button(f"⬇️ Baixar {relatorio_exportar}", on_click="ignore", use_container_width=True,
+                               data=lambda: exportacao.exportar(supabase, relatorio_exportar, formato_exportar, **parametros_exportar),
+                               file_name=f"{nome_arquivo}.{extensao}", mime=mime)
+finally:
+    painel_de_desempenho()
\ No newline at end of file
@@ -0,0 +1,137 @@
+# recibos.py
+# Geração dos PDFs (recibos e extratos) das páginas.
+# O ReportLab é importado só quando um PDF é pedido, para não pesar na abertura das páginas.
+from datetime import date
+from io import BytesIO
+import pandas as pd
+from utils import formatar_moeda
+from instrumentacao import medir
+
+@medir('pdf')
+def gerar_recibo_pdf(parcela, cliente_nome, debito_desc):
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    p.drawString(100, 750, "RECIBO DE PAGAMENTO")
+    p.drawString(100, 730, "--------------------------------------------------")
+    p.drawString(100, 710, f"Recebemos de: {cliente_nome}")
+    p.drawString(100, 690, f"O valor de: {formatar_moeda(parcela['valor_parcela'])}")
+    p.drawString(100, 670, f"Referente a: Parcela {parcela['numero_parcela']} - {debito_desc}")
+    p.drawString(100, 650, f"Data do Pagamento: {pd.to_datetime(parcela['data_pagamento']).strftime('%d/%m/%Y')}")
+    p.drawString(100, 610, "_________________________")
+    p.drawString(100, 600, "Assinatura (Construtora)")
+    p.showPage(); p.save(); buffer.seek(0)
+    return buffer
+
+@medir('pdf')
+def gerar_recibo_comissao_pdf(comissao, corretor_nome):
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    p.drawString(100, height - 100, "RECIBO DE PAGAMENTO DE COMISSÃO")
+    p.drawString(100, height - 120, "--------------------------------------------------")
+    p.drawString(100, height - 140, f"Pagamos a: {corretor_nome}")
+    p.drawString(100, height - 160, f"O valor de: {formatar_moeda(comissao['valor_comissao'])}")
+    p.drawString(100, height - 180, f"Referente a: Comissão da venda - {comissao['descricao_venda']}")
+    p.drawString(100, height - 200, f"Data do Pagamento: {pd.to_datetime(comissao['data_pagamento']).strftime('%d/%m/%Y')}")
+    p.drawString(100, height - 240, "_________________________")
+    p.drawString(100, height - 250, "Assinatura (Construtora)")
+    p.showPage(); p.save(); buffer.seek(0)
+    return buffer
+
+@medir('pdf')
+def gerar_recibo_comissoes_consolidado_pdf(df_pagas: pd.DataFrame, corretor_nome: str, inicio: date, fim: date):
+    """Um único recibo com todas as comissões pagas ao corretor no período, no lugar de um recibo por comissão."""
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    total = pd.to_numeric(df_pagas['valor_comissao'], errors='coerce').sum()
+
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(72, height - 72, "RECIBO DE PAGAMENTO DE COMISSÕES")
+    p.setFont("Helvetica", 11)
+    p.drawString(72, height - 95, f"Pagamos a: {corretor_nome}")
+    p.drawString(72, height - 110, f"Período: {inicio.strftime('%d/%m/%Y')} a {fim.strftime('%d/%m/%Y')}")
+    p.drawString(72, height - 125, f"Valor total: {formatar_moeda(total)} ({len(df_pagas)} comissão(ões))")
+
+    y = height - 160
+    p.setFont("Helvetica-Bold", 9)
+    p.drawString(75, y, "Data Pgto.")
+    p.drawString(145, y, "Venda")
+    p.drawString(395, y, "Valor da Venda")
+    p.drawString(485, y, "Comissão")
+    y -= 15
+
+    p.setFont("Helvetica", 9)
+    for comissao in df_pagas.sort_values('data_pagamento').itertuples(index=False):
+        if y < 110:
+            p.showPage()
+            y = height - 72
+            p.setFont("Helvetica", 9)
+        p.drawString(75, y, pd.to_datetime(comissao.data_pagamento).strftime('%d/%m/%Y'))
+        p.drawString(145, y, str(comissao.descricao_venda)[:55])
+        p.drawString(395, y, formatar_moeda(comissao.valor_venda))
+        p.drawString(485, y, formatar_moeda(comissao.valor_comissao))
+        y -= 12
+
+    p.setFont("Helvetica", 11)
+    p.drawString(72, y - 40, "_________________________")
+    p.drawString(72, y - 52, "Assinatura (Construtora)")
+    p.showPage(); p.save(); buffer.seek(0)
+    return buffer
+
+@medir('pdf')
+def gerar_extrato_cliente_pdf(df_extrato: pd.DataFrame, cliente_nome: str, totais: dict):
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(72, height - 72, f"Extrato Financeiro - {cliente_nome}")
+    p.setFont("Helvetica", 10)
+    p.drawString(72, height - 90, f"Gerado em: {date.today().strftime('%d/%m/%Y')}")
+    
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(72, height - 120, "Resumo:")
+    p.setFont("Helvetica", 11)
+    p.drawString(72, height - 135, f"Valor Total dos Débitos: {totais['total_debitos']}")
+    p.drawString(72, height - 150, f"Total Pago: {totais['total_pago']}")
+    p.drawString(72, height - 165, f"Saldo Devedor: {totais['saldo_devedor']}")
+
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(72, height - 200, "Histórico de Parcelas:")
+    
+    y = height - 220
+    p.setFont("Helvetica-Bold", 9)
+    p.drawString(75, y, "Vencimento")
+    p.drawString(155, y, "Descrição")
+    p.drawString(355, y, "Valor")
+    p.drawString(425, y, "Status")
+    p.drawString(505, y, "Data Pgto.")
+    y -= 15
+    
+    p.setFont("Helvetica", 9)
+    for _, row in df_extrato.iterrows():
+        if y < 60:
+            p.showPage()
+            y = height - 72
+            p.setFont("Helvetica", 9)
+            
+        p.drawString(75, y, str(row['Vencimento']))
+        p.drawString(155, y, str(row['Descrição']))
+        p.drawString(355, y, str(row['Valor']))
+        p.drawString(425, y, str(row['Status']))
+        p.drawString(505, y, str(row['Data Pagamento']))
+        y -= 12
+        
+    p.showPage()
+    p.save()
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,91 @@
+# recorrencias.py
+# Contas a pagar recorrentes (aluguel, locação de equipamentos, mão de obra fixa): regras por fornecedor
+# e obra que geram as contas de uma janela móvel num único upsert idempotente. Sem Streamlit.
+import calendar
+from datetime import date, timedelta
+
+TABELA_REGRAS = 'contas_recorrentes'
+# Coluna única em contas_a_pagar ('<regra>:<vencimento>'): gerar de novo a mesma conta não a duplica
+COLUNA_CHAVE = 'chave_recorrencia'
+FREQUENCIAS = {"Mensal": None, "Quinzenal": 15, "Semanal": 7}
+JANELA_DIAS = 90
+TAMANHO_LOTE = 1000
+
+# --- Datas e Valores ---
+def _normalizar(regra: dict) -> dict:
+    """Regra vinda de um DataFrame: NaN vira None e os ids voltam a ser inteiros."""
+    regra = {k: (None if isinstance(v, float) and v != v else v) for k, v in regra.items()}
+    for coluna in ('id', 'fornecedor_id', 'obra_id'):
+        if regra.get(coluna) is not None:
+            regra[coluna] = int(regra[coluna])
+    return regra
+
+def _somar_meses(data: date, meses: int) -> date:
+    """Mesmo dia 'meses' depois; dias que não existem no mês caem no último dia (31/01 -> 28/02)."""
+    total = data.month - 1 + meses
+    ano, mes = data.year + total // 12, total % 12 + 1
+    return date(ano, mes, min(data.day, calendar.monthrange(ano, mes)[1]))
+
+def vencimento(regra: dict, n: int) -> date:
+    """n-ésimo vencimento da regra (0 = data de início), sempre calculado a partir do início para não acumular ajustes de fim de mês."""
+    inicio = date.fromisoformat(str(regra['data_inicio']))
+    passo = FREQUENCIAS[regra['frequencia']]
+    return _somar_meses(inicio, n) if passo is None else inicio + timedelta(days=passo * n)
+
+def valor_em(regra: dict, data: date) -> float:
+    """Valor da regra com o reajuste anual (%) aplicado a cada aniversário da data de início."""
+    inicio = date.fromisoformat(str(regra['data_inicio']))
+    anos = data.year - inicio.year - ((data.month, data.day) < (inicio.month, inicio.day))
+    reajuste = float(regra.get('reajuste_anual') or 0.0)
+    return round(float(regra['valor']) * (1 + reajuste / 100) ** max(anos, 0), 2)
+
+def vencimentos_entre(regra: dict, desde: date, ate: date) -> list:
+    """Vencimentos da regra em [desde, ate], limitados pela data de fim da regra."""
+    fim = date.fromisoformat(str(regra['data_fim'])) if regra.get('data_fim') else None
+    ate = min(ate, fim) if fim else ate
+    datas, n = [], 0
+    while (data := vencimento(regra, n)) <= ate:
+        if data >= desde:
+            datas.append(data)
+        n += 1
+    return datas
+
+def contas_da_regra(regra: dict, desde: date, ate: date) -> list:
+    """Linhas de contas_a_pagar da regra entre as datas, com a chave que as torna idempotentes."""
+    return [{
+        'fornecedor_id': regra['fornecedor_id'], 'obra_id': regra.get('obra_id'), 'descricao': regra['descricao'],
+        'valor': valor_em(regra, data), 'data_vencimento': data.isoformat(), 'status': 'Pendente',
+        'recorrencia_id': regra['id'], COLUNA_CHAVE: f"{regra['id']}:{data.isoformat()}",
+    } for data in vencimentos_entre(regra, desde, ate)]
+
+# --- Supabase ---
+def carregar_regras(supabase, apenas_ativas: bool = True):
+    consulta = supabase.table(TABELA_REGRAS).select('*, fornecedores(nome_razao_social), obras(nome_obra)')
+    if apenas_ativas:
+        consulta = consulta.eq('ativo', True)
+    return consulta.order('descricao').execute().data
+
+def materializar(supabase, hoje: date = None, janela_dias: int = JANELA_DIAS, regras: list = None) -> int:
+    """
+    Gera as contas de todas as regras ativas até hoje + 'janela_dias' e devolve quantas foram enviadas.
+    Cada regra continua de onde parou ('gerada_ate'); uma regra nova começa hoje (ou na data de início,
+    se for futura), sem lançar como pendentes os vencimentos já passados. As contas vão num único upsert
+    que ignora as chaves já existentes, então rodar de novo (ou em duas sessões ao mesmo tempo) não duplica nada.
+    """
+    hoje = hoje or date.today()
+    ate = hoje + timedelta(days=janela_dias)
+    regras = carregar_regras(supabase) if regras is None else regras
+    linhas, atualizadas = [], []
+    for regra in map(_normalizar, regras):
+        gerada_ate = date.fromisoformat(str(regra['gerada_ate'])) if regra.get('gerada_ate') else None
+        if gerada_ate and gerada_ate >= ate:
+            continue
+        desde = gerada_ate + timedelta(days=1) if gerada_ate else max(date.fromisoformat(str(regra['data_inicio'])), hoje)
+        linhas += contas_da_regra(regra, desde, ate)
+        atualizadas.append(regra['id'])
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        supabase.table('contas_a_pagar').upsert(linhas[inicio:inicio + TAMANHO_LOTE], on_conflict=COLUNA_CHAVE,
+                                                ignore_duplicates=True).execute()
+    if atualizadas:
+        supabase.table(TABELA_REGRAS).update({'gerada_ate': ate.isoformat()}).in_('id', atualizadas).execute()
+    return len(linhas)
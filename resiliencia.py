@@ -0,0 +1,159 @@
+# resiliencia.py
+# Orçamento de latência das chamadas ao Supabase: tempo limite por operação, novas tentativas
+# (com espera aleatória) só para leituras e um disjuntor por tipo de chamada.
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TempoEsgotado
+
+import httpx
+
+# Tempo máximo (s) de cada tentativa, por tipo de chamada
+TEMPOS_LIMITE = {'consulta': 10.0, 'rpc': 20.0, 'storage': 30.0}
+RETENTATIVAS = 2
+ESPERA_BASE_S = 0.25
+# Disjuntor: abre após N falhas seguidas e deixa passar uma chamada de teste depois do intervalo
+FALHAS_PARA_ABRIR = 5
+SEGUNDOS_ABERTO = 30.0
+
+# Leituras que podem ser repetidas sem efeito colateral
+RPCS_DE_LEITURA = {'get_clientes_arquivados', 'resumo_financeiro_obras'}
+OPERACOES_STORAGE_DE_LEITURA = {'list', 'download'}
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="supabase")
+# Tempo limite da chamada em curso em cada thread do _executor, lido pelo transporte HTTP
+_prazo = threading.local()
+
+class CircuitoAberto(Exception):
+    """O backend está degradado e as chamadas deste tipo estão sendo recusadas sem tentar."""
+
+class Disjuntor:
+    """Fechado: chamadas passam. Aberto: recusa até o intervalo passar. Meio aberto: uma chamada de teste."""
+    def __init__(self, nome: str):
+        self.nome = nome
+        self._trava = threading.Lock()
+        self._falhas = 0
+        self._aberto_ate = 0.0
+        self._testando = False
+
+    @property
+    def estado(self) -> str:
+        if self._falhas < FALHAS_PARA_ABRIR:
+            return 'fechado'
+        return 'aberto' if time.monotonic() < self._aberto_ate else 'meio_aberto'
+
+    def permitir(self):
+        with self._trava:
+            estado = self.estado
+            if estado == 'fechado':
+                return
+            if estado == 'meio_aberto' and not self._testando:
+                self._testando = True
+                return
+        raise CircuitoAberto(f"Supabase indisponível ({self.nome}); tentando de novo em instantes.")
+
+    def sucesso(self):
+        with self._trava:
+            self._falhas = 0
+            self._testando = False
+
+    def liberar(self):
+        """Chamada que não chegou ao servidor: não conta como sucesso nem falha, só devolve a vez do teste."""
+        with self._trava:
+            self._testando = False
+
+    def falha(self):
+        with self._trava:
+            self._falhas += 1
+            self._testando = False
+            if self._falhas >= FALHAS_PARA_ABRIR:
+                self._aberto_ate = time.monotonic() + SEGUNDOS_ABERTO
+
+DISJUNTORES = {tipo: Disjuntor(tipo) for tipo in TEMPOS_LIMITE}
+
+def falha_transitoria(erro: Exception) -> bool:
+    """
+    Tempo esgotado, erro de rede ou resposta HTTP 5xx; erros de validação, permissão e do Postgres não contam.
+    O 'code' de um APIError é o SQLSTATE (texto: '23505', '42501'...) quando o PostgREST responde; só quando
+    a resposta não é JSON (ex.: 502/503 do gateway) ele vem como o status HTTP, um int.
+    """
+    if isinstance(erro, (TempoEsgotado, TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    codigo = getattr(erro, 'code', None)
+    if isinstance(codigo, int) and codigo >= 500:
+        return True
+    resposta = getattr(erro, 'response', None)
+    for status in (getattr(resposta, 'status_code', None), getattr(erro, 'status', None)):
+        if str(status).isdigit() and int(status) >= 500:
+            return True
+    return False
+
+# --- HTTP ---
+class TransportePorPrazo(httpx.BaseTransport):
+    """
+    Transporte que aplica a cada requisição o tempo limite da chamada que a fez (consulta, RPC ou Storage),
+    para a conexão e a thread serem liberadas junto com a chamada em vez de esperar o maior dos limites.
+    """
+    def __init__(self, transporte: httpx.BaseTransport = None):
+        self._transporte = transporte or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        segundos = getattr(_prazo, 'segundos', None)
+        if segundos is not None:
+            request.extensions['timeout'] = httpx.Timeout(segundos).as_dict()
+        return self._transporte.handle_request(request)
+
+    def close(self):
+        self._transporte.close()
+
+def cliente_http() -> httpx.Client:
+    """Cliente HTTP do Supabase (banco, Storage e Auth). Fora de 'chamar' (ex.: login) vale o limite das consultas."""
+    return httpx.Client(transport=TransportePorPrazo(), timeout=TEMPOS_LIMITE['consulta'], follow_redirects=True)
+
+def _com_prazo(iniciou: threading.Event, segundos: float, funcao, *args, **kwargs):
+    iniciou.set()
+    _prazo.segundos = segundos
+    try:
+        return funcao(*args, **kwargs)
+    finally:
+        _prazo.segundos = None
+
+def e_leitura(tipo: str, nome: str) -> bool:
+    if tipo == 'consulta':
+        return nome.endswith('.select')
+    if tipo == 'rpc':
+        return nome in RPCS_DE_LEITURA
+    return nome.rsplit('.', 1)[-1] in OPERACOES_STORAGE_DE_LEITURA
+
+def chamar(tipo: str, nome: str, funcao, *args, **kwargs):
+    """
+    Executa 'funcao' com o tempo limite do tipo, contado a partir do momento em que uma thread do
+    _executor começa a chamada. Leituras com falha transitória são repetidas (espera exponencial com
+    sorteio); escritas nunca, para não duplicar efeitos. A espera por uma thread livre tem o mesmo limite,
+    mas não conta para o disjuntor: o servidor nem foi chamado.
+    """
+    disjuntor = DISJUNTORES[tipo]
+    tentativas = 1 + (RETENTATIVAS if e_leitura(tipo, nome) else 0)
+    for tentativa in range(tentativas):
+        disjuntor.permitir()
+        iniciou = threading.Event()
+        futuro = _executor.submit(_com_prazo, iniciou, TEMPOS_LIMITE[tipo], funcao, *args, **kwargs)
+        if not iniciou.wait(TEMPOS_LIMITE[tipo]) and futuro.cancel():
+            disjuntor.liberar()
+            raise TimeoutError(f"{nome}: nenhuma conexão livre em {TEMPOS_LIMITE[tipo]:.0f} s")
+        try:
+            resultado = futuro.result(timeout=TEMPOS_LIMITE[tipo])
+        except Exception as erro:
+            if not falha_transitoria(erro):
+                disjuntor.sucesso()  # o servidor respondeu; o erro é da requisição
+                raise
+            disjuntor.falha()
+            if isinstance(erro, TempoEsgotado):
+                futuro.cancel()
+                erro = TimeoutError(f"{nome}: sem resposta em {TEMPOS_LIMITE[tipo]:.0f} s")
+            if tentativa == tentativas - 1:
+                raise erro
+            time.sleep(ESPERA_BASE_S * 2 ** tentativa * random.uniform(0.5, 1.5))
+        else:
+            disjuntor.sucesso()
+            return resultado
@@ -0,0 +1,18 @@
+# tests/test_financeiro.py
+# Regressões dos cálculos de financeiro.py. Rodar da raiz do projeto: python -m pytest tests
+import pandas as pd
+
+import financeiro
+
+# --- Ledger Vazio ---
+def test_aging_com_ledger_vazio():
+    df_receber = financeiro.normalizar_ledger_receber(pd.DataFrame())
+    df_aging = financeiro.calcular_aging(df_receber, pd.Timestamp('2026-03-10'))
+    assert df_aging.empty
+    assert {'dias_atraso', 'faixa'} <= set(df_aging.columns)
+
+def test_ledger_pagar_vazio_com_datas():
+    df_pagar = financeiro.normalizar_ledger_pagar(pd.DataFrame())
+    assert df_pagar.empty
+    assert pd.api.types.is_datetime64_any_dtype(df_pagar['data_vencimento'])
+    assert pd.api.types.is_datetime64_any_dtype(df_pagar['data_pagamento'])
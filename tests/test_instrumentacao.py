@@ -0,0 +1,33 @@
+# tests/test_instrumentacao.py
+# Medição das execuções das páginas. Rodar da raiz do projeto: python -m pytest tests
+from streamlit.testing.v1 import AppTest
+
+import instrumentacao
+
+PAGINA = """
+import streamlit as st
+from instrumentacao import iniciar_execucao, painel_de_desempenho
+iniciar_execucao("{nome}")
+try:
+    st.session_state.setdefault("execucoes", 0)
+    st.session_state.execucoes += 1
+    if st.session_state.execucoes == 1:
+        st.{interrupcao}()
+    st.write("fim")
+finally:
+    painel_de_desempenho()
+"""
+
+def _execucoes(nome):
+    return [e for e in instrumentacao.eventos() if e['tipo'] == 'execucao' and e['pagina'] == nome]
+
+# --- Execuções Interrompidas ---
+def test_execucao_encerrada_por_rerun_e_medida():
+    at = AppTest.from_string(PAGINA.format(nome="teste_rerun", interrupcao="rerun")).run()
+    assert not at.exception
+    assert [e['execucao'] for e in _execucoes("teste_rerun")] == [1, 2]
+
+def test_execucao_encerrada_por_stop_e_medida():
+    at = AppTest.from_string(PAGINA.format(nome="teste_stop", interrupcao="stop")).run()
+    assert not at.exception
+    assert [e['execucao'] for e in _execucoes("teste_stop")] == [1]
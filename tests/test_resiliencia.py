@@ -0,0 +1,92 @@
+# tests/test_resiliencia.py
+# Classificação das falhas e disjuntor de resiliencia.py. Rodar da raiz do projeto: python -m pytest tests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError, generate_default_error_message
+
+import resiliencia
+
+def _erro_do_gateway(status: int) -> APIError:
+    # Resposta que não é JSON: o postgrest põe o status HTTP (int) em 'code'
+    return APIError(generate_default_error_message(httpx.Response(status, text="<html>Bad Gateway</html>")))
+
+def _erro_do_postgres(sqlstate: str) -> APIError:
+    return APIError({'message': 'erro', 'code': sqlstate, 'hint': None, 'details': None})
+
+@pytest.fixture
+def disjuntor(monkeypatch):
+    monkeypatch.setattr(resiliencia, 'ESPERA_BASE_S', 0.0)
+    novo = resiliencia.Disjuntor('consulta')
+    monkeypatch.setitem(resiliencia.DISJUNTORES, 'consulta', novo)
+    return novo
+
+def _falhar(erro):
+    raise erro
+
+# --- Classificação ---
+@pytest.mark.parametrize('status', [500, 502, 503, 504])
+def test_status_do_gateway_e_transitorio(status):
+    assert resiliencia.falha_transitoria(_erro_do_gateway(status))
+
+@pytest.mark.parametrize('sqlstate', ['23505', '42501', '57014', 'PGRST116'])
+def test_sqlstate_nao_e_transitorio(sqlstate):
+    assert not resiliencia.falha_transitoria(_erro_do_postgres(sqlstate))
+
+def test_erro_http_4xx_do_gateway_nao_e_transitorio():
+    assert not resiliencia.falha_transitoria(_erro_do_gateway(404))
+
+# --- Disjuntor ---
+def test_falhas_do_gateway_abrem_o_disjuntor(disjuntor):
+    for _ in range(resiliencia.FALHAS_PARA_ABRIR):
+        with pytest.raises(APIError):
+            resiliencia.chamar('consulta', 'obras.insert', _falhar, _erro_do_gateway(503))
+    assert disjuntor.estado == 'aberto'
+    with pytest.raises(resiliencia.CircuitoAberto):
+        resiliencia.chamar('consulta', 'obras.insert', _falhar, _erro_do_gateway(503))
+
+def test_erros_do_postgres_mantem_o_disjuntor_fechado(disjuntor):
+    for _ in range(resiliencia.FALHAS_PARA_ABRIR + 1):
+        with pytest.raises(APIError):
+            resiliencia.chamar('consulta', 'obras.insert', _falhar, _erro_do_postgres('23505'))
+    assert disjuntor.estado == 'fechado'
+
+def test_leitura_repete_erro_do_gateway(disjuntor):
+    tentativas = []
+    def ler():
+        tentativas.append(1)
+        if len(tentativas) == 1:
+            raise _erro_do_gateway(502)
+        return 'ok'
+    assert resiliencia.chamar('consulta', 'obras.select', ler) == 'ok'
+    assert len(tentativas) == 2
+    assert disjuntor.estado == 'fechado'
+
+# --- Prazo ---
+@pytest.fixture
+def uma_thread(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(resiliencia, '_executor', executor)
+    monkeypatch.setitem(resiliencia.TEMPOS_LIMITE, 'consulta', 0.5)
+    yield executor
+    executor.shutdown(wait=True)
+
+def test_prazo_conta_do_inicio_da_chamada(disjuntor, uma_thread):
+    ocupada = uma_thread.submit(time.sleep, 0.35)
+    # Espera 0.35 s na fila e roda mais 0.35 s: passa do limite somado, mas não do limite da chamada
+    assert resiliencia.chamar('consulta', 'obras.insert', lambda: time.sleep(0.35) or 'ok') == 'ok'
+    ocupada.result()
+    assert disjuntor.estado == 'fechado'
+
+def test_espera_por_thread_livre_nao_conta_no_disjuntor(disjuntor, uma_thread):
+    liberar = threading.Event()
+    uma_thread.submit(liberar.wait)
+    try:
+        with pytest.raises(TimeoutError, match="nenhuma conexão livre"):
+            resiliencia.chamar('consulta', 'obras.select', lambda: 'ok')
+    finally:
+        liberar.set()
+    assert disjuntor._falhas == 0
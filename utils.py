@@ -1,14 +1,21 @@
 # utils.py
+import re
 import streamlit as st
-from supabase import create_client, Client
-import pandas as pd
+from supabase import create_client, Client, ClientOptions
+from instrumentacao import ClienteInstrumentado
+from resiliencia import cliente_http
+import alteracoes
 
 # Esta função agora é responsável por criar um cliente Supabase e
 # restaurar a sessão de login, se ela existir.
+def _novo_cliente(url: str, key: str) -> Client:
+    # Tempo limite também no HTTP, o de cada chamada, para a conexão não ficar presa depois que ela desistir
+    return create_client(url, key, options=ClientOptions(httpx_client=cliente_http()))
+
 def get_supabase_client() -> Client:
     url = st.secrets["supabase_url"]
     key = st.secrets["supabase_key"]
-    client = create_client(url, key)
+    client = _novo_cliente(url, key)
     
     # Se uma sessão de usuário estiver salva, restaura ela no cliente
     if 'user_session' in st.session_state:
@@ -23,7 +30,18 @@ def get_supabase_client() -> Client:
             del st.session_state['user_session']
             del st.session_state['logged_in']
     
-    return client
+    alteracoes.iniciar_feed(client, url, key)
+    return ClienteInstrumentado(client, ao_escrever=alteracoes.registrar_escrita)
+
+def criar_cliente(url: str, key: str, token: str = None):
+    """
+    Cliente instrumentado fora de uma sessão da página (ex.: thread da fila de escritas). Com 'token'
+    (access token de um usuário), as requisições ao banco vão em nome dele, e o RLS vale como na página.
+    """
+    client = _novo_cliente(url, key)
+    if token:
+        client.postgrest.auth(token)
+    return ClienteInstrumentado(client, ao_escrever=alteracoes.registrar_escrita)
 
 def check_auth(pagina: str = "esta página"):
     """Verifica se o usuário está logado. Se não, para a execução."""
@@ -34,4 +52,41 @@ def check_auth(pagina: str = "esta página"):
 def formatar_moeda(valor):
     """Formata um número para o padrão de moeda brasileiro."""
     if valor is None: return "R$ 0,00"
-    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
\ No newline at end of file
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def sanitizar_nome_arquivo(nome_arquivo: str) -> str:
+    """Remove caracteres especiais e espaços de um nome de arquivo."""
+    nome_limpo = re.sub(r'[^\w\.\-]', '_', nome_arquivo)
+    return nome_limpo
+
+def botao_pdf(rotulo: str, chave: str, gerar, nome_arquivo: str, **opcoes):
+    """
+    Botão de PDF em dois passos: o PDF só é montado quando o usuário clica (chamando 'gerar()')
+    e fica guardado na sessão para o download, em vez de ser gerado a cada execução da página.
+    """
+    chave_pdf = f"_pdf_{chave}"
+    if chave_pdf not in st.session_state:
+        if not st.button(rotulo, key=f"gerar_{chave}", **opcoes):
+            return
+        st.session_state[chave_pdf] = gerar().getvalue()
+    st.download_button("⬇️ Baixar PDF", data=st.session_state[chave_pdf], file_name=nome_arquivo,
+                       mime="application/pdf", key=f"baixar_{chave}", **opcoes)
+
+def grade_selecionavel(df, colunas: dict, chave: str, id_padrao=None, **opcoes):
+    """
+    Lista compacta (st.dataframe) com seleção de uma linha, no lugar de um expander por registro.
+    'colunas' mapeia coluna de 'df' -> título exibido. Devolve a linha selecionada (com todas as
+    colunas de 'df') ou None; só essa linha monta o painel de detalhes. Sem seleção, 'id_padrao'
+    (ex.: vindo de um link da busca) escolhe a linha pelo 'id'.
+    """
+    df = df.reset_index(drop=True)
+    colunas = {coluna: titulo for coluna, titulo in colunas.items() if coluna in df.columns}
+    evento = st.dataframe(df[list(colunas)].rename(columns=colunas), key=chave, on_select="rerun",
+                          selection_mode="single-row", hide_index=True, use_container_width=True, **opcoes)
+    linhas = evento.selection.rows
+    if not linhas and id_padrao is not None and 'id' in df.columns:
+        linhas = df.index[df['id'].astype(str) == str(id_padrao)].tolist()[:1]
+    if not linhas or linhas[0] >= len(df):
+        st.caption("Selecione uma linha para ver os detalhes.")
+        return None
+    return df.iloc[linhas[0]]